@@ -0,0 +1,21 @@
+# Generated by Django 4.2.20 on 2026-10-17 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['first_name'], name='client_first_name_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['last_name'], name='client_last_name_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,54 @@
+import re
+from collections import defaultdict
+
+from django.db import migrations
+
+
+def normalize_document(value):
+    # Frozen copy of clients.utils.documents.normalize_document.
+    return re.sub(r"[\s.\-]", "", value or "").upper()
+
+
+def normalize_document_numbers(apps, schema_editor):
+    """
+    Stores every document number in its normalized form, so uploads and searches
+    match clients whose document was typed with dots, spaces or dashes. Stops
+    if two clients would end up with the same document, listing their ids: an
+    operator must merge them and then run the migration again.
+    """
+    Client = apps.get_model("clients", "Client")
+
+    clients = defaultdict(list)
+    for pk, document in Client.objects.order_by("pk").values_list("pk", "document_number"):
+        clients[normalize_document(document)].append((pk, document))
+
+    conflicts = [
+        f"Documento {document}: clientes {[pk for pk, _ in rows]}"
+        for document, rows in clients.items()
+        if len(rows) > 1
+    ]
+    if conflicts:
+        raise RuntimeError(
+            "No se pueden normalizar los números de documento porque varios clientes "
+            "quedarían con el mismo. Unifique estos clientes y vuelva a migrar:\n"
+            + "\n".join(conflicts)
+        )
+
+    changed = [
+        Client(pk=pk, document_number=normalized)
+        for normalized, rows in clients.items()
+        for pk, document in rows
+        if document != normalized
+    ]
+    Client.objects.bulk_update(changed, ["document_number"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0002_prefix_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_document_numbers, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
 import uuid
 from django.db import models
 
+from clients.utils.documents import normalize_document
+
 
 class Client(models.Model):
     """
@@ -13,11 +15,13 @@ class Client(models.Model):
         uid (UUIDField): A unique identifier for the client (auto-generated).
         first_name (CharField): The first name of the client (max length: 100).
         last_name (CharField): The last name of the client (max length: 100).
-        document_number (CharField): A unique identifier for the client (e.g., ID or document number, max length: 30).
+        document_number (CharField): A unique identifier for the client (e.g., ID or document number, max length: 30),
+            stored normalized (see clients.utils.documents).
         phone (CharField): The client's phone number (optional, max length: 20).
         email (EmailField): The client's unique email address.
 
     Methods:
+        save(): Normalizes the document number before saving.
         __str__(): Returns the full name of the client as a string.
     """
 
@@ -30,5 +34,27 @@ class Client(models.Model):
     phone = models.CharField("Teléfono", max_length=20, blank=True)
     email = models.EmailField("Correo electrónico", unique=True)
 
+    class Meta:
+        # varchar_pattern_ops lets PostgreSQL use the index for prefix (LIKE 'abc%')
+        # searches regardless of the collation. Other databases ignore the opclass.
+        # document_number needs none: PostgreSQL already adds a "_like" pattern
+        # index to unique CharFields.
+        indexes = [
+            models.Index(
+                fields=["first_name"],
+                name="client_first_name_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+            models.Index(
+                fields=["last_name"],
+                name="client_last_name_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.document_number = normalize_document(self.document_number)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
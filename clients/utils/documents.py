@@ -0,0 +1,16 @@
+import re
+
+
+def normalize_document(value):
+    """
+    Returns the canonical form of a document number: upper case, without dots,
+    spaces or dashes, e.g. "1.234.567" becomes "1234567". Documents are stored and
+    looked up in this form, so the same person is found however it was typed.
+
+    Args:
+        value (str): The document number as entered.
+
+    Returns:
+        str: The normalized document number.
+    """
+    return re.sub(r"[\s.\-]", "", value or "").upper()
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from contracts.utils.balances import rebuild_contract_balances, BALANCE_CHUNK_SIZE
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Django management command to rebuild the materialized balance of every contract.
+    The invoice totals are aggregated in the database one chunk of contracts at a time and
+    upserted into ContractBalance, so it can run on the whole portfolio after bulk loads or fixes.
+    Attributes:
+        help (str): Description of the command for Django's help system.
+    Methods:
+        handle(*args, **options): Main entry point for the command. Rebuilds the balances and outputs how many were written.
+    """
+
+    help = "Recalcula el saldo materializado de todos los contratos"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=BALANCE_CHUNK_SIZE,
+            help="Cantidad de contratos recalculados por lote",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            rebuilt_count = rebuild_contract_balances(chunk_size=options["chunk_size"])
+            self.stdout.write(
+                self.style.SUCCESS(f"Rebuilt Balances: {rebuilt_count}")
+            )
+        except Exception as e:
+            logger.exception(f"Error rebuilding contract balances: {e}")
+            self.stderr.write(self.style.ERROR(f"Error rebuilding contract balances: {str(e)}"))
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.20 on 2026-10-17 17:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0005_remove_contract_remaining_amount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContractBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_invoiced', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Total facturado')),
+                ('total_paid', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Total pagado')),
+                ('remaining_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Valor restante')),
+                ('pending_installments', models.PositiveIntegerField(default=0, verbose_name='Cuotas pendientes')),
+                ('last_payment_date', models.DateField(blank=True, null=True, verbose_name='Fecha del último pago')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Actualizado')),
+                ('contract', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='balance', to='contracts.contract', verbose_name='Contrato')),
+            ],
+        ),
+    ]
@@ -0,0 +1,56 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicated_active_contracts(apps, schema_editor):
+    """
+    Stops the migration if a client or a vehicle has more than one active contract,
+    listing the contract ids of each conflict. They are not deactivated here,
+    since that would silently stop billing them: an operator must decide which
+    contract stays active and then run the migration again.
+    """
+    Contract = apps.get_model("contracts", "Contract")
+
+    conflicts = []
+    for field, label in (("client_id", "Cliente"), ("vehicle_id", "Vehículo")):
+        duplicates = (
+            Contract.objects.filter(active=True)
+            .values(field)
+            .annotate(total=Count("id"))
+            .filter(total__gt=1)
+            .order_by(field)
+        )
+        for duplicate in duplicates.iterator():
+            ids = list(
+                Contract.objects.filter(active=True, **{field: duplicate[field]})
+                .order_by("-start_date", "-id")
+                .values_list("id", flat=True)
+            )
+            conflicts.append(f"{label} {duplicate[field]}: contratos activos {ids}")
+
+    if conflicts:
+        raise RuntimeError(
+            "No se pueden crear las restricciones de un contrato activo por cliente y por "
+            "vehículo. Desactive los contratos sobrantes y vuelva a migrar:\n"
+            + "\n".join(conflicts)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0006_contractbalance'),
+        ('vehicles', '0003_backfill_vehicle_availability'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicated_active_contracts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='contract',
+            constraint=models.UniqueConstraint(condition=models.Q(('active', True)), fields=('client',), name='unique_active_contract_per_client', violation_error_message='El cliente ya tiene un contrato activo.'),
+        ),
+        migrations.AddConstraint(
+            model_name='contract',
+            constraint=models.UniqueConstraint(condition=models.Q(('active', True)), fields=('vehicle',), name='unique_active_contract_per_vehicle', violation_error_message='El vehículo ya tiene un contrato activo.'),
+        ),
+    ]
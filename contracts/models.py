@@ -1,8 +1,11 @@
 import uuid
 from django.db import models
+from django.db.models import Q
 from clients.models import Client
 from vehicles.models import Vehicle
-from django.core.exceptions import ValidationError
+
+ACTIVE_CLIENT_CONSTRAINT = "unique_active_contract_per_client"
+ACTIVE_VEHICLE_CONSTRAINT = "unique_active_contract_per_vehicle"
 
 
 class Contract(models.Model):
@@ -52,17 +55,68 @@ class Contract(models.Model):
         "Valor total del contrato", max_digits=10, decimal_places=2, default=0
     )
 
-    def clean(self):
-        if self.active:
-            existing = Contract.objects.filter(client=self.client, active=True)
-            if self.pk:
-                existing = existing.exclude(pk=self.pk)
-            if existing.exists():
-                raise ValidationError("Este cliente ya tiene un contrato activo.")
-
-    def save(self, *args, **kwargs):
-        self.clean()
-        super().save(*args, **kwargs)
+    class Meta:
+        # A client and a vehicle can each have at most one active contract. The
+        # database enforces it, so concurrent requests and bulk loads cannot race.
+        constraints = [
+            models.UniqueConstraint(
+                fields=["client"],
+                condition=Q(active=True),
+                name=ACTIVE_CLIENT_CONSTRAINT,
+                violation_error_message="El cliente ya tiene un contrato activo.",
+            ),
+            models.UniqueConstraint(
+                fields=["vehicle"],
+                condition=Q(active=True),
+                name=ACTIVE_VEHICLE_CONSTRAINT,
+                violation_error_message="El vehículo ya tiene un contrato activo.",
+            ),
+        ]
 
     def __str__(self):
         return f"Contrato #{self.id} — {self.client}"
+
+
+class ContractBalance(models.Model):
+    """
+    Model representing the materialized balance of a contract.
+
+    This model keeps one narrow row per contract with the totals derived from its
+    invoices, so dashboards do not need to load the invoice history. It is refreshed
+    whenever an invoice of the contract changes and can be rebuilt in bulk with the
+    `rebuild_contract_balances` management command.
+
+    Attributes:
+        contract (OneToOneField): A reference to the associated contract (Contract model).
+        total_invoiced (DecimalField): The sum of all the invoices of the contract.
+        total_paid (DecimalField): The sum of the paid invoices of the contract.
+        remaining_amount (DecimalField): The contract amount not paid yet (never negative).
+        pending_installments (PositiveIntegerField): The installments needed to pay the remaining amount.
+        last_payment_date (DateField): The issue date of the most recent paid invoice.
+        updated_at (DateTimeField): When the balance was last refreshed.
+
+    Methods:
+        __str__(): Returns a string representation of the balance, including its contract.
+    """
+
+    contract = models.OneToOneField(
+        Contract,
+        on_delete=models.CASCADE,
+        related_name="balance",
+        verbose_name="Contrato",
+    )
+    total_invoiced = models.DecimalField(
+        "Total facturado", max_digits=12, decimal_places=2, default=0
+    )
+    total_paid = models.DecimalField(
+        "Total pagado", max_digits=12, decimal_places=2, default=0
+    )
+    remaining_amount = models.DecimalField(
+        "Valor restante", max_digits=12, decimal_places=2, default=0
+    )
+    pending_installments = models.PositiveIntegerField("Cuotas pendientes", default=0)
+    last_payment_date = models.DateField("Fecha del último pago", blank=True, null=True)
+    updated_at = models.DateTimeField("Actualizado", auto_now=True)
+
+    def __str__(self):
+        return f"Saldo del {self.contract}"
@@ -0,0 +1,55 @@
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from contracts.models import Contract
+from contracts.utils.balances import refresh_contract_balances
+from invoices.models import Invoice
+from vehicles.models import Vehicle
+from vehicles.utils.availability import refresh_vehicle_availability
+
+
+@receiver(post_save, sender=Invoice)
+def refresh_balance_on_invoice_save(sender, instance, **kwargs):
+    """Refreshes the balance of the contract whose invoice was created or changed."""
+    refresh_contract_balances([instance.contract_id])
+
+
+@receiver(post_delete, sender=Invoice)
+def refresh_balance_on_invoice_delete(sender, instance, origin=None, **kwargs):
+    """
+    Refreshes the balance of the contract whose invoice was deleted. Cascades from a
+    contract or client deletion are skipped, since the balance is deleted with them.
+    """
+    if getattr(origin, "model", type(origin)) is not Invoice:
+        return
+    refresh_contract_balances([instance.contract_id])
+
+
+@receiver(post_save, sender=Contract)
+def refresh_balance_on_contract_save(sender, instance, **kwargs):
+    """Refreshes the balance when a contract is created or its amounts change."""
+    refresh_contract_balances([instance.pk])
+
+
+@receiver(post_save, sender=Contract)
+def refresh_availability_on_contract_save(sender, instance, **kwargs):
+    """
+    Refreshes the availability of the contract's vehicle, and of the vehicle it was
+    linked to before if the contract was moved to another one.
+    """
+    vehicle_ids = Vehicle.objects.filter(
+        Q(pk=instance.vehicle_id) | Q(current_contract=instance.pk)
+    ).values_list("pk", flat=True)
+    refresh_vehicle_availability(vehicle_ids)
+
+
+@receiver(post_delete, sender=Contract)
+def refresh_availability_on_contract_delete(sender, instance, origin=None, **kwargs):
+    """
+    Refreshes the availability of the vehicle of a deleted contract. Cascades from a
+    vehicle deletion are skipped.
+    """
+    if getattr(origin, "model", type(origin)) is Vehicle:
+        return
+    refresh_vehicle_availability([instance.vehicle_id])
@@ -1,3 +1,219 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
+import logging
 
-# Create your tests here.
+from django.contrib.messages import get_messages
+from django.db import IntegrityError, transaction
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from accounts.models import User
+
+from clients.models import Client
+from contracts.models import Contract, ContractBalance
+from contracts.utils.balances import annotate_balances, rebuild_contract_balances
+from contracts.views import DashboardContractListView
+from invoices.models import Invoice
+from vehicles.models import Vehicle, VehicleModel
+
+logger = logging.getLogger(__name__)
+
+
+def create_contract(index, **kwargs):
+    """Creates a contract with its own client and vehicle."""
+    vehicle_model, _ = VehicleModel.objects.get_or_create(brand="Honda", model="CB190")
+    client = Client.objects.create(
+        first_name=f"Cliente {index}",
+        last_name="Prueba",
+        document_number=f"DOC{index}",
+        email=f"cliente{index}@example.com",
+    )
+    vehicle = Vehicle.objects.create(
+        vehicle_model=vehicle_model, license_plate=f"ABC{index:03d}"
+    )
+    defaults = {
+        "start_date": date(2025, 1, 6),
+        "weekly_payment": Decimal("100.00"),
+        "amount": Decimal("1000.00"),
+    }
+    defaults.update(kwargs)
+    return Contract.objects.create(client=client, vehicle=vehicle, **defaults)
+
+
+def create_invoice(contract, amount, payment_status="pendiente", issue_date=date(2025, 2, 1)):
+    return Invoice.objects.create(
+        contract=contract,
+        issue_date=issue_date,
+        due_date=issue_date,
+        amount=Decimal(amount),
+        payment_status=payment_status,
+    )
+
+
+class ContractBalanceTests(TestCase):
+    """Tests for the materialized contract balance."""
+
+    def setUp(self):
+        self.contract = create_contract(1)
+
+    def test_balance_is_created_with_the_contract(self):
+        """A new contract starts with its whole amount pending."""
+        balance = ContractBalance.objects.get(contract=self.contract)
+        self.assertEqual(balance.total_paid, 0)
+        self.assertEqual(balance.remaining_amount, Decimal("1000.00"))
+        self.assertEqual(balance.pending_installments, 10)
+
+    def test_balance_follows_invoice_changes(self):
+        """Creating, paying and deleting invoices refresh the balance."""
+        logger.info("Running test_balance_follows_invoice_changes")
+        create_invoice(self.contract, "100.00", "pagado", date(2025, 2, 1))
+        invoice = create_invoice(self.contract, "150.00", issue_date=date(2025, 2, 8))
+
+        balance = ContractBalance.objects.get(contract=self.contract)
+        self.assertEqual(balance.total_invoiced, Decimal("250.00"))
+        self.assertEqual(balance.total_paid, Decimal("100.00"))
+        self.assertEqual(balance.pending_installments, 9)
+        self.assertEqual(balance.last_payment_date, date(2025, 2, 1))
+
+        invoice.payment_status = "pagado"
+        invoice.save()
+        balance.refresh_from_db()
+        self.assertEqual(balance.remaining_amount, Decimal("750.00"))
+        self.assertEqual(balance.pending_installments, 8)
+        self.assertEqual(balance.last_payment_date, date(2025, 2, 8))
+
+        invoice.delete()
+        balance.refresh_from_db()
+        self.assertEqual(balance.total_paid, Decimal("100.00"))
+
+    def test_deleting_a_contract_deletes_its_balance(self):
+        """Cascaded invoice deletions do not re-create the balance."""
+        create_invoice(self.contract, "100.00", "pagado")
+        self.contract.delete()
+        self.assertFalse(ContractBalance.objects.exists())
+
+    def test_rebuild_recomputes_every_balance(self):
+        """The bulk rebuild fixes balances that drifted from the invoices."""
+        other = create_contract(2, weekly_payment=Decimal("0"))
+        create_invoice(self.contract, "300.00", "pagado")
+        ContractBalance.objects.all().delete()
+
+        self.assertEqual(rebuild_contract_balances(chunk_size=1), 2)
+        self.assertEqual(ContractBalance.objects.get(contract=self.contract).pending_installments, 7)
+        self.assertEqual(ContractBalance.objects.get(contract=other).pending_installments, 0)
+
+
+class DashboardContractListViewTests(TestCase):
+    """Tests for the balance annotations of the contract list, read from the ledger."""
+
+    def setUp(self):
+        self.paid = create_contract(1)
+        self.unpaid = create_contract(2, amount=Decimal("250.00"))
+        self.free = create_contract(3, weekly_payment=Decimal("0"))
+        create_invoice(self.paid, "350.00", "pagado")
+        create_invoice(self.paid, "100.00", "pendiente")
+        create_invoice(self.unpaid, "400.00", "pagado")
+
+    def get_queryset(self, **params):
+        view = DashboardContractListView()
+        view.request = RequestFactory().get("/fake-url", params)
+        return view.get_queryset()
+
+    def test_annotations_read_the_balance_ledger(self):
+        """The annotations come from the materialized balances, not from invoices."""
+        ContractBalance.objects.filter(contract=self.paid).update(pending_installments=42)
+        contract = annotate_balances(Contract.objects.all()).get(pk=self.paid.pk)
+        self.assertEqual(contract.pending_installments, 42)
+
+        # Without a balance row, the contract counts as unpaid.
+        ContractBalance.objects.filter(contract=self.paid).delete()
+        contract = annotate_balances(Contract.objects.all()).get(pk=self.paid.pk)
+        self.assertEqual(contract.total_paid, 0)
+        self.assertEqual(contract.remaining_amount, self.paid.amount)
+        self.assertEqual(contract.pending_installments, 10)
+
+    def test_values_are_read_in_one_query(self):
+        """No invoice rows are loaded to read the balances."""
+        with self.assertNumQueries(1):
+            rows = {c.id: (c.remaining_amount, c.pending_installments) for c in self.get_queryset()}
+        self.assertEqual(rows[self.paid.id], (Decimal("650"), 7))
+        self.assertEqual(rows[self.unpaid.id], (Decimal("0"), 0))
+        self.assertEqual(rows[self.free.id][1], 0)
+
+    def test_filter_and_sort_by_annotations(self):
+        """Annotated values can be filtered and sorted in the database."""
+        queryset = self.get_queryset(pending_installments__gt="0", page="2")
+        self.assertEqual([contract.id for contract in queryset], [self.paid.id])
+        queryset = self.get_queryset(ordering="-remaining_amount")
+        self.assertEqual(
+            [contract.id for contract in queryset],
+            [self.free.id, self.paid.id, self.unpaid.id],
+        )
+
+    def test_ordering_is_limited_to_cursor_safe_columns(self):
+        """Relations cannot be sorted by, since their value cannot be stored in a cursor."""
+        for ordering in ("client", "-vehicle"):
+            with self.subTest(ordering=ordering):
+                view = DashboardContractListView()
+                view.request = RequestFactory().get("/fake-url", {"ordering": ordering})
+                self.assertEqual(view.get_ordering(), ["pk"])
+        view.request = RequestFactory().get("/fake-url", {"ordering": "-start_date"})
+        self.assertEqual(view.get_ordering(), ["-start_date", "pk"])
+
+
+class ActiveContractConstraintTests(TestCase):
+    """Tests for the one-active-contract-per-client and per-vehicle constraints."""
+
+    def setUp(self):
+        self.contract = create_contract(1)
+        self.other = create_contract(2, active=False)
+        User.objects.create_user(
+            email="ventas@example.com", username="ventas", password="secret123"
+        )
+        self.client.login(username="ventas@example.com", password="secret123")
+
+    def post_contract(self, client, vehicle):
+        response = self.client.post(
+            reverse("manage_contract"),
+            {
+                "client": client.pk,
+                "vehicle": vehicle.pk,
+                "start_date": "2025-03-03",
+                "weekly_payment": "100.00",
+                "amount": "1000.00",
+            },
+        )
+        # Messages are not consumed between posts; the last one belongs to this post.
+        return str(list(get_messages(response.wsgi_request))[-1])
+
+    def test_database_rejects_a_second_active_contract(self):
+        """The constraint holds even without any check in Python."""
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Contract.objects.create(
+                client=self.contract.client,
+                vehicle=self.other.vehicle,
+                start_date=date(2025, 3, 3),
+                weekly_payment=Decimal("100.00"),
+            )
+        Contract.objects.create(
+            client=self.contract.client,
+            vehicle=self.other.vehicle,
+            start_date=date(2025, 3, 3),
+            weekly_payment=Decimal("100.00"),
+            active=False,
+        )
+
+    def test_view_translates_the_violated_constraint(self):
+        """The view shows the Spanish message of the client or vehicle constraint."""
+        self.assertEqual(
+            self.post_contract(self.contract.client, self.other.vehicle),
+            "El cliente ya tiene un contrato activo.",
+        )
+        self.assertEqual(
+            self.post_contract(self.other.client, self.contract.vehicle),
+            "El vehículo ya tiene un contrato activo.",
+        )
+        self.assertEqual(
+            self.post_contract(self.other.client, self.other.vehicle),
+            "Contrato creado exitosamente.",
+        )
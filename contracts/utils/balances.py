@@ -0,0 +1,210 @@
+import logging
+import math
+from decimal import Decimal
+
+from django.db.models import (
+    Case,
+    DecimalField,
+    F,
+    FloatField,
+    Func,
+    IntegerField,
+    Max,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast, Ceil, Coalesce
+
+from contracts.models import Contract, ContractBalance
+from invoices.models import Invoice
+
+logger = logging.getLogger("contracts")
+
+BALANCE_CHUNK_SIZE = 1000
+BALANCE_FIELDS = [
+    "total_invoiced",
+    "total_paid",
+    "remaining_amount",
+    "pending_installments",
+    "last_payment_date",
+    "updated_at",
+]
+
+
+class DecimalDivide(Func):
+    """
+    Division of two decimal expressions. It stays exact on PostgreSQL; on SQLite,
+    where whole decimals are stored as integers, the dividend is cast to REAL so
+    the division is not truncated.
+    """
+
+    arg_joiner = " / "
+    template = "(%(expressions)s)"
+    output_field = DecimalField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        dividend, divisor = self.get_source_expressions()
+        return Func(
+            Cast(dividend, FloatField()),
+            divisor,
+            arg_joiner=self.arg_joiner,
+            template=self.template,
+            output_field=FloatField(),
+        ).as_sql(compiler, connection, **extra_context)
+
+
+def get_pending_installments(remaining_amount, weekly_payment):
+    """
+    Returns the number of installments needed to pay the remaining amount.
+
+    Args:
+        remaining_amount (Decimal): The amount still to be paid.
+        weekly_payment (Decimal): The amount of each installment.
+
+    Returns:
+        int: The pending installments, or 0 if the installment amount is zero.
+    """
+    if not weekly_payment:
+        return 0
+    return math.ceil(remaining_amount / weekly_payment)
+
+
+def _invoice_total(payment_status=None):
+    invoices = Invoice.objects.filter(contract=OuterRef("pk"))
+    if payment_status:
+        invoices = invoices.filter(payment_status=payment_status)
+    return Coalesce(
+        Subquery(
+            invoices.order_by()
+            .values("contract")
+            .annotate(total=Sum("amount"))
+            .values("total")
+        ),
+        Value(Decimal("0")),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def annotate_balances(contracts):
+    """
+    Annotates each contract with its balance, read from the ContractBalance ledger.
+
+    Adds `total_paid`, `remaining_amount` and `pending_installments` from a join on
+    the materialized balance, so they can be filtered, sorted and paginated in the
+    database without aggregating invoices. A contract without a balance row (e.g.
+    before `rebuild_contract_balances` ran) gets the values of a contract with no
+    paid invoices.
+
+    Args:
+        contracts (QuerySet): The contracts to annotate.
+
+    Returns:
+        QuerySet: The annotated contracts.
+    """
+    amount_field = DecimalField(max_digits=12, decimal_places=2)
+    unpaid_installments = Case(
+        When(weekly_payment=0, then=Value(0)),
+        default=Cast(
+            Ceil(DecimalDivide(F("amount"), F("weekly_payment"))),
+            output_field=IntegerField(),
+        ),
+        output_field=IntegerField(),
+    )
+    return contracts.annotate(
+        total_paid=Coalesce(
+            F("balance__total_paid"), Value(Decimal("0")), output_field=amount_field
+        ),
+        remaining_amount=Coalesce(
+            F("balance__remaining_amount"), F("amount"), output_field=amount_field
+        ),
+        pending_installments=Coalesce(
+            F("balance__pending_installments"),
+            unpaid_installments,
+            output_field=IntegerField(),
+        ),
+    )
+
+
+def refresh_contract_balances(contracts):
+    """
+    Recomputes and upserts the balance of the given contracts.
+
+    The invoice totals of all the contracts are aggregated in one query and written
+    back with one `bulk_create(update_conflicts=True)`, whatever the number of contracts.
+
+    Args:
+        contracts (QuerySet or iterable): Contracts, or contract ids, to refresh.
+
+    Returns:
+        int: The number of balances written.
+    """
+    if not hasattr(contracts, "model"):
+        contracts = Contract.objects.filter(pk__in=list(contracts))
+
+    rows = contracts.order_by().annotate(
+        total_invoiced=_invoice_total(),
+        total_paid=_invoice_total("pagado"),
+        last_payment_date=Subquery(
+            Invoice.objects.filter(contract=OuterRef("pk"), payment_status="pagado")
+            .order_by()
+            .values("contract")
+            .annotate(last=Max("issue_date"))
+            .values("last")
+        ),
+    ).values(
+        "id", "amount", "weekly_payment", "total_invoiced", "total_paid", "last_payment_date"
+    )
+
+    balances = []
+    for row in rows:
+        remaining_amount = max(row["amount"] - row["total_paid"], 0)
+        balances.append(
+            ContractBalance(
+                contract_id=row["id"],
+                total_invoiced=row["total_invoiced"],
+                total_paid=row["total_paid"],
+                remaining_amount=remaining_amount,
+                pending_installments=get_pending_installments(
+                    remaining_amount, row["weekly_payment"]
+                ),
+                last_payment_date=row["last_payment_date"],
+            )
+        )
+
+    if balances:
+        ContractBalance.objects.bulk_create(
+            balances,
+            update_conflicts=True,
+            unique_fields=["contract"],
+            update_fields=BALANCE_FIELDS,
+        )
+    return len(balances)
+
+
+def rebuild_contract_balances(chunk_size=BALANCE_CHUNK_SIZE):
+    """
+    Rebuilds the balance of every contract, one primary-key chunk at a time.
+
+    Args:
+        chunk_size (int): Number of contracts refreshed per chunk.
+
+    Returns:
+        int: The number of balances written.
+    """
+    rebuilt_count = 0
+    last_id = 0
+    while True:
+        ids = list(
+            Contract.objects.filter(pk__gt=last_id)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:chunk_size]
+        )
+        if not ids:
+            break
+        last_id = ids[-1]
+        rebuilt_count += refresh_contract_balances(ids)
+    logger.info(f"Rebuilt {rebuilt_count} contract balances")
+    return rebuilt_count
@@ -0,0 +1,28 @@
+from contracts.models import ACTIVE_CLIENT_CONSTRAINT, ACTIVE_VEHICLE_CONSTRAINT, Contract
+
+# Text found in the IntegrityError of each constraint: PostgreSQL names the
+# constraint, SQLite names the column of the partial unique index.
+ACTIVE_CONTRACT_ERRORS = {
+    ACTIVE_CLIENT_CONSTRAINT: ("contracts_contract.client_id",),
+    ACTIVE_VEHICLE_CONSTRAINT: ("contracts_contract.vehicle_id",),
+}
+
+
+def get_active_contract_error(error):
+    """
+    Translates an IntegrityError raised by the active contract constraints into
+    the message shown to the user.
+
+    Args:
+        error (IntegrityError): The error raised while saving a contract.
+
+    Returns:
+        str or None: The Spanish message of the violated constraint, or None if the
+        error comes from another constraint.
+    """
+    text = str(error)
+    for constraint in Contract._meta.constraints:
+        markers = ACTIVE_CONTRACT_ERRORS.get(constraint.name)
+        if markers and any(marker in text for marker in (constraint.name, *markers)):
+            return constraint.violation_error_message
+    return None
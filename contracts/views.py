@@ -2,14 +2,16 @@ from django.shortcuts import redirect
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views import View
 from django.contrib import messages
+from django.db import IntegrityError, transaction
 from django.views.generic import ListView
-from django.db.models import Prefetch
 import logging
 
 from .models import Contract
+from .utils.balances import annotate_balances
+from .utils.integrity import get_active_contract_error
+from dashboard.utils.pagination import KeysetPaginationMixin
 from clients.models import Client
 from vehicles.models import Vehicle
-from invoices.models import Invoice
 
 logger = logging.getLogger(__name__)
 
@@ -34,55 +36,88 @@ class CreateContractInstanceView(LoginRequiredMixin, View):
             data = {k: v for k, v in request.POST.items() if k != "csrfmiddlewaretoken"}
 
             if "client" in data:
-                client = Client.objects.get(pk=data["client"])
-                if client.contract_set.filter(active=True).exists():
-                    messages.error(request, "El cliente ya tiene un contrato activo.")
-                    return redirect("role_dashboard")
-                data["client"] = client
+                data["client"] = Client.objects.get(pk=data["client"])
 
             if "vehicle" in data:
-                vehicle = Vehicle.objects.get(pk=data["vehicle"])
-                if vehicle.contract_set.filter(active=True).exists():
-                    messages.error(request, "El vehículo ya tiene un contrato activo.")
-                    return redirect("role_dashboard")
-                data["vehicle"] = vehicle
+                data["vehicle"] = Vehicle.objects.get(pk=data["vehicle"])
 
             if "active" in data:
                 data["active"] = bool(data["active"])
 
-            Contract.objects.create(**data)
+            # One active contract per client and per vehicle is enforced by the
+            # database constraints, so concurrent requests cannot both pass.
+            with transaction.atomic():
+                Contract.objects.create(**data)
             messages.success(request, "Contrato creado exitosamente.")
+        except IntegrityError as e:
+            message = get_active_contract_error(e)
+            if message is None:
+                logger.error(f"Error creating contract instance: {e}")
+                message = "Error al crear contrato."
+            messages.error(request, message)
         except Exception as e:
             logger.error(f"Error creating contract instance: {e}")
             messages.error(request, "Error al crear contrato.")
         return redirect("role_dashboard")
 
 
-class DashboardContractListView(LoginRequiredMixin, ListView):
+class DashboardContractListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
+    """
+    List of contracts used by the collections dashboard.
+
+    The queryset carries `total_paid`, `remaining_amount` and `pending_installments`
+    read from the ContractBalance ledger. GET parameters are applied as filters when they target a
+    contract field or one of those annotations, and `ordering` sorts by them.
+    Pages are read with (sort_key, id) cursors, so deep pages cost the same as page 1.
+    """
+
     model = Contract
     template_name = None
     context_object_name = "contracts"
     paginate_by = 20
+    keyset_pagination = True
+    annotated_fields = ["total_paid", "remaining_amount", "pending_installments"]
+
+    def get_filter_fields(self):
+        return [field.name for field in Contract._meta.fields] + self.annotated_fields
+
+    def get_ordering_fields(self):
+        """
+        Columns accepted by `ordering`: scalar, non-null contract fields and the
+        annotations (which are never null). The keyset cursor stores the sort value,
+        so relations and nullable columns cannot be used.
+        """
+        fields = [
+            field.name
+            for field in Contract._meta.concrete_fields
+            if not field.is_relation and not field.null
+        ]
+        return fields + self.annotated_fields
+
+    def get_ordering(self):
+        ordering = self.request.GET.get("ordering")
+        if ordering and ordering.lstrip("-") in self.get_ordering_fields():
+            return [ordering, "pk"]
+        return ["pk"]
 
     def get_queryset(self):
         try:
-            filter_params = {k: v for k, v in self.request.GET.items() if v}
+            filter_fields = self.get_filter_fields()
+            filter_params = {
+                k: v
+                for k, v in self.request.GET.items()
+                if v and k != "ordering" and k.split("__")[0] in filter_fields
+            }
 
             logger.debug(
                 f"[DashboardContractListView] Filtros dinámicos: {filter_params}"
             )
 
             return (
-                Contract.objects
+                annotate_balances(Contract.objects.all())
                 .filter(**filter_params)
                 .select_related("client", "vehicle", "vehicle__vehicle_model")
-                .prefetch_related(
-                    Prefetch(
-                        "invoice_set",
-                        queryset=Invoice.objects.filter(payment_status="pagado"),
-                        to_attr="paid_invoices",
-                    ),
-                )
+                .order_by(*self.get_ordering())
             )
         except Exception as e:
             logger.error(f"[DashboardContractListView] Error al aplicar filtros: {e}")
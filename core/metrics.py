@@ -0,0 +1,200 @@
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY = "crm:metrics"
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+JOB_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800)
+
+# name: (type, help). Histograms are stored as their _bucket, _sum and _count series.
+METRICS = {
+    "crm_http_request_duration_seconds": (
+        "histogram",
+        "Latencia de las peticiones HTTP por nombre de URL.",
+    ),
+    "crm_db_queries_total": (
+        "counter",
+        "Consultas SQL ejecutadas por nombre de URL.",
+    ),
+    "crm_rq_queue_depth": (
+        "gauge",
+        "Trabajos en espera en cada cola de RQ.",
+    ),
+    "crm_job_duration_seconds": (
+        "histogram",
+        "Duración de los trabajos de RQ.",
+    ),
+    "crm_invoice_run_duration_seconds": (
+        "histogram",
+        "Duración de las ejecuciones de facturación.",
+    ),
+    "crm_dashboard_cache_requests_total": (
+        "counter",
+        "Consultas a la caché de los dashboards por rol y resultado (hit/miss).",
+    ),
+}
+
+
+def _series(name, labels):
+    if not labels:
+        return name
+    # `le` goes last so histogram buckets of the same labels sort together.
+    keys = sorted(labels, key=lambda key: (key == "le", key))
+    body = ",".join(
+        '{}="{}"'.format(key, str(labels[key]).replace("\\", "\\\\").replace('"', '\\"'))
+        for key in keys
+    )
+    return f"{name}{{{body}}}"
+
+
+class LocalMetricsStore:
+    """In-process store. Each gunicorn worker or RQ worker only sees its own values."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = defaultdict(float)
+
+    def increment(self, increments):
+        with self.lock:
+            for series, amount in increments.items():
+                self.values[series] += amount
+
+    def read(self):
+        with self.lock:
+            return dict(self.values)
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+
+class RedisMetricsStore:
+    """
+    Store shared by every process through a Redis hash, so the /metrics endpoint of
+    any web worker reports the totals of all web and RQ workers.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def increment(self, increments):
+        pipeline = self.connection.pipeline(transaction=False)
+        for series, amount in increments.items():
+            pipeline.hincrbyfloat(METRICS_KEY, series, amount)
+        pipeline.execute()
+
+    def read(self):
+        return {
+            series.decode("utf-8"): float(value)
+            for series, value in self.connection.hgetall(METRICS_KEY).items()
+        }
+
+    def clear(self):
+        self.connection.delete(METRICS_KEY)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    Returns the metrics store: Redis (the django_rq connection) when METRICS_BACKEND
+    is "redis", the in-process store otherwise.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if getattr(settings, "METRICS_BACKEND", "local") == "redis":
+                    import django_rq
+
+                    _store = RedisMetricsStore(django_rq.get_connection("default"))
+                else:
+                    logger.warning(
+                        "Metrics are kept in process memory (no REDIS_URL): /metrics "
+                        "only reports the process that serves it, not every worker."
+                    )
+                    _store = LocalMetricsStore()
+    return _store
+
+
+def _safe_increment(increments):
+    try:
+        get_store().increment(increments)
+    except Exception as e:
+        logger.warning(f"Could not record metrics: {e}")
+
+
+def inc(name, amount=1, **labels):
+    """Adds `amount` to a counter."""
+    _safe_increment({_series(name, labels): amount})
+
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    """Records a value in a histogram."""
+    increments = {}
+    for bound in buckets:
+        # Zero increments create the empty buckets, which Prometheus expects.
+        increments[_series(f"{name}_bucket", {**labels, "le": bound})] = int(value <= bound)
+    increments[_series(f"{name}_bucket", {**labels, "le": "+Inf"})] = 1
+    increments[_series(f"{name}_sum", labels)] = value
+    increments[_series(f"{name}_count", labels)] = 1
+    _safe_increment(increments)
+
+
+def _queue_depths():
+    import django_rq
+
+    depths = {}
+    for name in settings.RQ_QUEUES:
+        try:
+            depths[_series("crm_rq_queue_depth", {"queue": name})] = django_rq.get_queue(name).count
+        except Exception as e:
+            logger.warning(f"Could not read the depth of RQ queue {name}: {e}")
+    return depths
+
+
+def render_metrics():
+    """
+    Renders every metric in the Prometheus text exposition format.
+
+    Returns:
+        str: The metrics, grouped by name with their HELP and TYPE lines.
+    """
+    values = get_store().read()
+    values.update(_queue_depths())
+
+    by_name = defaultdict(list)
+    for series, value in values.items():
+        base = series.split("{", 1)[0]
+        for suffix in ("_bucket", "_sum", "_count"):
+            if base.endswith(suffix) and base[: -len(suffix)] in METRICS:
+                base = base[: -len(suffix)]
+                break
+        by_name[base].append((series, value))
+
+    lines = []
+    for name in sorted(by_name):
+        metric_type, help_text = METRICS.get(name, ("untyped", ""))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for series, value in sorted(by_name[name], key=lambda item: _sort_key(item[0])):
+            value = float(value)
+            lines.append(f"{series} {int(value) if value.is_integer() else value}")
+    return "\n".join(lines) + "\n"
+
+
+def _sort_key(series):
+    # Keeps histogram buckets in ascending `le` order, +Inf last.
+    # `le` is always the last label, so labels such as `role` are not mistaken for it.
+    separator = next((sep for sep in (',le="', '{le="') if sep in series), None)
+    if separator is None:
+        return (series, 0)
+    prefix, rest = series.split(separator, 1)
+    bound = rest.split('"', 1)[0]
+    return (prefix, float("inf") if bound == "+Inf" else float(bound))
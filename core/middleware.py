@@ -0,0 +1,246 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends import django as django_backend
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+INSTRUMENTATION_WINDOW = 1000
+INSTRUMENTATION_LOG_EVERY = 500
+
+_current_stats = contextvars.ContextVar("request_stats", default=None)
+
+
+class RequestStats:
+    """
+    Measurements of a single request.
+
+    Attributes:
+        view_name (str): The resolved URL name, or "unresolved" if it did not resolve.
+        queries (Counter): Number of executions of each SQL statement (without params).
+        sql_time (float): Seconds spent executing SQL.
+        template_time (float): Seconds spent rendering templates.
+        total_time (float): Seconds spent in the whole request.
+    """
+
+    def __init__(self):
+        self.view_name = None
+        self.queries = Counter()
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.total_time = 0.0
+
+    @property
+    def query_count(self):
+        return sum(self.queries.values())
+
+    @property
+    def duplicate_count(self):
+        """Executions of statements that already ran in this request (N+1 pattern)."""
+        return sum(count - 1 for count in self.queries.values() if count > 1)
+
+    def record_query(self, execute, sql, params, many, context):
+        """`connection.execute_wrapper` hook: times every statement sent to the database."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.queries[sql] += 1
+
+    def server_timing(self):
+        """Returns the value of the Server-Timing header."""
+        return ", ".join(
+            [
+                f'db;dur={self.sql_time * 1000:.1f};desc="{self.query_count} queries"',
+                f'dup;desc="{self.duplicate_count} duplicated queries"',
+                f"tpl;dur={self.template_time * 1000:.1f}",
+                f"total;dur={self.total_time * 1000:.1f}",
+            ]
+        )
+
+
+class RollingSummary:
+    """
+    Thread-safe, in-process summary of the last requests of each view.
+
+    Args:
+        window (int): Number of requests kept per view.
+    """
+
+    def __init__(self, window=INSTRUMENTATION_WINDOW):
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+        self.count = 0
+
+    def add(self, stats):
+        with self.lock:
+            self.samples[stats.view_name].append(
+                (
+                    stats.total_time,
+                    stats.query_count,
+                    stats.duplicate_count,
+                    stats.sql_time,
+                    stats.template_time,
+                )
+            )
+            self.count += 1
+            return self.count
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+            self.count = 0
+
+    def snapshot(self):
+        """
+        Returns the summary of every view.
+
+        Returns:
+            dict: Per view name, the number of requests in the window, average and p95
+            latency in ms, average and max query count, duplicated queries, and average
+            SQL and template time in ms.
+        """
+        with self.lock:
+            samples = {view: list(values) for view, values in self.samples.items()}
+
+        summary = {}
+        for view, values in samples.items():
+            latencies = sorted(value[0] for value in values)
+            queries = [value[1] for value in values]
+            total = len(values)
+            summary[view] = {
+                "requests": total,
+                "avg_ms": sum(latencies) / total * 1000,
+                "p95_ms": latencies[min(int(total * 0.95), total - 1)] * 1000,
+                "avg_queries": sum(queries) / total,
+                "max_queries": max(queries),
+                "duplicated_queries": sum(value[2] for value in values),
+                "avg_sql_ms": sum(value[3] for value in values) / total * 1000,
+                "avg_template_ms": sum(value[4] for value in values) / total * 1000,
+            }
+        return summary
+
+
+request_summary = RollingSummary()
+
+
+def _install_template_timing():
+    """Wraps the Django template backend so template render time is attributed to the request."""
+    template_class = django_backend.Template
+    if getattr(template_class.render, "_instrumented", False):
+        return
+    original_render = template_class.render
+
+    def render(self, context=None, request=None):
+        stats = _current_stats.get()
+        if stats is None:
+            return original_render(self, context, request)
+        started = time.perf_counter()
+        try:
+            return original_render(self, context, request)
+        finally:
+            stats.template_time += time.perf_counter() - started
+
+    render._instrumented = True
+    template_class.render = render
+
+
+class InstrumentationMiddleware:
+    """
+    Opt-in middleware that measures each request: view name, SQL query count and
+    time, duplicated queries, template render time and total latency.
+
+    Enabled with the INSTRUMENTATION_ENABLED setting. It does not rely on DEBUG
+    (`connection.queries`), so it works in production. Measurements are sent in the
+    Server-Timing header and added to `request_summary`, which is logged every
+    INSTRUMENTATION_LOG_EVERY requests.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "INSTRUMENTATION_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        _install_template_timing()
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats.record_query))
+                response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        stats.total_time = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        # A fixed label keeps `request_summary` bounded when clients probe random paths.
+        stats.view_name = match.view_name if match and match.view_name else "unresolved"
+        response["Server-Timing"] = stats.server_timing()
+
+        if stats.duplicate_count:
+            statement, count = stats.queries.most_common(1)[0]
+            logger.warning(
+                f"{stats.view_name}: {stats.duplicate_count} duplicated queries "
+                f"(x{count}: {statement[:200]})"
+            )
+
+        total = request_summary.add(stats)
+        if total % getattr(settings, "INSTRUMENTATION_LOG_EVERY", INSTRUMENTATION_LOG_EVERY) == 0:
+            for view, values in request_summary.snapshot().items():
+                logger.info(
+                    f"{view}: {values['requests']} req, avg {values['avg_ms']:.1f}ms, "
+                    f"p95 {values['p95_ms']:.1f}ms, avg {values['avg_queries']:.1f} queries, "
+                    f"{values['duplicated_queries']} duplicated"
+                )
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Records the Prometheus request metrics served by /metrics: a latency histogram
+    and the number of SQL queries, labelled by URL name.
+
+    Enabled with the METRICS_ENABLED setting. Queries are counted with
+    `connection.execute_wrapper`, so DEBUG is not needed.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "METRICS_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        query_count = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal query_count
+            query_count += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count_query))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match and match.view_name else "unresolved"
+        if view != "metrics":
+            metrics.observe("crm_http_request_duration_seconds", duration, view=view)
+            metrics.inc("crm_db_queries_total", query_count, view=view)
+        return response
@@ -55,11 +55,64 @@ RQ_QUEUES = {
     "default": {
         "URL": os.environ.get("REDIS_URL", "redis://127.0.0.1:6379/0"),
         "DEFAULT_TIMEOUT": 360,
-    }
+    },
+    "billing": {
+        "URL": os.environ.get("REDIS_URL", "redis://127.0.0.1:6379/0"),
+        "DEFAULT_TIMEOUT": 1800,
+    },
 }
 
+# Cache used by the role dashboards. Redis is shared by every process; the
+# local-memory cache is per process and is used when REDIS_URL is not set.
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Seconds a role dashboard payload is kept. Model changes invalidate it sooner.
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get("DASHBOARD_CACHE_TIMEOUT", 300))
+
+# Create forms switch a foreign key from a <select> to the autocomplete endpoint
+# once the related table has more rows than this.
+AUTOCOMPLETE_THRESHOLD = int(os.environ.get("AUTOCOMPLETE_THRESHOLD", 200))
+
+# Per-request query count, SQL/template time and Server-Timing headers (see
+# core.middleware). Off unless INSTRUMENTATION_ENABLED=1.
+INSTRUMENTATION_ENABLED = os.environ.get("INSTRUMENTATION_ENABLED") == "1"
+
+# Prometheus metrics served at /metrics (see core.metrics). Off unless
+# METRICS_ENABLED=1. Scrapers authenticate with METRICS_TOKEN; without a token only
+# staff users can read the endpoint. With REDIS_URL set the values are kept in
+# Redis and aggregated across web and RQ worker processes; otherwise each process
+# only reports its own, which is only meant for local development.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED") == "1"
+METRICS_BACKEND = "redis" if os.environ.get("REDIS_URL") else "local"
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Largest dashboard upload accepted, in MB. Files are read as a stream and
+# processed in batches, so the limit only bounds the upload itself.
+UPLOAD_MAX_SIZE = int(os.environ.get("UPLOAD_MAX_SIZE_MB", 100)) * 1024 * 1024
+
+# Dashboard uploads are imported by an RQ job. Without a worker (no REDIS_URL, or
+# DATASET_IMPORT_ASYNC=0) they are imported during the upload request.
+DATASET_IMPORT_ASYNC = (
+    os.environ.get("DATASET_IMPORT_ASYNC", "1" if os.environ.get("REDIS_URL") else "0")
+    == "1"
+)
+
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.MetricsMiddleware",
+    "core.middleware.InstrumentationMiddleware",
     'whitenoise.middleware.WhiteNoiseMiddleware',
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -140,6 +193,11 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 STATIC_URL = "/static/"
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Uploaded dashboard files wait here until the import job reads them. The web and
+# RQ worker processes must share this storage.
+MEDIA_URL = "/media/"
+MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,128 @@
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import User
+from core.metrics import get_store, observe, render_metrics
+from core.middleware import RequestStats, request_summary
+from dashboard.tests.test_role_dashboard_views import create_portfolio
+
+
+@override_settings(INSTRUMENTATION_ENABLED=True, DEBUG=False)
+class InstrumentationMiddlewareTests(TestCase):
+    """Tests for the opt-in request instrumentation."""
+
+    def setUp(self):
+        cache.clear()
+        request_summary.clear()
+        user = User.objects.create_user(
+            email="ventas@example.com", username="ventas", password="secret123"
+        )
+        user.groups.add(Group.objects.create(name="Ventas"))
+        self.client.login(username="ventas@example.com", password="secret123")
+        create_portfolio(3)
+
+    def test_server_timing_header(self):
+        """Responses carry the SQL, template and total timings."""
+        response = self.client.get(reverse("role_dashboard"))
+        header = response["Server-Timing"]
+        self.assertRegex(header, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn("tpl;dur=", header)
+        self.assertIn("total;dur=", header)
+
+    def test_summary_is_kept_per_view(self):
+        """The rolling summary groups requests by URL name."""
+        self.client.get(reverse("role_dashboard"))
+        self.client.get(reverse("role_dashboard"))
+        summary = request_summary.snapshot()["role_dashboard"]
+        self.assertEqual(summary["requests"], 2)
+        self.assertGreater(summary["max_queries"], 0)
+        self.assertGreater(summary["avg_template_ms"], 0)
+
+    def test_unresolved_paths_share_one_entry(self):
+        """Requests that match no URL do not add one summary entry per path."""
+        self.client.get("/no-existe-1/")
+        self.client.get("/no-existe-2/")
+        summary = request_summary.snapshot()
+        self.assertEqual(summary["unresolved"]["requests"], 2)
+        self.assertNotIn("/no-existe-1/", summary)
+
+    def test_duplicated_queries_are_counted(self):
+        """Repeated statements are reported as N+1 duplicates."""
+        stats = RequestStats()
+        execute = lambda sql, params, many, context: None  # noqa: E731
+        for pk in range(3):
+            stats.record_query(execute, "SELECT * FROM clients_client WHERE id = %s", [pk], False, {})
+        stats.record_query(execute, "SELECT 1", [], False, {})
+        self.assertEqual((stats.query_count, stats.duplicate_count), (4, 2))
+
+    @override_settings(INSTRUMENTATION_ENABLED=False)
+    def test_disabled_by_default(self):
+        """Without the setting the middleware is not loaded."""
+        response = self.client.get(reverse("role_dashboard"))
+        self.assertNotIn("Server-Timing", response)
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_TOKEN="")
+class MetricsTests(TestCase):
+    """Tests for the Prometheus metrics endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        get_store().clear()
+
+    def test_histogram_format(self):
+        """Histograms render cumulative buckets in order, with sum and count."""
+        observe("crm_job_duration_seconds", 3, buckets=(1, 5), job="report")
+        observe("crm_job_duration_seconds", 7, buckets=(1, 5), job="report")
+        lines = [line for line in render_metrics().splitlines() if "crm_job" in line]
+        self.assertEqual(
+            lines,
+            [
+                "# HELP crm_job_duration_seconds Duración de los trabajos de RQ.",
+                "# TYPE crm_job_duration_seconds histogram",
+                'crm_job_duration_seconds_bucket{job="report",le="1"} 0',
+                'crm_job_duration_seconds_bucket{job="report",le="5"} 1',
+                'crm_job_duration_seconds_bucket{job="report",le="+Inf"} 2',
+                'crm_job_duration_seconds_count{job="report"} 2',
+                'crm_job_duration_seconds_sum{job="report"} 10',
+            ],
+        )
+
+    def test_requests_are_measured_per_url_name(self):
+        """The middleware records latency and query counts of each view."""
+        User.objects.create_user(
+            email="ventas@example.com", username="ventas", password="secret123", is_staff=True
+        )
+        self.client.login(username="ventas@example.com", password="secret123")
+        self.client.get(reverse("dashboard"))
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('crm_http_request_duration_seconds_count{view="dashboard"} 1', body)
+        self.assertRegex(body, r'crm_db_queries_total\{view="dashboard"\} [1-9]')
+        self.assertNotIn('view="metrics"', body)
+
+    @override_settings(METRICS_TOKEN="secreto")
+    def test_token_is_required_when_configured(self):
+        """A configured token must be sent as a bearer token."""
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        response = self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer secreto"
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_staff_is_required_without_token(self):
+        """Without a token, anonymous and non-staff users are refused."""
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        User.objects.create_user(
+            email="cobranzas@example.com", username="cobranzas", password="secret123"
+        )
+        self.client.login(username="cobranzas@example.com", password="secret123")
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_endpoint_is_off_unless_enabled(self):
+        """The endpoint does not exist unless metrics are enabled."""
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 404)
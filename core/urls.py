@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from core.views import MetricsView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("accounts/", include("accounts.urls")),
@@ -11,4 +13,5 @@ urlpatterns = [
     path("vehicles/", include("vehicles.urls")),
     path("clients/", include("clients.urls")),
     path("django-rq/", include("django_rq.urls")),
+    path("metrics", MetricsView.as_view(), name="metrics"),
 ]
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.views import View
+
+from core.metrics import render_metrics
+
+
+class MetricsView(View):
+    """
+    Serves the application metrics in the Prometheus text format.
+
+    Only available with the METRICS_ENABLED setting. When METRICS_TOKEN is defined,
+    requests must send it as `Authorization: Bearer <token>`; otherwise only staff
+    users can read the metrics.
+    """
+
+    def get(self, request):
+        if not getattr(settings, "METRICS_ENABLED", False):
+            raise Http404
+        token = getattr(settings, "METRICS_TOKEN", "")
+        if token:
+            allowed = request.headers.get("Authorization") == f"Bearer {token}"
+        else:
+            allowed = request.user.is_authenticated and request.user.is_staff
+        if not allowed:
+            return HttpResponseForbidden("Acceso denegado")
+        return HttpResponse(
+            render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
@@ -8,3 +8,6 @@ REQUIRED_COLUMNS = {
     "Modelo del auto",
     "Placa del auto",
 }
+# Optional: the total amount of the contract. Without it, rows can only update
+# existing contracts, since a new one would be created with a zero amount.
+AMOUNT_COLUMN = "Monto total"
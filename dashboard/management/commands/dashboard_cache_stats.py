@@ -0,0 +1,36 @@
+import pkgutil
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from dashboard import role_context_builders
+from dashboard.utils.cache import get_cache_stats
+
+
+class Command(BaseCommand):
+    """
+    Django management command to report the hit/miss ratio of the role dashboard cache,
+    for every role context builder and in total.
+    Attributes:
+        help (str): Description of the command for Django's help system.
+    Methods:
+        handle(*args, **options): Writes one line per role with its hits, misses and hit ratio.
+    """
+
+    help = "Muestra la tasa de aciertos de la caché de los dashboards por rol"
+
+    def handle(self, *args, **options):
+        if settings.CACHES["default"]["BACKEND"].endswith("LocMemCache"):
+            # The counters live in the memory of each web process, not in this one.
+            self.stderr.write(
+                "La caché es local a cada proceso (sin REDIS_URL): los contadores de "
+                "este comando siempre están en cero. Consulte la métrica "
+                "crm_dashboard_cache_requests_total en /metrics."
+            )
+        roles = sorted(module.name for module in pkgutil.iter_modules(role_context_builders.__path__))
+        for role in roles + ["all"]:
+            stats = get_cache_stats(role)
+            ratio = f"{stats['ratio']:.1%}" if stats["ratio"] is not None else "N/A"
+            self.stdout.write(
+                f"{role}: hits={stats['hits']} misses={stats['misses']} ratio={ratio}"
+            )
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.20 on 2026-10-17 18:12
+
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadedDataset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filename', models.CharField(max_length=255, verbose_name='Archivo')),
+                ('columns', models.JSONField(default=list, verbose_name='Columnas')),
+                ('row_count', models.PositiveIntegerField(default=0, verbose_name='Filas')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de carga')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='datasets', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DatasetRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('values', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('search_text', models.TextField(blank=True, default='')),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rows', to='dashboard.uploadeddataset')),
+            ],
+            options={
+                'ordering': ['position'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='datasetrow',
+            constraint=models.UniqueConstraint(fields=('dataset', 'position'), name='unique_dataset_row_position'),
+        ),
+    ]
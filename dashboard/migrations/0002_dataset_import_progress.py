@@ -0,0 +1,64 @@
+# Generated by Django 4.2.20 on 2026-10-17 18:15
+
+from django.db import migrations, models
+
+
+def mark_existing_completed(apps, schema_editor):
+    # Datasets stored before the import job existed were imported on upload.
+    apps.get_model("dashboard", "UploadedDataset").objects.update(status="completed")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_dataset_store'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadeddataset',
+            name='bytes_read',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='Bytes leídos'),
+        ),
+        migrations.AddField(
+            model_name='uploadeddataset',
+            name='error',
+            field=models.TextField(blank=True, verbose_name='Error'),
+        ),
+        migrations.AddField(
+            model_name='uploadeddataset',
+            name='error_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Filas con errores'),
+        ),
+        migrations.AddField(
+            model_name='uploadeddataset',
+            name='errors',
+            field=models.JSONField(default=list, verbose_name='Errores'),
+        ),
+        migrations.AddField(
+            model_name='uploadeddataset',
+            name='file_size',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='Tamaño'),
+        ),
+        migrations.AddField(
+            model_name='uploadeddataset',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Fin'),
+        ),
+        migrations.AddField(
+            model_name='uploadeddataset',
+            name='source',
+            field=models.FileField(blank=True, upload_to='uploads/%Y/%m/', verbose_name='Archivo original'),
+        ),
+        migrations.AddField(
+            model_name='uploadeddataset',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Inicio'),
+        ),
+        migrations.AddField(
+            model_name='uploadeddataset',
+            name='status',
+            field=models.CharField(choices=[('pending', 'En cola'), ('processing', 'Procesando'), ('completed', 'Completado'), ('failed', 'Fallido')], default='pending', max_length=10, verbose_name='Estado'),
+        ),
+        migrations.RunPython(mark_existing_completed, migrations.RunPython.noop),
+    ]
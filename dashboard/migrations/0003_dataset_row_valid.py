@@ -0,0 +1,18 @@
+# Generated by Django 4.2.20 on 2026-10-17 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_dataset_import_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetrow',
+            name='valid',
+            field=models.BooleanField(default=True),
+        ),
+    ]
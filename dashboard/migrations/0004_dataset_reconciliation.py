@@ -0,0 +1,18 @@
+# Generated by Django 4.2.20 on 2026-10-17 18:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_dataset_row_valid'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadeddataset',
+            name='reconciliation',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Conciliación'),
+        ),
+    ]
@@ -1,3 +1,158 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class UploadedDataset(models.Model):
+    """
+    Model representing a file uploaded to the dashboard.
+
+    The rows are kept in DatasetRow instead of the session, so the session only
+    holds the dataset id and each page or search reads just the rows it shows.
+    Files are imported by a background job (see dashboard.tasks), which records
+    its progress here after each batch.
+
+    Attributes:
+        owner (ForeignKey): The user who uploaded the file.
+        filename (CharField): The name of the uploaded file.
+        source (FileField): The uploaded file, kept until it is imported.
+        file_size (PositiveBigIntegerField): The size of the uploaded file in bytes.
+        status (CharField): The status of the import, with choices:
+            - "pending": The import job has not started.
+            - "processing": Rows are being imported.
+            - "completed": Every row was imported.
+            - "failed": The file could not be read; no rows are kept.
+        columns (JSONField): The column headers, in file order.
+        row_count (PositiveIntegerField): The number of rows stored.
+        bytes_read (PositiveBigIntegerField): How much of the file has been read.
+        error_count (PositiveIntegerField): The number of rows with invalid values.
+        errors (JSONField): The first invalid cells, as [row, column index, message]
+            lists (see dashboard.utils.coercion).
+        error (TextField): The error that stopped the import, if any.
+        reconciliation (JSONField): How the rows compare with the existing clients,
+            vehicles and contracts (see dashboard.utils.reconciliation).
+        created_at (DateTimeField): When the file was uploaded.
+        started_at (DateTimeField): When the import started.
+        finished_at (DateTimeField): When the import completed or failed.
+
+    Methods:
+        start(): Marks the import as processing and resets its counters.
+        record_batch(rows, bytes_read, errors): Records the progress after a stored batch.
+        get_error_report(): Returns the stored errors with their column names.
+        finish(): Marks the import as completed.
+        fail(error): Marks the import as failed.
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "En cola"),
+        ("processing", "Procesando"),
+        ("completed", "Completado"),
+        ("failed", "Fallido"),
+    ]
+    # Invalid cells kept for display; the rest are only counted.
+    MAX_ERRORS = 50
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="datasets",
+        verbose_name="Usuario",
+    )
+    filename = models.CharField("Archivo", max_length=255)
+    source = models.FileField("Archivo original", upload_to="uploads/%Y/%m/", blank=True)
+    file_size = models.PositiveBigIntegerField("Tamaño", default=0)
+    status = models.CharField(
+        "Estado", max_length=10, choices=STATUS_CHOICES, default="pending"
+    )
+    columns = models.JSONField("Columnas", default=list)
+    row_count = models.PositiveIntegerField("Filas", default=0)
+    bytes_read = models.PositiveBigIntegerField("Bytes leídos", default=0)
+    error_count = models.PositiveIntegerField("Filas con errores", default=0)
+    errors = models.JSONField("Errores", default=list)
+    error = models.TextField("Error", blank=True)
+    reconciliation = models.JSONField("Conciliación", default=dict, blank=True)
+    created_at = models.DateTimeField("Fecha de carga", auto_now_add=True)
+    started_at = models.DateTimeField("Inicio", blank=True, null=True)
+    finished_at = models.DateTimeField("Fin", blank=True, null=True)
+
+    @property
+    def in_progress(self):
+        return self.status in ("pending", "processing")
+
+    def start(self):
+        self.status = "processing"
+        self.started_at = timezone.now()
+        self.row_count = self.bytes_read = self.error_count = 0
+        self.errors = []
+        self.save(
+            update_fields=[
+                "status",
+                "started_at",
+                "row_count",
+                "bytes_read",
+                "error_count",
+                "errors",
+            ]
+        )
+
+    def record_batch(self, rows, bytes_read, errors):
+        self.row_count += rows
+        self.bytes_read = bytes_read
+        self.error_count += len({error[0] for error in errors})
+        self.errors += errors[: max(self.MAX_ERRORS - len(self.errors), 0)]
+        self.save(
+            update_fields=["columns", "row_count", "bytes_read", "error_count", "errors"]
+        )
+
+    def get_error_report(self):
+        return [
+            {"row": row, "column": self.columns[column], "message": message}
+            for row, column, message in self.errors
+        ]
+
+    def finish(self):
+        self._close("completed")
+
+    def fail(self, error):
+        self._close("failed", error=str(error))
+
+    def _close(self, status, error=""):
+        self.status = status
+        self.error = error
+        self.finished_at = timezone.now()
+        self.save(update_fields=["status", "error", "finished_at"])
+
+    def __str__(self):
+        return f"{self.filename} ({self.row_count} filas)"
+
+
+class DatasetRow(models.Model):
+    """
+    Model representing a row of an uploaded file.
+
+    Attributes:
+        dataset (ForeignKey): The dataset the row belongs to.
+        position (PositiveIntegerField): The zero-based position of the row in the file.
+        values (JSONField): The cell values, aligned with `dataset.columns` and coerced
+            to their column type. Dates and decimals are stored as strings.
+        valid (BooleanField): Whether every value of the row passed validation.
+        search_text (TextField): The lowercased searchable columns (see
+            dashboard.utils.search_utils.SEARCH_COLUMNS).
+    """
+
+    dataset = models.ForeignKey(
+        UploadedDataset, on_delete=models.CASCADE, related_name="rows"
+    )
+    position = models.PositiveIntegerField()
+    values = models.JSONField(encoder=DjangoJSONEncoder)
+    valid = models.BooleanField(default=True)
+    search_text = models.TextField(blank=True, default="")
+
+    class Meta:
+        ordering = ["position"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dataset", "position"], name="unique_dataset_row_position"
+            )
+        ]
@@ -1,13 +1,35 @@
 import logging
-import math
 from django.test import RequestFactory
 from django.utils.timezone import now
-from django.db import connection
 
 from contracts.views import DashboardContractListView
 
 logger = logging.getLogger(__name__)
 
+def build_row(contract):
+    """
+    Maps a contract of the dashboard queryset to a table row.
+
+    Args:
+        contract (Contract): A contract annotated by DashboardContractListView.
+
+    Returns:
+        dict: The row values, keyed by the column names of the headers.
+    """
+    client = contract.client
+    vehicle = contract.vehicle
+    return {
+        "full_name": f"{client.first_name} {client.last_name}",
+        "billing_cycle": contract.billing_cycle,
+        "weekly_payment": contract.weekly_payment,
+        "document_number": client.document_number,
+        "amount": contract.amount,
+        "active": "Si" if contract.active else "No",
+        "vehicle_info": str(vehicle) if vehicle else "Sin vehículo",
+        "pending_installments": contract.pending_installments,
+    }
+
+
 def get_context(user):
     """
     Builds and returns the context dictionary for the dashboard contract list view for a given user.
@@ -16,11 +38,14 @@ def get_context(user):
     Returns:
         dict: A context dictionary containing:
             - 'headers': A dictionary with 'values' (list of column keys) and 'labels' (mapping of keys to display names).
-            - 'rows': A list of dictionaries, each representing a contract with client and vehicle information, payment details, and pending installments.
+            - 'queryset': A lazy queryset of contracts with client and vehicle information and their balance annotations.
+            - 'build_row': The function that maps a contract to a table row, applied only to the rows of the current page.
             - 'pagination': The number of items per page for pagination.
+            - 'pagination_mode': "keyset", so the contract list is paginated with cursors instead of OFFSET and COUNT(*).
+            - 'estimate_count': Show a capped or estimated total instead of an exact count.
     Notes:
         - If the user is not authenticated, returns an empty dictionary.
-        - Calculates the number of pending installments based on the total contract amount, paid invoices, and weekly payment.
+        - The pending installments are read from the ContractBalance ledger by DashboardContractListView, no invoice is aggregated.
         - Handles contracts without associated vehicles and contracts with zero weekly payment.
     """
     
@@ -35,25 +60,6 @@ def get_context(user):
     view.request = request
     contracts = view.get_queryset()
 
-    rows = []
-    for contract in contracts:
-        client = contract.client
-        vehicle = contract.vehicle
-        row = {
-            "full_name": f"{client.first_name} {client.last_name}",
-            "billing_cycle": contract.billing_cycle,
-            "weekly_payment": contract.weekly_payment,
-            "document_number": client.document_number,
-            "amount": contract.amount,
-            "active": "Si" if contract.active else "No",
-            "vehicle_info": str(vehicle) if vehicle else "Sin vehículo"
-        }
-        total_paid = sum(invoice.amount for invoice in contract.paid_invoices)
-        remaining_amount = max(contract.amount - total_paid, 0)
-        pending_installments = math.ceil(remaining_amount / contract.weekly_payment) if contract.weekly_payment else 0
-        row["pending_installments"] = pending_installments
-        rows.append(row)
-
     headers = {
         "values": ["full_name", "document_number", "active", "vehicle_info", "pending_installments", "billing_cycle", "weekly_payment", "amount"],
         "labels": {
@@ -70,9 +76,12 @@ def get_context(user):
 
     context = {
         "headers": headers,
-        "rows": rows,
+        "queryset": contracts,
+        "build_row": build_row,
         "pagination": 20,
+        "pagination_mode": "keyset",
+        "sort_key": "pk",
+        "estimate_count": True,
     }
-    print(len(connection.queries))
 
     return context
@@ -1,29 +1,82 @@
 import logging
 from django.test import RequestFactory
-from django.utils.timezone import now
+from vehicles.models import Vehicle
 from vehicles.views import CreateVehicleInstanceView
 
 logger = logging.getLogger(__name__)
 
+# Idle vehicles listed above the table, the longest idle first.
+AVAILABLE_VEHICLES_SHOWN = 5
+
+
+def build_row(vehicle):
+    """
+    Maps a vehicle of the dashboard queryset to a table row.
+
+    Args:
+        vehicle (Vehicle): A vehicle annotated by `annotate_contract_activity`.
+
+    Returns:
+        dict: The row values, keyed by the column names of the headers.
+    """
+    last_contract_end = ""
+    days_since_last_contract = "N/A"
+    if not vehicle.has_active_contract and vehicle.last_contract_end:
+        last_contract_end = vehicle.last_contract_end
+        days_since_last_contract = vehicle.days_idle.days
+    vehicle_model = vehicle.vehicle_model or None
+    return {
+        "brand": vehicle_model.brand if vehicle.vehicle_model else None,
+        "model": vehicle_model.model if vehicle.vehicle_model else None,
+        "plate": vehicle.license_plate,
+        "active_contract": "Si" if vehicle.has_active_contract else "No",
+        "last_contract_end": last_contract_end if last_contract_end else "No ha tenido contrato",
+        "days_since_last_contract": days_since_last_contract,
+    }
+
+
+def get_available_vehicles():
+    """
+    Summarizes the idle fleet from `Vehicle.objects.available()`, which is served by
+    the partial index on the vehicles without an active contract.
+
+    Returns:
+        dict: The number of available vehicles and, under 'longest_idle', the plate
+        and availability date of the first AVAILABLE_VEHICLES_SHOWN of them
+        (never-rented vehicles, without a date, come first).
+    """
+    available = Vehicle.objects.available()
+    return {
+        "count": available.count(),
+        "longest_idle": [
+            {"plate": plate, "since": since}
+            for plate, since in available.values_list("license_plate", "available_since")[
+                :AVAILABLE_VEHICLES_SHOWN
+            ]
+        ],
+    }
+
 
 def get_context(user):
     """
     Builds a context dictionary containing vehicle and contract information for a given authenticated user.
-    This function simulates a request to retrieve a list of vehicles associated with the user,
-    then constructs a list of dictionaries (rows) with details about each vehicle, including:
+    This function simulates a request to retrieve a lazy queryset of vehicles annotated in SQL with their
+    contract activity, and returns it together with the function that maps each vehicle to a row with details such as:
     - Brand and model
     - License plate
     - Whether there is an active contract
-    - The end date of the last finalized contract's invoice (if any)
-    - The number of days since the last contract ended
+    - The date the vehicle became available after its last contract (if any)
+    - The number of days since then
     The context also includes table headers and pagination information.
     Args:
         user (User): The user for whom the context is being built. Must have an 'is_authenticated' attribute.
     Returns:
         dict: A context dictionary with the following keys:
             - 'headers': Table headers and labels for display.
-            - 'rows': List of dictionaries with vehicle and contract details.
-            - 'pagination': Number of rows per page (default: 20).
+            - 'queryset': Lazy queryset of vehicles, paginated by the dashboard view.
+            - 'build_row': Function that maps a vehicle to a row, applied only to the current page.
+            - 'pagination': Number of rows per page (default: 10).
+            - 'available_vehicles': The idle fleet summary, see `get_available_vehicles`.
             Returns an empty dictionary if the user is not authenticated.
     """
 
@@ -35,33 +88,7 @@ def get_context(user):
     request = factory.get("/fake-url")
     request.user = user
 
-    vehicles = CreateVehicleInstanceView().get(request)
-
-    rows = []
-    for vehicle in vehicles:
-        last_contract_end = ""
-        days_since_last_contract = "N/A"
-        active_contract = vehicle.active_contracts[0] if vehicle.active_contracts else None
-        if not active_contract:
-            last_contract_ended = vehicle.ended_contracts[0] if vehicle.ended_contracts else "N/A"
-            if last_contract_ended and last_contract_ended != "N/A":
-                last_invoice = last_contract_ended.invoices[0] if last_contract_ended.invoices else None
-                last_contract_end = last_invoice.issue_date if last_invoice else ""
-                days_since_last_contract = (
-                    (now().date() - last_contract_end).days
-                    if last_contract_end
-                    else "N/A"
-                )
-        vehicle_model = vehicle.vehicle_model or None
-        row = {
-            "brand": vehicle_model.brand if vehicle.vehicle_model else None,
-            "model": vehicle_model.model if vehicle.vehicle_model else None,
-            "plate": vehicle.license_plate,
-            "active_contract": "Si" if bool(active_contract) else "No",
-            "last_contract_end": last_contract_end if last_contract_end else "No ha tenido contrato",
-            "days_since_last_contract": days_since_last_contract,
-        }
-        rows.append(row)
+    vehicles = CreateVehicleInstanceView().get(request).order_by("pk")
 
     headers = {
         "values": [
@@ -82,6 +109,12 @@ def get_context(user):
         },
     }
 
-    context = {"headers": headers, "rows": rows, "pagination": 10}
+    context = {
+        "headers": headers,
+        "queryset": vehicles,
+        "build_row": build_row,
+        "pagination": 10,
+        "available_vehicles": get_available_vehicles(),
+    }
 
     return context
@@ -5,6 +5,28 @@ from clients.views import CreateClientInstanceView
 logger = logging.getLogger(__name__)
 
 
+def build_row(client):
+    """
+    Maps a client of the dashboard queryset to a table row.
+
+    Args:
+        client (Client): A client with its active contracts prefetched.
+
+    Returns:
+        dict: The row values, keyed by the column names of the headers.
+    """
+    active_contract = client.active_contracts[0] if client.active_contracts else None
+    has_active_contract = active_contract is not None
+    return {
+        "full_name": f"{client.first_name} {client.last_name}",
+        "document_number": client.document_number,
+        "active_contract": "Si" if has_active_contract else "No",
+        "linked_vehicle": (
+            str(active_contract.vehicle) if has_active_contract else "No tiene contrato activo"
+        ),
+    }
+
+
 def get_context(user):
     """
     Build and return the context dictionary for the 'ventas' dashboard role,
@@ -14,7 +36,7 @@ def get_context(user):
         user (User): Authenticated user object.
 
     Returns:
-        dict: Context containing client data and permissions.
+        dict: Context containing a lazy client queryset, the row mapping function and the table headers.
     """
     if not user.is_authenticated:
         return {}
@@ -24,27 +46,11 @@ def get_context(user):
     fake_request = factory.get("/fake-url")
     fake_request.user = user
 
-    clients_qs = CreateClientInstanceView().get(fake_request)
-
-    clients_list = []
-    
-    for client in clients_qs:
-        active_contract = client.active_contracts[0] if client.active_contracts else None
-        has_active_contract = active_contract is not None
-        clients_list.append(
-            {
-                "full_name": f"{client.first_name} {client.last_name}",
-                "document_number": client.document_number,
-                "active_contract": "Si" if has_active_contract else "No",
-                "linked_vehicle": (
-                    str(active_contract.vehicle) if has_active_contract else "No tiene contrato activo"
-                ),
-            }
-        )
+    clients_qs = CreateClientInstanceView().get(fake_request).order_by("pk")
 
     context = {
         "headers": {
-            "values": clients_list[0].keys() if clients_list else [],
+            "values": ["full_name", "document_number", "active_contract", "linked_vehicle"],
             "labels": {
                 "full_name": "Nombre completo",
                 "document_number": "Número de documento",
@@ -52,7 +58,8 @@ def get_context(user):
                 "linked_vehicle": "Vehículo vinculado",
             },
         },
-        "rows": clients_list,
+        "queryset": clients_qs,
+        "build_row": build_row,
         "pagination": 5,
     }
     return context
@@ -0,0 +1,42 @@
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import FieldPermission
+from clients.models import Client
+from contracts.models import Contract
+from dashboard.utils.cache import bump_dashboard_version_on_commit
+from dashboard.utils.form_schemas import FORM_SCHEMA_VERSION
+from invoices.models import Invoice
+from vehicles.models import Vehicle, VehicleModel
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_save, sender=Vehicle)
+@receiver(post_save, sender=Contract)
+@receiver(post_save, sender=Invoice)
+@receiver(post_save, sender=VehicleModel)
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=Vehicle)
+@receiver(post_delete, sender=Contract)
+@receiver(post_delete, sender=Invoice)
+@receiver(post_delete, sender=VehicleModel)
+def invalidate_role_dashboards(sender, **kwargs):
+    """Invalidates the cached role dashboards and autocomplete results of the changed model."""
+    bump_dashboard_version_on_commit(sender._meta.label_lower)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_form_schemas_on_permissions_change(sender, action, **kwargs):
+    """Invalidates the compiled create forms when the permissions of a group change."""
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_dashboard_version_on_commit(FORM_SCHEMA_VERSION)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_save, sender=FieldPermission)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=FieldPermission)
+def invalidate_form_schemas(sender, **kwargs):
+    """Invalidates the compiled create forms when a role or its field permissions change."""
+    bump_dashboard_version_on_commit(FORM_SCHEMA_VERSION)
@@ -19,6 +19,74 @@ document.addEventListener('DOMContentLoaded', function() {
     if (checkboxes.length > 0 && reportButtonContainer)
     toggleReportButton();
 
+    // Autocomplete inputs of the create forms: the visible input searches by prefix
+    // and the hidden input carries the id of the selected row.
+    document.querySelectorAll('input[data-autocomplete-url]').forEach(function (input) {
+        const hidden = document.getElementById(input.dataset.autocompleteTarget);
+        const datalist = document.getElementById(input.getAttribute('list'));
+        const labels = new Map();
+        let timer = null;
+
+        function selectCurrent() {
+            const value = labels.get(input.value);
+            hidden.value = value !== undefined ? value : '';
+            input.setCustomValidity(input.value && value === undefined ? 'Seleccione una opción de la lista' : '');
+        }
+
+        input.addEventListener('input', function () {
+            selectCurrent();
+            clearTimeout(timer);
+            const q = input.value.trim();
+            if (!q || labels.has(input.value)) return;
+            timer = setTimeout(function () {
+                fetch(input.dataset.autocompleteUrl + '?q=' + encodeURIComponent(q))
+                    .then(response => response.json())
+                    .then(function (data) {
+                        labels.clear();
+                        datalist.innerHTML = '';
+                        data.results.forEach(function (result) {
+                            labels.set(result.label, result.value);
+                            const option = document.createElement('option');
+                            option.value = result.label;
+                            datalist.appendChild(option);
+                        });
+                        selectCurrent();
+                    });
+            }, 250);
+        });
+        input.addEventListener('change', selectCurrent);
+    });
+
+    // Progress of the upload import: polls the job and reloads the page when the
+    // first rows are stored and again when the import ends.
+    const progress = document.getElementById('dataset-progress');
+    if (progress) {
+        const bar = progress.querySelector('.progress-bar');
+        const text = progress.querySelector('[data-progress-text]');
+        const shownRows = parseInt(progress.dataset.rows, 10);
+
+        function poll() {
+            fetch(progress.dataset.progressUrl)
+                .then(response => response.json())
+                .then(function (data) {
+                    bar.style.width = data.percent + '%';
+                    bar.textContent = data.percent + '%';
+                    let message = data.rows + ' filas leídas, ' + data.errors + ' con errores';
+                    if (data.eta_seconds !== null) {
+                        message += ', faltan unos ' + data.eta_seconds + ' s';
+                    }
+                    text.textContent = message;
+                    if (data.status === 'completed' || data.status === 'failed' || (shownRows === 0 && data.rows > 0)) {
+                        window.location.reload();
+                        return;
+                    }
+                    setTimeout(poll, 1000);
+                })
+                .catch(() => setTimeout(poll, 5000));
+        }
+        poll();
+    }
+
     const alerts = document.querySelectorAll('.alert');
     alerts.forEach(function (alert) {
         if (!alert.classList.contains('alert-persistent')) {
@@ -0,0 +1,43 @@
+import logging
+
+from django.conf import settings
+from django_rq import job
+
+from dashboard.utils.datasets import import_dataset
+
+logger = logging.getLogger("dashboard")
+
+# Seconds an import job may run; large files take longer than the queue default.
+IMPORT_JOB_TIMEOUT = 1800
+
+
+@job("default", timeout=IMPORT_JOB_TIMEOUT)
+def import_dataset_job(dataset_id):
+    """
+    RQ job that imports the rows of an uploaded dataset.
+
+    Args:
+        dataset_id (int): The primary key of the UploadedDataset.
+    """
+    dataset = import_dataset(dataset_id)
+    logger.info(
+        f"Dataset {dataset_id} import {dataset.status}: {dataset.row_count} rows, "
+        f"{dataset.error_count} with errors"
+    )
+
+
+def start_import(dataset):
+    """
+    Imports a dataset in the background, or in the current request when
+    DATASET_IMPORT_ASYNC is off or the queue is unavailable.
+
+    Args:
+        dataset (UploadedDataset): The dataset created from the upload.
+    """
+    if settings.DATASET_IMPORT_ASYNC:
+        try:
+            import_dataset_job.delay(dataset.pk)
+            return
+        except Exception as e:
+            logger.warning(f"Could not enqueue dataset {dataset.pk}, importing it now: {e}")
+    import_dataset(dataset.pk)
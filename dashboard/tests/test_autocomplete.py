@@ -0,0 +1,98 @@
+import json
+
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import User
+from clients.models import Client
+from dashboard.utils.form_schemas import get_form_schemas, resolve_form_schemas
+from vehicles.models import Vehicle, VehicleModel
+
+
+class AutocompleteViewTests(TestCase):
+    """Tests for the JSON autocomplete endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(
+            email="ventas@example.com", username="ventas", password="secret123"
+        )
+        # Adding contracts lets the user pick clients and vehicles.
+        user.user_permissions.add(Permission.objects.get(codename="add_contract"))
+        self.client.login(username="ventas@example.com", password="secret123")
+        vehicle_model = VehicleModel.objects.create(brand="Honda", model="CB190")
+        for index in range(25):
+            Client.objects.create(
+                first_name="Juan" if index % 2 else "Maria",
+                last_name="Prueba",
+                document_number=f"10{index:02d}",
+                email=f"cliente{index}@example.com",
+            )
+        Vehicle.objects.create(vehicle_model=vehicle_model, license_plate="ABC123")
+        Vehicle.objects.create(vehicle_model=vehicle_model, license_plate="XYZ987")
+
+    def search(self, model, q):
+        response = self.client.get(reverse("autocomplete", args=[model]), {"q": q})
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)["results"]
+
+    def test_prefix_search_is_limited(self):
+        """Document prefixes return at most 20 results."""
+        results = self.search("clients.client", "10")
+        self.assertEqual(len(results), 20)
+        self.assertEqual(self.search("clients.client", "1024")[0]["label"], "Maria Prueba")
+
+    def test_search_matches_names_and_plates_case_insensitively(self):
+        """Lowercase terms match capitalized names and uppercase plates."""
+        self.assertEqual(len(self.search("clients.client", "juan")), 12)
+        self.assertEqual(
+            [result["label"] for result in self.search("vehicles.vehicle", "abc")],
+            ["Honda CB190 - ABC123"],
+        )
+        self.assertEqual(self.search("vehicles.vehicle", ""), [])
+
+    def test_results_are_cached_until_the_model_changes(self):
+        """Repeated searches hit the cache; saving a client refreshes them."""
+        self.search("clients.client", "Mar")
+        # Session, user and the two permission lookups only.
+        with self.assertNumQueries(4):
+            self.search("clients.client", "Mar")
+        with self.captureOnCommitCallbacks(execute=True):
+            Client.objects.create(
+                first_name="Marta", last_name="Nueva", document_number="9999",
+                email="marta@example.com",
+            )
+        self.assertEqual(len(self.search("clients.client", "Mar")), 14)
+
+    def test_users_without_permission_are_rejected(self):
+        """A user who can neither see nor pick clients gets a 403."""
+        User.objects.create_user(
+            email="otro@example.com", username="otro", password="secret123"
+        )
+        self.client.login(username="otro@example.com", password="secret123")
+        response = self.client.get(reverse("autocomplete", args=["clients.client"]), {"q": "10"})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(json.loads(response.content)["results"], [])
+
+    def test_unknown_models_are_not_searchable(self):
+        """Only the registered models can be searched."""
+        response = self.client.get(reverse("autocomplete", args=["accounts.user"]), {"q": "a"})
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(AUTOCOMPLETE_THRESHOLD=10)
+    def test_forms_switch_to_autocomplete_past_the_threshold(self):
+        """Large related tables are searched instead of inlined as choices."""
+        group = Group.objects.create(name="Ventas")
+        group.permissions.add(Permission.objects.get(codename="add_contract"))
+        user = User.objects.get(username="ventas")
+        user.groups.add(group)
+        schema = resolve_form_schemas(get_form_schemas(user))[0]
+        fields = {field["name"]: field for field in schema["fields"]}
+        self.assertEqual(
+            fields["client"]["autocomplete_url"],
+            reverse("autocomplete", args=["clients.client"]),
+        )
+        self.assertNotIn("choices", fields["client"])
+        self.assertEqual(len(fields["vehicle"]["choices"]), 2)
@@ -0,0 +1,67 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from dashboard.utils.coercion import (
+    coerce_columns,
+    coerce_date,
+    coerce_decimal,
+    coerce_document,
+    coerce_plate,
+)
+
+
+class CoercionTests(SimpleTestCase):
+    """Tests for the per-column coercion of uploaded values."""
+
+    def test_dates(self):
+        for value in ("2024-03-05", "05/03/2024", "05-03-2024", datetime(2024, 3, 5, 8), 45356):
+            self.assertEqual(coerce_date(value), date(2024, 3, 5), value)
+        with self.assertRaises(ValueError):
+            coerce_date("31/02/2024")
+
+    def test_decimals(self):
+        cases = {
+            "$1.200,50": Decimal("1200.50"),
+            "1,200.50": Decimal("1200.50"),
+            "120.000": Decimal("120000.00"),
+            "120,5": Decimal("120.50"),
+            "1.200.000": Decimal("1200000.00"),
+            120.5: Decimal("120.50"),
+        }
+        for value, expected in cases.items():
+            self.assertEqual(coerce_decimal(value), expected, value)
+        for value in ("abc", "-10", "1e30", "Infinity"):
+            with self.assertRaises(ValueError):
+                coerce_decimal(value)
+
+    def test_documents_and_plates(self):
+        self.assertEqual(coerce_document("1.020.304-5"), "10203045")
+        self.assertEqual(coerce_document(123456.0), "123456")
+        self.assertEqual(coerce_plate(" abc 123 "), "ABC123")
+
+    def test_coerce_columns_reports_positions(self):
+        columns = ["Nombres", "Cuota semanal", "Otra"]
+        rows, errors = coerce_columns(
+            columns, [["Ana", "100", None], ["", "x", "libre"]], first_row=10
+        )
+        self.assertEqual(rows[0], ["Ana", Decimal("100.00"), None])
+        self.assertEqual(rows[1][2], "libre")
+        self.assertEqual(errors, [[11, 0, "Valor vacío"], [11, 1, "Valor no válido"]])
+
+    def test_values_must_fit_the_crm_fields(self):
+        columns = ["Nombres", "Cuota semanal", "Placa del auto"]
+        rows, errors = coerce_columns(
+            columns,
+            [["A" * 101, "100000000", "ABC123"], ["Ana", "99999999.99", "X" * 21]],
+        )
+        self.assertEqual(rows[1][1], Decimal("99999999.99"))
+        self.assertEqual(
+            errors,
+            [
+                [1, 0, "Supera los 100 caracteres"],
+                [1, 1, "Valor demasiado grande"],
+                [2, 2, "Supera los 20 caracteres"],
+            ],
+        )
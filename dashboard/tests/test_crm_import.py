@@ -0,0 +1,151 @@
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from clients.models import Client
+from contracts.models import Contract, ContractBalance
+from dashboard.utils.crm_import import import_into_crm
+from dashboard.utils.datasets import DATASET_SESSION_KEY, create_dataset, import_dataset
+from vehicles.models import Vehicle, VehicleModel
+
+User = get_user_model()
+
+HEADER = (
+    "Nombres,Apellidos,Número de documento,Inicio de contrato,Cuota semanal,"
+    "Marca del auto,Modelo del auto,Placa del auto,Monto total\n"
+)
+
+
+class CrmImportTests(TestCase):
+    """Tests for the bulk import of uploaded rows into clients, vehicles and contracts."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.user = User.objects.create_superuser(
+            email="admin@example.com", username="admin", password="secret123"
+        )
+        self.model = VehicleModel.objects.create(brand="Toyota", model="Hilux")
+        self.client_a = Client.objects.create(
+            first_name="Ana", last_name="Vieja", document_number="100", email="ana@example.com"
+        )
+        self.vehicle_a = Vehicle.objects.create(vehicle_model=self.model, license_plate="AAA111")
+        self.contract_a = Contract.objects.create(
+            client=self.client_a,
+            vehicle=self.vehicle_a,
+            start_date=date(2024, 1, 1),
+            weekly_payment=Decimal("100"),
+        )
+
+    def dataset(self, lines):
+        content = (HEADER + "".join(line + "\n" for line in lines)).encode("utf-8")
+        dataset = create_dataset(self.user, SimpleUploadedFile("cartera.csv", content))
+        return import_dataset(dataset.pk)
+
+    def test_upserts_entities(self):
+        dataset = self.dataset(
+            [
+                "Ana,Pérez,100,2024-02-01,150,Toyota,Hilux,AAA111,",
+                "Beto,Gómez,200,05/03/2024,120.50,Mazda,CX-5,BBB222,2400",
+                "Caro,Ruiz,300,2024-03-01,90,Toyota,Hilux,AAA111,1800",
+                "Dani,Díaz,400,no es fecha,90,Toyota,Hilux,DDD444,1800",
+            ]
+        )
+        summary = import_into_crm(dataset)
+
+        self.assertEqual(summary["clients_created"], 2)
+        self.assertEqual(summary["clients_updated"], 1)
+        self.assertEqual(summary["models_created"], 1)
+        self.assertEqual(summary["vehicles_created"], 1)
+        self.assertEqual(summary["contracts_created"], 1)
+        self.assertEqual(summary["contracts_updated"], 1)
+        self.assertEqual(summary["invalid"], 1)
+        self.assertEqual(summary["skipped"], 1)
+        self.assertEqual([error["row"] for error in summary["errors"]], [3])
+
+        self.client_a.refresh_from_db()
+        self.contract_a.refresh_from_db()
+        self.assertEqual(self.client_a.last_name, "Pérez")
+        self.assertEqual(self.contract_a.weekly_payment, Decimal("150"))
+        self.assertEqual(self.contract_a.start_date, date(2024, 2, 1))
+
+        beto = Client.objects.get(document_number="200")
+        self.assertEqual(beto.email, f"{beto.uid.hex}@importado.invalid")
+        contract = Contract.objects.get(client=beto)
+        self.assertEqual(contract.start_date, date(2024, 3, 5))
+        self.assertEqual(contract.amount, Decimal("2400"))
+        self.assertEqual(contract.vehicle.vehicle_model.brand, "Mazda")
+        self.assertTrue(ContractBalance.objects.filter(contract=contract).exists())
+        self.assertEqual(Vehicle.objects.get(license_plate="BBB222").current_contract, contract)
+        self.assertFalse(Contract.objects.filter(client__document_number="300").exists())
+
+    def test_placeholder_emails_do_not_collide(self):
+        """Documents that slugify to the same text still get distinct emails."""
+        dataset = self.dataset(
+            [
+                "Beto,Gómez,A/1,2024-03-05,120,Mazda,CX-5,BBB222,2400",
+                "Caro,Ruiz,A1,2024-03-05,120,Mazda,CX-5,CCC333,2400",
+            ]
+        )
+        summary = import_into_crm(dataset)
+        self.assertEqual(summary["clients_created"], 2)
+        emails = Client.objects.filter(first_name__in=["Beto", "Caro"]).values_list(
+            "email", flat=True
+        )
+        self.assertEqual(len(set(emails)), 2)
+
+    def test_new_contracts_need_an_amount(self):
+        """Without the total, a row updates the existing contract but creates none."""
+        dataset = self.dataset(
+            [
+                "Ana,Pérez,100,2024-02-01,150,Toyota,Hilux,AAA111,3000",
+                "Beto,Gómez,200,2024-03-05,120,Mazda,CX-5,BBB222,",
+            ]
+        )
+        summary = import_into_crm(dataset)
+
+        self.contract_a.refresh_from_db()
+        self.assertEqual(self.contract_a.amount, Decimal("3000"))
+        self.assertEqual(summary["contracts_created"], 0)
+        self.assertEqual(
+            summary["errors"],
+            [{"row": 2, "message": "Falta el monto total para crear el contrato."}],
+        )
+        self.assertFalse(Contract.objects.filter(client__document_number="200").exists())
+
+    def test_query_count_does_not_grow_with_rows(self):
+        def run(count, offset):
+            lines = [
+                f"N{i},A{i},D{offset + i},2024-01-01,100,Kia,Rio {offset},P{offset + i},2000"
+                for i in range(count)
+            ]
+            dataset = self.dataset(lines)
+            with CaptureQueriesContext(connection) as queries:
+                summary = import_into_crm(dataset)
+            self.assertEqual(summary["contracts_created"], count)
+            return len(queries)
+
+        self.assertEqual(run(5, 1000), run(60, 2000))
+
+    def test_import_view(self):
+        dataset = self.dataset(["Beto,Gómez,200,2024-03-05,120,Mazda,CX-5,BBB222,2400"])
+        self.client.force_login(self.user)
+        session = self.client.session
+        session[DATASET_SESSION_KEY] = dataset.pk
+        session.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("import_dataset"), follow=True)
+        self.assertContains(response, "1 contratos nuevos")
+        self.assertTrue(Contract.objects.filter(client__document_number="200").exists())
@@ -0,0 +1,166 @@
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from dashboard.constants import REQUIRED_COLUMNS
+from dashboard.models import DatasetRow, UploadedDataset
+from dashboard.utils.datasets import (
+    DATASET_SESSION_KEY,
+    create_dataset,
+    get_progress,
+    import_dataset,
+    iter_dataset_rows,
+    paginate_dataset,
+)
+
+User = get_user_model()
+
+
+def make_row(index):
+    row = {
+        "Nombres": f"Nombre {index}",
+        "Apellidos": "Pérez" if index % 2 else "Gómez",
+        "Número de documento": str(1000 + index),
+        "Inicio de contrato": "2024-01-05",
+        "Cuota semanal": "100.00",
+        "Marca del auto": "Kia",
+        "Modelo del auto": "Rio",
+        "Placa del auto": f"ABC{index:03d}",
+    }
+    return {column: row[column] for column in sorted(REQUIRED_COLUMNS)}
+
+
+def make_csv(count, name="datos.csv", extra=b""):
+    columns = sorted(REQUIRED_COLUMNS)
+    content = ",".join(columns) + "\n" + "".join(
+        ",".join(make_row(i).values()) + "\n" for i in range(count)
+    )
+    return SimpleUploadedFile(name, content.encode("utf-8") + extra)
+
+
+class DatasetStoreTests(TestCase):
+    """Tests for the store that keeps uploaded rows out of the session."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.user = User.objects.create_superuser(
+            email="admin@example.com", username="admin", password="secret123"
+        )
+
+    def import_csv(self, count, **kwargs):
+        dataset = create_dataset(self.user, make_csv(count, **kwargs))
+        return import_dataset(dataset.pk, batch_size=3)
+
+    def test_import_in_batches(self):
+        """Batches are appended in order, the previous dataset is replaced and the source deleted."""
+        old = self.import_csv(1)
+        dataset = self.import_csv(5)
+
+        self.assertFalse(UploadedDataset.objects.filter(pk=old.pk).exists())
+        self.assertEqual(dataset.status, "completed")
+        self.assertEqual(dataset.row_count, 5)
+        self.assertEqual(dataset.columns, sorted(REQUIRED_COLUMNS))
+        self.assertFalse(dataset.source)
+        self.assertEqual(list(iter_dataset_rows(dataset)), [make_row(i) for i in range(5)])
+        self.assertEqual(get_progress(dataset)["percent"], 100)
+
+    def test_values_are_typed_and_errors_reported(self):
+        """Columns are coerced on import and invalid cells are reported by row and column."""
+        columns = sorted(REQUIRED_COLUMNS)
+        bad = dict(make_row(9), **{"Inicio de contrato": "31/02/2024", "Placa del auto": " "})
+        # Columns are sorted: Apellidos, Cuota semanal, Inicio de contrato, Marca,
+        # Modelo, Nombres, Número de documento, Placa.
+        extra = (
+            'Ruiz,"$1.200,50",31/01/2024,Kia,Rio,Ana,1.020.304,abc 123\n'
+            + ",".join(bad[column] for column in columns)
+            + "\n"
+        ).encode()
+        dataset = self.import_csv(1, extra=extra)
+
+        self.assertEqual(dataset.row_count, 3)
+        self.assertEqual(dataset.error_count, 1)
+        self.assertEqual(
+            dataset.get_error_report(),
+            [
+                {"row": 3, "column": "Inicio de contrato", "message": "Fecha no válida"},
+                {"row": 3, "column": "Placa del auto", "message": "Valor vacío"},
+            ],
+        )
+        self.assertEqual(list(dataset.rows.values_list("valid", flat=True)), [True, True, False])
+
+        typed = list(iter_dataset_rows(dataset, typed=True))[1]
+        self.assertEqual(typed["Cuota semanal"], Decimal("1200.50"))
+        self.assertEqual(typed["Inicio de contrato"], date(2024, 1, 31))
+        self.assertEqual(typed["Número de documento"], "1020304")
+        self.assertEqual(typed["Placa del auto"], "ABC123")
+
+    def test_failed_import_keeps_no_rows(self):
+        """A file that turns out to be invalid halfway leaves no rows behind."""
+        # Larger than the first CSV chunk, so the invalid bytes come after rows were stored.
+        dataset = create_dataset(self.user, make_csv(2000, extra=b"\xff\xfe\n"))
+        dataset = import_dataset(dataset.pk, batch_size=100)
+        self.assertEqual(dataset.status, "failed")
+        self.assertIn("codificación", dataset.error)
+        self.assertFalse(DatasetRow.objects.exists())
+
+    def test_progress_endpoint(self):
+        dataset = create_dataset(self.user, make_csv(4))
+        self.client.force_login(self.user)
+        url = reverse("dataset_progress", args=[dataset.pk])
+        self.assertEqual(self.client.get(url).json()["status"], "pending")
+
+        import_dataset(dataset.pk)
+        data = self.client.get(url).json()
+        self.assertEqual((data["status"], data["rows"], data["percent"]), ("completed", 4, 100))
+
+        other = User.objects.create_user(
+            email="otro@example.com", username="otro", password="secret123"
+        )
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_paginate_and_search(self):
+        dataset = self.import_csv(45)
+
+        page_obj, _ = paginate_dataset(dataset, 3)
+        self.assertEqual(page_obj.paginator.num_pages, 3)
+        self.assertEqual(page_obj.object_list, [make_row(i) for i in range(40, 45)])
+
+        page_obj, _ = paginate_dataset(dataset, 1, q="PÉREZ")
+        self.assertEqual(page_obj.paginator.count, 22)
+        self.assertTrue(all(row["Apellidos"] == "Pérez" for row in page_obj.object_list))
+
+    def test_session_keeps_only_dataset_id(self):
+        """The upload view stores the dataset id; pages and reports read the store."""
+        self.client.force_login(self.user)
+        with mock.patch("dashboard.tasks.import_dataset_job.delay") as delay:
+            with override_settings(DATASET_IMPORT_ASYNC=True):
+                response = self.client.post(reverse("dashboard"), {"file": make_csv(25)})
+        self.assertRedirects(response, reverse("dashboard"))
+        dataset = UploadedDataset.objects.get(owner=self.user)
+        delay.assert_called_once_with(dataset.pk)
+        response = self.client.get(reverse("dashboard"))
+        self.assertContains(response, reverse("dataset_progress", args=[dataset.pk]))
+
+        import_dataset(dataset.pk)
+        dataset = UploadedDataset.objects.get(owner=self.user)
+        self.assertEqual(self.client.session[DATASET_SESSION_KEY], dataset.pk)
+        self.assertNotIn("data", self.client.session)
+
+        response = self.client.get(reverse("dashboard"), {"page": 2})
+        self.assertEqual(response.context["page_obj"].object_list, [make_row(i) for i in range(20, 25)])
+
+        with mock.patch("reports.views.generate_and_send_report.delay") as delay:
+            self.client.post(reverse("generate_report"), {"columns": ["Nombres"], "format": "csv"})
+        delay.assert_called_once_with("admin@example.com", ["Nombres"], dataset.pk, "csv")
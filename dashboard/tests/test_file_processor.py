@@ -1,12 +1,27 @@
+import codecs
+import shutil
+import tempfile
 import openpyxl, io
 import logging
+from unittest import mock
+from django.core.files import File
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-from dashboard.utils.file_processor import process_excel_file, process_csv_file
+from dashboard.utils.file_processor import (
+    UploadError,
+    check_uploaded_file,
+    iter_batches,
+    iter_csv_file,
+    iter_excel_file,
+    iter_uploaded_file,
+)
 from dashboard.constants import REQUIRED_COLUMNS
 
 logger = logging.getLogger(__name__)
+User = get_user_model()
 
 
 class ProcessFileTests(TestCase):
@@ -34,9 +49,9 @@ class ProcessFileTests(TestCase):
         file_stream.seek(0)
         return file_stream
 
-    def test_process_excel_file_valid(self):
+    def test_iter_excel_file_valid(self):
         """
-        Tests the `process_excel_file` function with a valid Excel file.
+        Tests the `iter_uploaded_file` function with a valid Excel file.
 
         This test creates an in-memory Excel file with the required columns and
         sample rows, uploads it, and verifies that the function processes the file
@@ -45,15 +60,15 @@ class ProcessFileTests(TestCase):
         Steps:
             - Creates an Excel file with the required columns and sample data.
             - Uploads the file using `SimpleUploadedFile`.
-            - Calls the `process_excel_file` function.
+            - Calls the `iter_uploaded_file` function.
             - Asserts that no errors are returned.
-            - Asserts that the returned data is a list with the correct number of rows.
+            - Asserts that the batched rows have the correct length.
             - Verifies that all required columns are present in the processed data.
 
         Raises:
             AssertionError: If any of the assertions fail.
         """
-        logger.info("Running test_process_excel_file_valid")
+        logger.info("Running test_iter_excel_file_valid")
         columns = list(REQUIRED_COLUMNS)
         rows = [
             ["John", "Doe", "123456", "Toyota"],
@@ -65,18 +80,18 @@ class ProcessFileTests(TestCase):
             excel_file.read(),
             content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         )
-        data, error = process_excel_file(uploaded_file)
+        rows, error = iter_uploaded_file(uploaded_file)
         assert error is None
-        assert isinstance(data, list)
+        data = [row for batch in iter_batches(rows) for row in batch]
         assert len(data) == 2
         for d in data:
             for col in columns:
                 assert col in d
-        logger.info("test_process_excel_file_valid passed")
+        logger.info("test_iter_excel_file_valid passed")
 
-    def test_process_excel_file_missing_columns(self):
+    def test_iter_excel_file_missing_columns(self):
         """
-        Tests the `process_excel_file` function with an Excel file missing required columns.
+        Tests the `iter_uploaded_file` function with an Excel file missing required columns.
 
         This test creates an in-memory Excel file that lacks some of the required columns,
         uploads it, and verifies that the function returns an appropriate error message.
@@ -84,14 +99,14 @@ class ProcessFileTests(TestCase):
         Steps:
             - Creates an Excel file with missing required columns.
             - Uploads the file using `SimpleUploadedFile`.
-            - Calls the `process_excel_file` function.
-            - Asserts that the returned data is None.
+            - Calls the `iter_uploaded_file` function.
+            - Asserts that no rows iterator is returned.
             - Asserts that the error message contains the missing required columns.
 
         Raises:
             AssertionError: If any of the assertions fail.
         """
-        logger.info("Running test_process_excel_file_missing_columns")
+        logger.info("Running test_iter_excel_file_missing_columns")
         columns = ["Nombre", "Apellido"]  # Missing some required columns
         rows = [
             ["John", "Doe"],
@@ -102,16 +117,16 @@ class ProcessFileTests(TestCase):
             excel_file.read(),
             content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         )
-        data, error = process_excel_file(uploaded_file)
-        assert data is None
+        rows, error = iter_uploaded_file(uploaded_file)
+        assert rows is None
         for col in REQUIRED_COLUMNS:
             if col not in columns:
                 assert col in error
-        logger.info("test_process_excel_file_missing_columns passed")
+        logger.info("test_iter_excel_file_missing_columns passed")
 
-    def test_process_csv_file_valid(self):
+    def test_iter_csv_file_valid(self):
         """
-        Tests the `process_csv_file` function with a valid CSV file.
+        Tests the `iter_uploaded_file` function with a valid CSV file.
 
         This test creates an in-memory CSV file with the required columns and
         sample rows, uploads it, and verifies that the function processes the file
@@ -120,15 +135,15 @@ class ProcessFileTests(TestCase):
         Steps:
             - Creates a CSV file with the required columns and sample data.
             - Uploads the file using `SimpleUploadedFile`.
-            - Calls the `process_csv_file` function.
+            - Calls the `iter_uploaded_file` function.
             - Asserts that no errors are returned.
-            - Asserts that the returned data is a list with the correct number of rows.
+            - Asserts that the batched rows have the correct length.
             - Verifies that all required columns are present in the processed data.
 
         Raises:
             AssertionError: If any of the assertions fail.
         """
-        logger.info("Running test_process_csv_file_valid")
+        logger.info("Running test_iter_csv_file_valid")
         columns = list(REQUIRED_COLUMNS)
         rows = [
             ["John", "Doe", "123456", "Toyota"],
@@ -140,18 +155,18 @@ class ProcessFileTests(TestCase):
         uploaded_file = SimpleUploadedFile(
             "test.csv", csv_content.encode("utf-8"), content_type="text/csv"
         )
-        data, error = process_csv_file(uploaded_file)
+        rows, error = iter_uploaded_file(uploaded_file)
         assert error is None
-        assert isinstance(data, list)
+        data = [row for batch in iter_batches(rows) for row in batch]
         assert len(data) == 2
         for d in data:
             for col in columns:
                 assert col in d
-        logger.info("test_process_csv_file_valid passed")
+        logger.info("test_iter_csv_file_valid passed")
 
-    def test_process_csv_file_missing_columns(self):
+    def test_iter_csv_file_missing_columns(self):
         """
-        Tests the `process_csv_file` function with a CSV file missing required columns.
+        Tests the `iter_uploaded_file` function with a CSV file missing required columns.
 
         This test creates an in-memory CSV file that lacks some of the required columns,
         uploads it, and verifies that the function returns an appropriate error message.
@@ -159,14 +174,14 @@ class ProcessFileTests(TestCase):
         Steps:
             - Creates a CSV file with missing required columns.
             - Uploads the file using `SimpleUploadedFile`.
-            - Calls the `process_csv_file` function.
-            - Asserts that the returned data is None.
+            - Calls the `iter_uploaded_file` function.
+            - Asserts that no rows iterator is returned.
             - Asserts that the error message contains the missing required columns.
 
         Raises:
             AssertionError: If any of the assertions fail.
         """
-        logger.info("Running test_process_csv_file_missing_columns")
+        logger.info("Running test_iter_csv_file_missing_columns")
         columns = ["Nombre", "Apellido"]  # Missing some required columns
         rows = [
             ["John", "Doe"],
@@ -177,9 +192,138 @@ class ProcessFileTests(TestCase):
         uploaded_file = SimpleUploadedFile(
             "test.csv", csv_content.encode("utf-8"), content_type="text/csv"
         )
-        data, error = process_csv_file(uploaded_file)
-        assert data is None
+        rows, error = iter_uploaded_file(uploaded_file)
+        assert rows is None
         for col in REQUIRED_COLUMNS:
             if col not in columns:
                 assert col in error
-        logger.info("test_process_csv_file_missing_columns passed")
+        logger.info("test_iter_csv_file_missing_columns passed")
+
+
+class StreamingCsvTests(TestCase):
+    """Tests for the chunked CSV parser behind `iter_uploaded_file`."""
+
+    def stream(self, content, name="test.csv"):
+        # In-memory uploads ignore chunk_size; a File over BytesIO honours it like
+        # the temporary files Django writes for large uploads.
+        return File(io.BytesIO(content), name=name)
+
+    def build_csv(self, delimiter=",", rows=None):
+        columns = sorted(REQUIRED_COLUMNS)
+        rows = rows or [["Núñez" if col == "Apellidos" else "x" for col in columns]]
+        lines = [delimiter.join(columns)] + [delimiter.join(row) for row in rows]
+        return columns, "\r\n".join(lines) + "\r\n"
+
+    def test_detects_semicolon_delimiter_and_cp1252(self):
+        """Excel exports with `;` and Windows encoding are parsed."""
+        _, content = self.build_csv(delimiter=";")
+        uploaded_file = SimpleUploadedFile("test.csv", content.encode("cp1252"))
+        rows, error = iter_csv_file(uploaded_file)
+        assert error is None
+        assert next(rows)["Apellidos"] == "Núñez"
+
+    def test_utf8_bom_and_characters_split_across_chunks(self):
+        """Multi-byte characters cut by a chunk boundary are decoded correctly."""
+        columns, content = self.build_csv(rows=[["Núñez"] * len(REQUIRED_COLUMNS)] * 50)
+        uploaded_file = self.stream(codecs.BOM_UTF8 + content.encode("utf-8"))
+        rows, error = iter_csv_file(uploaded_file, chunk_size=7)
+        assert error is None
+        data = list(rows)
+        assert len(data) == 50
+        assert set(data[0]) == set(columns)
+        assert all(value == "Núñez" for row in data for value in row.values())
+
+    def test_quoted_values_with_newlines(self):
+        columns = sorted(REQUIRED_COLUMNS)
+        content = ",".join(columns) + "\n" + ",".join(['"linea 1\nlinea 2"'] * len(columns)) + "\n"
+        rows, error = iter_csv_file(self.stream(content.encode()), chunk_size=5)
+        assert error is None
+        assert list(rows)[0][columns[0]] == "linea 1\nlinea 2"
+
+    def test_rejects_headers_after_first_chunk(self):
+        """Missing columns are reported without reading the rest of the file."""
+        content = ("Nombres,Apellidos\n" + "John,Doe\n" * 1000).encode()
+        uploaded_file = self.stream(content)
+        read = []
+        chunks = uploaded_file.chunks
+
+        def counting_chunks(chunk_size=None):
+            for chunk in chunks(chunk_size):
+                read.append(chunk)
+                yield chunk
+
+        uploaded_file.chunks = counting_chunks
+        rows, error = iter_csv_file(uploaded_file, chunk_size=1024)
+        assert rows is None
+        assert "Placa del auto" in error
+        assert len(read) == 1
+
+
+class StreamingExcelTests(ProcessFileTests):
+    """Tests for the read-only Excel parser and batched uploads."""
+
+    def setUp(self):
+        self.columns = sorted(REQUIRED_COLUMNS)
+
+    def upload(self, rows, name="test.xlsx"):
+        excel_file = self.create_excel_file_with_columns(self.columns, rows)
+        return SimpleUploadedFile(name, excel_file.read())
+
+    def test_rows_in_batches(self):
+        """Rows come in batches; empty rows are skipped and short rows padded."""
+        rows = [[f"v{i}"] * len(self.columns) for i in range(5)]
+        rows.insert(2, [None] * len(self.columns))
+        rows.append(["solo"])
+        stream, error = iter_excel_file(self.upload(rows))
+        assert error is None
+        batches = list(iter_batches(stream, batch_size=2))
+        assert [len(batch) for batch in batches] == [2, 2, 2]
+        assert batches[-1][-1][self.columns[0]] == "solo"
+        assert batches[-1][-1][self.columns[-1]] is None
+
+    def test_header_check_closes_the_workbook(self):
+        """Validating the headers of an upload does not leave the workbook open."""
+        workbooks = []
+        load_workbook = openpyxl.load_workbook
+
+        def track(*args, **kwargs):
+            workbooks.append(load_workbook(*args, **kwargs))
+            return workbooks[-1]
+
+        with mock.patch("dashboard.utils.file_processor.openpyxl.load_workbook", track):
+            self.assertIsNone(check_uploaded_file(self.upload([["v"] * len(self.columns)])))
+        self.assertIsNone(workbooks[0]._archive.fp)
+
+    def test_invalid_csv_bytes_raise_upload_error(self):
+        """Bytes that do not match the encoding sniffed from the first chunk are reported."""
+        content = (",".join(self.columns) + "\nJohn\n").encode("utf-8") * 10 + b"\xff\xfe\n"
+        rows, error = iter_csv_file(File(io.BytesIO(content), name="test.csv"), chunk_size=16)
+        with self.assertRaises(UploadError):
+            list(iter_batches(rows))
+
+    def test_upload_above_5mb_is_processed(self):
+        """Files are no longer refused at 5MB; the configurable limit applies."""
+        user = User.objects.create_superuser(
+            email="admin@example.com", username="admin", password="secret123"
+        )
+        self.client.force_login(user)
+        row = ",".join(["x" * 200] * len(self.columns)) + "\n"
+        content = (",".join(self.columns) + "\n" + row * 3500).encode("utf-8")
+        assert len(content) > 5 * 1024 * 1024
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+
+        with override_settings(UPLOAD_MAX_SIZE=10 * 1024 * 1024, MEDIA_ROOT=media_root):
+            response = self.client.post(
+                reverse("dashboard"),
+                {"file": SimpleUploadedFile("big.csv", content)},
+                follow=True,
+            )
+        assert "error" not in response.context
+        assert response.context["page_obj"].paginator.count == 3500
+
+        with override_settings(UPLOAD_MAX_SIZE=1024 * 1024):
+            response = self.client.post(
+                reverse("dashboard"), {"file": SimpleUploadedFile("big.csv", content)}
+            )
+        assert "1MB" in response.context["error"]
@@ -0,0 +1,74 @@
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.test import TestCase
+
+from accounts.models import User
+from dashboard.utils.form_schemas import get_form_schemas, resolve_form_schemas
+from vehicles.models import VehicleModel
+
+
+class FormSchemaTests(TestCase):
+    """Tests for the compiled and cached create form schemas."""
+
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(name="Operaciones")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.permissions.add(
+                Permission.objects.get(codename="add_vehicle"),
+                Permission.objects.get(codename="view_vehicle"),
+            )
+        self.user = self.create_user("operaciones")
+
+    def create_user(self, username):
+        user = User.objects.create_user(
+            email=f"{username}@example.com", username=username, password="secret123"
+        )
+        user.groups.add(self.group)
+        return User.objects.get(pk=user.pk)
+
+    def test_schemas_are_compiled_once(self):
+        """Users with the same permissions share the compiled schemas."""
+        schemas = get_form_schemas(self.user)
+        other = self.create_user("otro")
+        other.get_all_permissions()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_form_schemas(other), schemas)
+        self.assertEqual([schema["model"] for schema in schemas], ["Vehicle"])
+
+    def test_permission_changes_invalidate_the_schemas(self):
+        """Adding an add permission to the group shows its form on the next lookup."""
+        get_form_schemas(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.permissions.add(Permission.objects.get(codename="add_client"))
+        user = User.objects.get(pk=self.user.pk)
+        models = [schema["model"] for schema in get_form_schemas(user)]
+        self.assertEqual(sorted(models), ["Client", "Vehicle"])
+
+    def test_schemas_follow_the_user_permissions(self):
+        """Permissions granted to the user, not only to the group, add their forms."""
+        other = self.create_user("otro")
+        other.user_permissions.add(Permission.objects.get(codename="add_client"))
+        other = User.objects.get(pk=other.pk)
+        self.assertEqual([schema["model"] for schema in get_form_schemas(self.user)], ["Vehicle"])
+        models = [schema["model"] for schema in get_form_schemas(other)]
+        self.assertEqual(sorted(models), ["Client", "Vehicle"])
+
+    def test_superusers_only_get_dashboard_forms(self):
+        """Models without a create view in the dashboard are left out for superusers."""
+        admin = User.objects.create_superuser(
+            email="admin@example.com", username="admin", password="secret123"
+        )
+        models = [schema["model"] for schema in get_form_schemas(admin)]
+        self.assertEqual(
+            sorted(models), ["Client", "Contract", "Invoice", "Vehicle", "VehicleModel"]
+        )
+
+    def test_foreign_key_choices_are_resolved_per_request(self):
+        """New related rows appear in the choices without recompiling the schema."""
+        get_form_schemas(self.user)
+        VehicleModel.objects.create(brand="Yamaha", model="FZ")
+        schema = resolve_form_schemas(get_form_schemas(self.user))[0]
+        field = next(f for f in schema["fields"] if f["name"] == "vehicle_model")
+        self.assertEqual([choice["label"] for choice in field["choices"]], ["Yamaha FZ"])
+        self.assertNotIn("related_model", field)
@@ -0,0 +1,63 @@
+from django.test import TestCase
+
+from clients.models import Client
+from dashboard.utils.pagination import (
+    KeysetPaginator,
+    decode_cursor,
+    encode_cursor,
+    estimate_count,
+)
+
+
+class KeysetPaginatorTests(TestCase):
+    """Tests for the cursor (keyset) paginator."""
+
+    def setUp(self):
+        for index in range(7):
+            Client.objects.create(
+                first_name=f"Cliente {index}",
+                last_name="Prueba" if index % 2 else "Alvarez",
+                document_number=f"DOC{index}",
+                email=f"cliente{index}@example.com",
+            )
+
+    def walk(self, paginator):
+        pages, cursor = [], None
+        while True:
+            page = paginator.get_page(cursor)
+            pages.append([client.document_number for client in page])
+            if not page.has_next():
+                return pages, page
+            cursor = page.next_cursor
+
+    def test_pages_cover_every_row_once(self):
+        """Following the next cursors returns every row in (sort_key, id) order."""
+        paginator = KeysetPaginator(Client.objects.all(), 3, "last_name")
+        pages, _ = self.walk(paginator)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        expected = list(
+            Client.objects.order_by("last_name", "pk").values_list("document_number", flat=True)
+        )
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_previous_cursor_returns_the_previous_page(self):
+        """A previous cursor rebuilds the page before, in the same order."""
+        paginator = KeysetPaginator(Client.objects.all(), 3, "-last_name")
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+        back = paginator.get_page(second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_invalid_cursor_returns_the_first_page(self):
+        """Tampered cursors are ignored."""
+        self.assertIsNone(decode_cursor("not-a-cursor"))
+        self.assertIsNone(decode_cursor(encode_cursor("sideways", None, 1)))
+        paginator = KeysetPaginator(Client.objects.all(), 3)
+        self.assertEqual(list(paginator.get_page("not-a-cursor")), list(paginator.get_page()))
+
+    def test_estimate_count_is_capped(self):
+        """The estimated total stops counting at the limit."""
+        self.assertEqual(estimate_count(Client.objects.all()), (7, True))
+        self.assertEqual(estimate_count(Client.objects.all(), limit=5), (5, False))
@@ -0,0 +1,160 @@
+import importlib
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from clients.models import Client
+from contracts.models import Contract
+from dashboard.models import UploadedDataset
+from dashboard.utils.crm_import import import_into_crm
+from dashboard.utils.datasets import create_dataset, import_dataset
+from dashboard.utils.reconciliation import get_row_status, reconcile_dataset
+from vehicles.models import Vehicle, VehicleModel
+
+User = get_user_model()
+
+HEADER = (
+    "Nombres,Apellidos,Número de documento,Inicio de contrato,Cuota semanal,"
+    "Marca del auto,Modelo del auto,Placa del auto\n"
+)
+
+
+class ReconciliationTests(TestCase):
+    """Tests for the comparison of uploaded rows with the existing CRM records."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.user = User.objects.create_superuser(
+            email="admin@example.com", username="admin", password="secret123"
+        )
+        model = VehicleModel.objects.create(brand="Toyota", model="Hilux")
+        client = Client.objects.create(
+            first_name="Ana", last_name="Vieja", document_number="100", email="ana@example.com"
+        )
+        vehicle = Vehicle.objects.create(vehicle_model=model, license_plate="AAA111")
+        Client.objects.create(
+            first_name="Eva", last_name="Sola", document_number="500", email="eva@example.com"
+        )
+        Contract.objects.create(
+            client=client,
+            vehicle=vehicle,
+            start_date=date(2024, 1, 1),
+            weekly_payment=Decimal("100"),
+        )
+
+    def dataset(self, lines):
+        content = (HEADER + "".join(line + "\n" for line in lines)).encode("utf-8")
+        dataset = create_dataset(self.user, SimpleUploadedFile("cartera.csv", content))
+        return import_dataset(dataset.pk)
+
+    def test_rows_are_classified_on_upload(self):
+        dataset = self.dataset(
+            [
+                "Ana,Pérez,1.00,2024-02-01,150,Toyota,Hilux,aaa 111",
+                "Beto,Gómez,200,2024-03-05,120,Mazda,CX-5,BBB222",
+                "Caro,Ruiz,300,2024-03-01,90,Toyota,Hilux,AAA111",
+                "Ana,Pérez,100,2024-03-01,90,Mazda,CX-5,CCC333",
+                "Eva,Sola,500,2024-03-01,90,Mazda,CX-5,EEE555",
+                "Dani,Díaz,400,no es fecha,90,Toyota,Hilux,DDD444",
+            ]
+        )
+        # The stored result is the one shown on the dashboard.
+        reconciliation = UploadedDataset.objects.get(pk=dataset.pk).reconciliation
+
+        self.assertEqual(reconciliation["statuses"], "encce-")
+        self.assertEqual(
+            reconciliation["counts"], {"new": 1, "existing": 2, "conflict": 2, "invalid": 1}
+        )
+        self.assertEqual([conflict["row"] for conflict in reconciliation["conflicts"]], [3, 4])
+        self.assertEqual(get_row_status(dataset, 2), "conflict")
+        self.assertIsNone(get_row_status(dataset, 6))
+
+    def test_non_canonical_stored_values_are_normalized(self):
+        """Documents and plates typed with dots, spaces or lower case still match."""
+        client = Client.objects.create(
+            first_name="Gus", last_name="Paz", document_number="1.234.567", email="gus@example.com"
+        )
+        self.assertEqual(client.document_number, "1234567")
+        # Rows written before values were normalized on save.
+        Client.objects.filter(pk=client.pk).update(document_number="1.234.567")
+        Vehicle.objects.filter(license_plate="AAA111").update(license_plate="aaa 111")
+        dataset = self.dataset(["Gus,Paz,1234567,2024-03-01,90,Kia,Rio,GGG777"])
+        self.assertEqual(dataset.reconciliation["statuses"], "n")
+
+        for module, function in (
+            ("clients.migrations.0003_normalize_document_numbers", "normalize_document_numbers"),
+            ("vehicles.migrations.0004_normalize_license_plates", "normalize_license_plates"),
+        ):
+            getattr(importlib.import_module(module), function)(apps, None)
+
+        dataset = self.dataset(
+            [
+                "Gus,Paz,1234567,2024-03-01,90,Kia,Rio,GGG777",
+                "Ana,Pérez,100,2024-02-01,150,Toyota,Hilux,AAA111",
+            ]
+        )
+        self.assertEqual(dataset.reconciliation["statuses"], "ee")
+
+    def test_normalization_stops_on_duplicates(self):
+        """Two clients that would share a document are reported, not merged."""
+        Client.objects.filter(document_number="500").update(document_number="1-00")
+        migration = importlib.import_module("clients.migrations.0003_normalize_document_numbers")
+        with self.assertRaisesMessage(RuntimeError, "Documento 100"):
+            migration.normalize_document_numbers(apps, None)
+
+    def test_rows_that_collide_within_the_file_are_conflicts(self):
+        """A plate or document paired differently by an earlier row is a conflict."""
+        dataset = self.dataset(
+            [
+                "Beto,Gómez,200,2024-03-05,120,Mazda,CX-5,BBB222",
+                "Caro,Ruiz,300,2024-03-05,120,Mazda,CX-5,BBB222",
+                "Beto,Gómez,200,2024-03-05,120,Mazda,CX-5,FFF666",
+                "Beto,Gómez,200,2024-04-05,130,Mazda,CX-5,BBB222",
+            ]
+        )
+        reconciliation = dataset.reconciliation
+        self.assertEqual(reconciliation["statuses"], "nccn")
+        self.assertEqual(
+            reconciliation["conflicts"],
+            [
+                {"row": 2, "message": "La placa ya aparece en la fila 1 con otro documento."},
+                {"row": 3, "message": "El documento ya aparece en la fila 1 con otro vehículo."},
+            ],
+        )
+
+    def test_import_refreshes_reconciliation(self):
+        dataset = self.dataset(["Beto,Gómez,200,2024-03-05,120,Mazda,CX-5,BBB222"])
+        self.assertEqual(dataset.reconciliation["statuses"], "n")
+        import_into_crm(dataset)
+        self.assertEqual(dataset.reconciliation["statuses"], "e")
+
+    def test_query_count_does_not_grow_with_rows(self):
+        def run(count, offset):
+            lines = [
+                f"N{i},A{i},D{offset + i},2024-01-01,100,Kia,Rio,P{offset + i}"
+                for i in range(count)
+            ]
+            # Half of the rows match clients that already exist.
+            Client.objects.bulk_create(
+                Client(document_number=f"D{offset + i}", email=f"{offset + i}@example.com")
+                for i in range(0, count, 2)
+            )
+            dataset = self.dataset(lines)
+            with CaptureQueriesContext(connection) as queries:
+                reconciliation = reconcile_dataset(dataset)
+            self.assertEqual(reconciliation["counts"]["existing"], (count + 1) // 2)
+            return len(queries)
+
+        self.assertEqual(run(5, 1000), run(60, 2000))
@@ -0,0 +1,211 @@
+from datetime import date
+from decimal import Decimal
+import logging
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import User
+from core.metrics import get_store, render_metrics
+from clients.models import Client
+from contracts.models import Contract
+from dashboard.utils.cache import get_cache_stats
+from vehicles.models import Vehicle, VehicleModel
+
+logger = logging.getLogger(__name__)
+
+
+def create_portfolio(size):
+    """Creates `size` clients, each with a vehicle and an active contract."""
+    vehicle_model = VehicleModel.objects.create(brand="Honda", model="CB190")
+    for index in range(size):
+        client = Client.objects.create(
+            first_name=f"Cliente {index}",
+            last_name="Prueba",
+            document_number=f"DOC{index:04d}",
+            email=f"cliente{index}@example.com",
+        )
+        vehicle = Vehicle.objects.create(
+            vehicle_model=vehicle_model, license_plate=f"ABC{index:04d}"
+        )
+        Contract.objects.create(
+            client=client,
+            vehicle=vehicle,
+            start_date=date(2025, 1, 6),
+            weekly_payment=Decimal("100.00"),
+            amount=Decimal("1000.00"),
+        )
+
+
+class RoleDashboardViewTests(TestCase):
+    """Tests for the database-level pagination of the role dashboards."""
+
+    def setUp(self):
+        cache.clear()
+
+    def login_with_role(self, role):
+        user = User.objects.create_user(
+            email=f"{role}@example.com", username=role, password="secret123"
+        )
+        user.groups.add(Group.objects.create(name=role.capitalize()))
+        self.client.login(username=f"{role}@example.com", password="secret123")
+
+    def test_only_the_current_page_is_materialized(self):
+        """Each role dashboard builds just the rows of the requested page."""
+        logger.info("Running test_only_the_current_page_is_materialized")
+        create_portfolio(25)
+        for role, per_page in [("ventas", 5), ("operaciones", 10)]:
+            with self.subTest(role=role):
+                self.login_with_role(role)
+                response = self.client.get(reverse("role_dashboard"), {"page": 2})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.context["rows"]), min(per_page, 25 - per_page))
+                self.assertEqual(response.context["page_obj"]["number"], 2)
+                self.assertEqual(response.context["page_obj"]["count"], 25)
+
+    def test_operaciones_dashboard_lists_the_idle_fleet(self):
+        """Vehicles without an active contract are summarized, the longest idle first."""
+        create_portfolio(3)
+        Contract.objects.filter(vehicle__license_plate="ABC0001").update(active=False)
+        Vehicle.objects.filter(license_plate="ABC0001").update(
+            current_contract=None, available_since=date(2025, 3, 1)
+        )
+        Vehicle.objects.create(vehicle_model=VehicleModel.objects.get(), license_plate="NEW0001")
+        self.login_with_role("operaciones")
+        response = self.client.get(reverse("role_dashboard"))
+        available = response.context["available_vehicles"]
+        self.assertEqual(available["count"], 2)
+        self.assertEqual(
+            [vehicle["plate"] for vehicle in available["longest_idle"]], ["NEW0001", "ABC0001"]
+        )
+        self.assertContains(response, "ABC0001 (desde 01/03/2025)")
+
+    def test_cobranzas_dashboard_uses_cursors(self):
+        """The collections dashboard walks the contracts with keyset cursors."""
+        create_portfolio(25)
+        self.login_with_role("cobranzas")
+        first = self.client.get(reverse("role_dashboard"))
+        self.assertTrue(first.context["cursor_pagination"])
+        self.assertEqual(len(first.context["rows"]), 20)
+        self.assertEqual(first.context["estimated_count"], 25)
+        self.assertFalse(first.context["page_obj"]["has_previous"])
+
+        second = self.client.get(
+            reverse("role_dashboard"), {"cursor": first.context["page_obj"]["next_cursor"]}
+        )
+        self.assertEqual(len(second.context["rows"]), 5)
+        self.assertFalse(second.context["page_obj"]["has_next"])
+
+        back = self.client.get(
+            reverse("role_dashboard"), {"cursor": second.context["page_obj"]["previous_cursor"]}
+        )
+        self.assertEqual(back.context["rows"], first.context["rows"])
+
+    def test_pagination_links_keep_the_filters(self):
+        """Cursor links carry the other GET parameters of the request."""
+        create_portfolio(25)
+        self.login_with_role("cobranzas")
+        response = self.client.get(reverse("role_dashboard"), {"active": "True"})
+        cursor = response.context["page_obj"]["next_cursor"]
+        self.assertContains(response, f'href="?active=True&amp;cursor={cursor}"')
+
+    def test_query_count_does_not_grow_with_the_table(self):
+        """Rendering a page costs the same number of queries for 10 or 40 rows."""
+        self.login_with_role("ventas")
+        create_portfolio(10)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse("role_dashboard"))
+        Contract.objects.all().delete()
+        Client.objects.all().delete()
+        Vehicle.objects.all().delete()
+        VehicleModel.objects.all().delete()
+        cache.clear()
+        create_portfolio(40)
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(reverse("role_dashboard"))
+        self.assertEqual(len(small), len(large))
+
+
+class RoleDashboardCacheTests(TestCase):
+    """Tests for the cached role dashboard payload."""
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(
+            email="ventas@example.com", username="ventas", password="secret123"
+        )
+        user.groups.add(Group.objects.create(name="Ventas"))
+        self.client.login(username="ventas@example.com", password="secret123")
+        with self.captureOnCommitCallbacks(execute=True):
+            create_portfolio(3)
+
+    def test_second_request_is_served_from_the_cache(self):
+        """A repeated request does not query the dashboard tables again."""
+        with CaptureQueriesContext(connection) as first:
+            self.client.get(reverse("role_dashboard"))
+        with CaptureQueriesContext(connection) as second:
+            response = self.client.get(reverse("role_dashboard"))
+        self.assertLess(len(second), len(first))
+        self.assertEqual(len(response.context["rows"]), 3)
+        stats = get_cache_stats("ventas")
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["ratio"], 0.5)
+
+    def test_hits_and_misses_are_published_as_metrics(self):
+        """The counters also reach /metrics, which is shared between processes."""
+        get_store().clear()
+        self.client.get(reverse("role_dashboard"))
+        self.client.get(reverse("role_dashboard"))
+        output = render_metrics()
+        self.assertIn('crm_dashboard_cache_requests_total{result="hit",role="ventas"} 1', output)
+        self.assertIn('crm_dashboard_cache_requests_total{result="miss",role="ventas"} 1', output)
+
+    def test_model_changes_invalidate_the_payload(self):
+        """Saving or deleting a client is visible on the next request."""
+        self.client.get(reverse("role_dashboard"))
+        with self.captureOnCommitCallbacks(execute=True):
+            Client.objects.first().delete()
+        response = self.client.get(reverse("role_dashboard"))
+        self.assertEqual(len(response.context["rows"]), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client = Client.objects.first()
+            client.first_name = "Renombrado"
+            client.save()
+        response = self.client.get(reverse("role_dashboard"))
+        self.assertIn("Renombrado Prueba", [row["full_name"] for row in response.context["rows"]])
+
+    def test_vehicle_model_changes_invalidate_the_payload(self):
+        """Renaming a vehicle model is visible on the operations dashboard."""
+        user = User.objects.create_user(
+            email="operaciones@example.com", username="operaciones", password="secret123"
+        )
+        user.groups.add(Group.objects.create(name="Operaciones"))
+        self.client.login(username="operaciones@example.com", password="secret123")
+        self.client.get(reverse("role_dashboard"))
+        with self.captureOnCommitCallbacks(execute=True):
+            vehicle_model = VehicleModel.objects.get()
+            vehicle_model.brand = "Yamaha"
+            vehicle_model.save()
+        response = self.client.get(reverse("role_dashboard"))
+        self.assertEqual({row["brand"] for row in response.context["rows"]}, {"Yamaha"})
+
+    def test_pages_are_cached_separately(self):
+        """The page parameter is part of the cache key."""
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(4):
+                Client.objects.create(
+                    first_name=f"Extra {index}",
+                    last_name="Prueba",
+                    document_number=f"EXT{index}",
+                    email=f"extra{index}@example.com",
+                )
+        first = self.client.get(reverse("role_dashboard"))
+        second = self.client.get(reverse("role_dashboard"), {"page": 2})
+        self.assertEqual(first.context["page_obj"]["number"], 1)
+        self.assertEqual(second.context["page_obj"]["number"], 2)
+        self.assertEqual(len(second.context["rows"]), 2)
@@ -1,7 +1,28 @@
 from django.urls import path
-from .views import DashboardView, RoleDashboardView
+from .views import (
+    AutocompleteView,
+    DashboardView,
+    DatasetProgressView,
+    ImportDatasetView,
+    RoleDashboardView,
+)
 
 urlpatterns = [
     path("", DashboardView.as_view(), name="dashboard"),
     path("dashboard/user/", RoleDashboardView.as_view(), name="role_dashboard"),
+    path(
+        "dashboard/autocomplete/<str:model>/",
+        AutocompleteView.as_view(),
+        name="autocomplete",
+    ),
+    path(
+        "dashboard/datasets/<int:pk>/progress/",
+        DatasetProgressView.as_view(),
+        name="dataset_progress",
+    ),
+    path(
+        "dashboard/datasets/import/",
+        ImportDatasetView.as_view(),
+        name="import_dataset",
+    ),
 ]
@@ -0,0 +1,125 @@
+import hashlib
+import logging
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from dashboard.utils.cache import get_version
+
+logger = logging.getLogger("dashboard")
+
+# Searchable models and the fields matched by prefix. Client and vehicle fields are
+# backed by varchar_pattern_ops indexes; vehicle models are a small catalog.
+AUTOCOMPLETE_FIELDS = {
+    "clients.client": ("document_number", "first_name", "last_name"),
+    "vehicles.vehicle": ("license_plate",),
+    "vehicles.vehiclemodel": ("brand", "model"),
+    "contracts.contract": ("client__document_number", "vehicle__license_plate"),
+}
+# Relations needed to render the label (`__str__`) of each result.
+AUTOCOMPLETE_SELECT_RELATED = {
+    "vehicles.vehicle": ("vehicle_model",),
+    "contracts.contract": ("client",),
+}
+AUTOCOMPLETE_LIMIT = 20
+AUTOCOMPLETE_CACHE_TIMEOUT = 60
+AUTOCOMPLETE_THRESHOLD = 200
+AUTOCOMPLETE_KEY = "dashboard:autocomplete:{model}:{version}:{query}"
+
+
+def get_autocomplete_threshold():
+    """Number of related rows above which a create form uses autocomplete."""
+    return getattr(settings, "AUTOCOMPLETE_THRESHOLD", AUTOCOMPLETE_THRESHOLD)
+
+
+def prefix_variants(q):
+    """
+    Returns the spellings of a search term matched by prefix: as typed, in upper
+    case (plates, documents) and capitalized (names). Case-sensitive prefixes keep
+    the varchar_pattern_ops indexes usable.
+    """
+    variants = []
+    for variant in (q, q.upper(), q.capitalize()):
+        if variant not in variants:
+            variants.append(variant)
+    return variants
+
+
+def can_search(user, model_label):
+    """
+    Whether a user may search a model: with its view or add permission, or with
+    the add permission of a model whose create form picks rows of it (e.g. adding
+    a contract searches clients and vehicles).
+
+    Args:
+        user (User): The user making the request.
+        model_label (str): A key of AUTOCOMPLETE_FIELDS, e.g. "clients.client".
+
+    Returns:
+        bool: True if the user may see the results.
+    """
+    opts = apps.get_model(model_label)._meta
+    if user.has_perm(f"{opts.app_label}.view_{opts.model_name}") or user.has_perm(
+        f"{opts.app_label}.add_{opts.model_name}"
+    ):
+        return True
+    return any(
+        user.has_perm(
+            f"{relation.related_model._meta.app_label}.add_{relation.related_model._meta.model_name}"
+        )
+        for relation in opts.related_objects
+        if relation.one_to_many
+    )
+
+
+def search(model_label, q, limit=AUTOCOMPLETE_LIMIT):
+    """
+    Searches the rows of a model whose search fields start with `q`.
+
+    Args:
+        model_label (str): A key of AUTOCOMPLETE_FIELDS, e.g. "clients.client".
+        q (str): The search term.
+        limit (int): Maximum number of results.
+
+    Returns:
+        list: Dicts with the `value` (primary key) and `label` of each result.
+    """
+    q = q.strip()
+    if not q:
+        return []
+    fields = AUTOCOMPLETE_FIELDS[model_label]
+    condition = Q()
+    for field in fields:
+        for variant in prefix_variants(q):
+            condition |= Q(**{f"{field}__startswith": variant})
+
+    queryset = (
+        apps.get_model(model_label)
+        .objects.filter(condition)
+        .select_related(*AUTOCOMPLETE_SELECT_RELATED.get(model_label, ()))
+        .order_by(fields[0], "pk")[:limit]
+    )
+    return [{"value": obj.pk, "label": str(obj)} for obj in queryset]
+
+
+def cached_search(model_label, q, limit=AUTOCOMPLETE_LIMIT):
+    """
+    Same as `search`, cached per model, term and model version. Saving or deleting
+    a row of the model bumps its version, so a change shows up on the next search.
+    """
+    key = AUTOCOMPLETE_KEY.format(
+        model=model_label,
+        version=get_version(model_label),
+        query=hashlib.md5(f"{limit}:{q.strip()}".encode("utf-8")).hexdigest(),
+    )
+    results = cache.get(key)
+    if results is None:
+        results = search(model_label, q, limit)
+        cache.set(
+            key,
+            results,
+            getattr(settings, "AUTOCOMPLETE_CACHE_TIMEOUT", AUTOCOMPLETE_CACHE_TIMEOUT),
+        )
+    return results
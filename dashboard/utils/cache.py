@@ -0,0 +1,188 @@
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import urlencode
+
+from core import metrics
+
+logger = logging.getLogger("dashboard")
+
+# Models whose changes invalidate the role dashboards.
+DASHBOARD_CACHE_MODELS = (
+    "clients.client",
+    "vehicles.vehicle",
+    "vehicles.vehiclemodel",
+    "contracts.contract",
+    "invoices.invoice",
+)
+DASHBOARD_CACHE_TIMEOUT = 300
+
+VERSION_KEY = "dashboard:version:{}"
+PAYLOAD_KEY = "dashboard:role:{role}:{versions}:{params}"
+STATS_KEY = "dashboard:stats:{role}:{result}"
+
+
+def _new_version():
+    # Versions start from the clock, so a counter evicted from the cache never
+    # comes back with a value an old payload was stored under.
+    return time.time_ns()
+
+
+def bump_dashboard_version(model_label):
+    """
+    Increments a version counter, so every cached dashboard payload built from the
+    previous data stops being served.
+
+    Args:
+        model_label (str): The lowercase model label, e.g. "contracts.contract", or
+            the name of another versioned namespace such as "form_schemas".
+    """
+    key = VERSION_KEY.format(model_label)
+    try:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), timeout=None)
+    except Exception as e:
+        logger.warning(f"Could not bump dashboard cache version of {model_label}: {e}")
+
+
+def bump_dashboard_version_on_commit(model_label):
+    """Bumps the version of a model once the current transaction commits."""
+    transaction.on_commit(lambda: bump_dashboard_version(model_label))
+
+
+def get_version(name):
+    """
+    Returns the current value of a version counter, creating it if missing.
+
+    Args:
+        name (str): The versioned namespace, e.g. "form_schemas".
+
+    Returns:
+        int: The version.
+    """
+    key = VERSION_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get_dashboard_versions():
+    """
+    Returns the current version counters of the dashboard models, creating the
+    missing ones.
+
+    Returns:
+        str: The versions joined in DASHBOARD_CACHE_MODELS order.
+    """
+    keys = [VERSION_KEY.format(label) for label in DASHBOARD_CACHE_MODELS]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return ".".join(str(versions[key]) for key in keys)
+
+
+def get_payload_key(role, params):
+    """
+    Builds the cache key of a role dashboard payload.
+
+    Args:
+        role (str): The normalized name of the user's group.
+        params (QueryDict): The GET parameters of the request (page, cursor and filters).
+
+    Returns:
+        str: A key that changes whenever one of the dashboard models changes.
+    """
+    query = urlencode(sorted((key, params.getlist(key)) for key in params), doseq=True)
+    return PAYLOAD_KEY.format(
+        role=role,
+        versions=get_dashboard_versions(),
+        params=hashlib.md5(query.encode("utf-8")).hexdigest(),
+    )
+
+
+def get_cached_payload(role, params, build_payload):
+    """
+    Returns the dashboard payload of a role from the cache, building and storing it
+    on a miss. Cache backend errors fall back to building the payload.
+
+    Args:
+        role (str): The normalized name of the user's group.
+        params (QueryDict): The GET parameters of the request.
+        build_payload (callable): Builds the payload. It must return plain data
+            (dicts, lists and scalars) so it can be pickled by any cache backend.
+
+    Returns:
+        dict: The dashboard payload.
+    """
+    try:
+        key = get_payload_key(role, params)
+        payload = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Dashboard cache unavailable, building payload: {e}")
+        return build_payload()
+
+    if payload is not None:
+        _record(role, "hits")
+        return payload
+
+    _record(role, "misses")
+    payload = build_payload()
+    try:
+        cache.set(
+            key,
+            payload,
+            getattr(settings, "DASHBOARD_CACHE_TIMEOUT", DASHBOARD_CACHE_TIMEOUT),
+        )
+    except Exception as e:
+        logger.warning(f"Could not store dashboard payload for {role}: {e}")
+    return payload
+
+
+def _record(role, result):
+    # The Prometheus counter goes through the shared metrics store, so /metrics
+    # reports every worker even when the cache itself is per process.
+    metrics.inc(
+        "crm_dashboard_cache_requests_total",
+        role=role,
+        result="hit" if result == "hits" else "miss",
+    )
+    for scope in (role, "all"):
+        key = STATS_KEY.format(role=scope, result=result)
+        try:
+            cache.add(key, 0, timeout=None)
+            cache.incr(key)
+        except Exception:
+            pass
+
+
+def get_cache_stats(role="all"):
+    """
+    Returns the hit/miss counters of the dashboard cache.
+
+    Args:
+        role (str): A normalized group name, or "all" for every role.
+
+    Returns:
+        dict: hits, misses and the hit ratio (None when there were no lookups).
+    """
+    counters = cache.get_many(
+        [STATS_KEY.format(role=role, result=result) for result in ("hits", "misses")]
+    )
+    hits = counters.get(STATS_KEY.format(role=role, result="hits"), 0)
+    misses = counters.get(STATS_KEY.format(role=role, result="misses"), 0)
+    lookups = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "ratio": hits / lookups if lookups else None,
+    }
@@ -0,0 +1,204 @@
+from datetime import date, datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from clients.models import Client
+from clients.utils.documents import normalize_document
+from contracts.models import Contract
+from dashboard.constants import REQUIRED_COLUMNS
+from vehicles.models import Vehicle, VehicleModel
+from vehicles.utils.plates import normalize_plate
+
+# Excel stores dates as days since 1899-12-30 when a cell is not formatted as a date.
+EXCEL_EPOCH = date(1899, 12, 30)
+DATE_FORMATS = ("%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d")
+CENTS = Decimal("0.01")
+
+
+def coerce_text(value):
+    return "" if value is None else " ".join(str(value).split())
+
+
+def coerce_date(value):
+    """
+    Accepts dates and datetimes (Excel cells), ISO strings, dd/mm/yyyy and
+    dd-mm-yyyy strings, and Excel serial numbers.
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, (int, float)) and 1 <= value < 100000:
+        return EXCEL_EPOCH + timedelta(days=int(value))
+    text = coerce_text(value)
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        pass
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError("Fecha no válida")
+
+
+def coerce_decimal(value):
+    """
+    Accepts numbers and amounts written with a currency sign and Colombian or
+    English separators ("$1.200,50", "1,200.50", "120.000"). When only one kind of
+    separator appears, a dot or comma followed by exactly three digits is read as
+    a thousands separator.
+    """
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        amount = Decimal(str(value))
+    else:
+        text = coerce_text(value).replace("$", "").replace(" ", "")
+        if "," in text and "." in text:
+            thousands = "." if text.rfind(",") > text.rfind(".") else ","
+            text = text.replace(thousands, "").replace(",", ".")
+        else:
+            separator = "," if "," in text else "."
+            parts = text.split(separator)
+            if len(parts) > 2 or (len(parts) == 2 and len(parts[1]) == 3):
+                text = "".join(parts)
+            else:
+                text = text.replace(",", ".")
+        try:
+            amount = Decimal(text)
+        except InvalidOperation:
+            raise ValueError("Valor no válido")
+    if not amount.is_finite() or amount < 0:
+        raise ValueError("Valor no válido")
+    try:
+        return amount.quantize(CENTS, rounding=ROUND_HALF_UP)
+    except InvalidOperation:
+        # More digits than the decimal context holds, e.g. "1e30".
+        raise ValueError("Valor no válido")
+
+
+def coerce_document(value):
+    """
+    Removes the dots, spaces and dashes of document numbers (see
+    `normalize_document`); 123.0 (Excel) becomes "123".
+    """
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    document = normalize_document(coerce_text(value))
+    if not document:
+        raise ValueError("Documento no válido")
+    return document
+
+
+def coerce_plate(value):
+    """Upper case without spaces, e.g. "abc 123" becomes "ABC123" (see `normalize_plate`)."""
+    plate = normalize_plate(coerce_text(value))
+    if not plate:
+        raise ValueError("Placa no válida")
+    return plate
+
+
+# Coercion applied to each known column. Other columns are kept as uploaded.
+COLUMN_COERCERS = {
+    "Nombres": coerce_text,
+    "Apellidos": coerce_text,
+    "Número de documento": coerce_document,
+    "Inicio de contrato": coerce_date,
+    "Cuota semanal": coerce_decimal,
+    "Marca del auto": coerce_text,
+    "Modelo del auto": coerce_text,
+    "Placa del auto": coerce_plate,
+    "Monto total": coerce_decimal,
+}
+# The CRM fields each column is imported into, whose limits are checked on upload
+# so that the import does not fail on the database.
+COLUMN_FIELDS = {
+    "Nombres": Client._meta.get_field("first_name"),
+    "Apellidos": Client._meta.get_field("last_name"),
+    "Número de documento": Client._meta.get_field("document_number"),
+    "Cuota semanal": Contract._meta.get_field("weekly_payment"),
+    "Marca del auto": VehicleModel._meta.get_field("brand"),
+    "Modelo del auto": VehicleModel._meta.get_field("model"),
+    "Placa del auto": Vehicle._meta.get_field("license_plate"),
+    "Monto total": Contract._meta.get_field("amount"),
+}
+# How typed values are stored in JSON and read back.
+COLUMN_LOADERS = {
+    "Inicio de contrato": date.fromisoformat,
+    "Cuota semanal": Decimal,
+    "Monto total": Decimal,
+}
+
+
+def check_field_limits(field, value):
+    """
+    Rejects a coerced value that does not fit its model field: strings longer than
+    `max_length` and amounts with more integer digits than `max_digits` allows.
+
+    Raises:
+        ValueError: If the value does not fit.
+    """
+    if isinstance(value, str) and field.max_length and len(value) > field.max_length:
+        raise ValueError(f"Supera los {field.max_length} caracteres")
+    if isinstance(value, Decimal) and getattr(field, "max_digits", None):
+        if value >= 10 ** (field.max_digits - field.decimal_places):
+            raise ValueError("Valor demasiado grande")
+
+
+def coerce_columns(columns, rows, first_row=1):
+    """
+    Validates and converts a batch of rows column by column: each column is coerced
+    in one pass with the function of its type, and checked against the limits of
+    the CRM field it is imported into.
+
+    Args:
+        columns (list): The column headers, in file order.
+        rows (list): Rows as lists of values aligned with `columns`. They are
+            converted in place; invalid cells keep their uploaded value.
+        first_row (int): The row number of the first row, used in the report.
+
+    Returns:
+        tuple: A tuple containing:
+            - rows (list): The same rows, with typed values.
+            - errors (list): One [row, column index, message] entry per invalid cell.
+    """
+    errors = []
+    for index, column in enumerate(columns):
+        coerce = COLUMN_COERCERS.get(column)
+        if coerce is None:
+            continue
+        field = COLUMN_FIELDS.get(column)
+        required = column in REQUIRED_COLUMNS
+        for offset, row in enumerate(rows):
+            value = row[index]
+            if value is None or (isinstance(value, str) and not value.strip()):
+                if required:
+                    errors.append([first_row + offset, index, "Valor vacío"])
+                continue
+            try:
+                value = coerce(value)
+                if field is not None:
+                    check_field_limits(field, value)
+                row[index] = value
+            except ValueError as e:
+                errors.append([first_row + offset, index, str(e)])
+    errors.sort()
+    return rows, errors
+
+
+def load_values(columns, values):
+    """
+    Turns the stored JSON values of a valid row back into dates and decimals.
+
+    Args:
+        columns (list): The column headers of the dataset.
+        values (list): The stored values of a row.
+
+    Returns:
+        list: The typed values.
+    """
+    typed = list(values)
+    for index, column in enumerate(columns):
+        load = COLUMN_LOADERS.get(column)
+        if load is not None and typed[index] not in (None, ""):
+            typed[index] = load(typed[index])
+    return typed
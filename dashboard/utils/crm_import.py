@@ -0,0 +1,272 @@
+import logging
+import uuid
+
+from django.db import transaction
+from django.db.models import Q
+
+from clients.models import Client
+from contracts.models import Contract
+from contracts.utils.balances import refresh_contract_balances
+from dashboard.constants import AMOUNT_COLUMN
+from dashboard.utils.cache import bump_dashboard_version_on_commit
+from dashboard.utils.coercion import load_values
+from dashboard.utils.reconciliation import reconcile_dataset
+from vehicles.models import Vehicle, VehicleModel
+from vehicles.utils.availability import refresh_vehicle_availability
+
+logger = logging.getLogger("dashboard")
+
+IMPORT_CHUNK_SIZE = 1000
+# Clients need a unique email; imported ones get a placeholder built from their
+# uid until it is known. Documents are not used: different documents can slugify
+# to the same text, e.g. "A/1" and "A1".
+PLACEHOLDER_EMAIL = "{}@importado.invalid"
+MAX_IMPORT_ERRORS = 50
+# Bulk writes send no signals, so the caches of these models are invalidated here.
+IMPORTED_MODELS = (
+    "clients.client",
+    "vehicles.vehiclemodel",
+    "vehicles.vehicle",
+    "contracts.contract",
+)
+
+
+def _read_row(row):
+    """Maps a validated row, with typed values, onto the CRM fields."""
+    # Empty cells of the optional amount column keep their uploaded value.
+    amount = row.get(AMOUNT_COLUMN)
+    return {
+        "first_name": row["Nombres"],
+        "last_name": row["Apellidos"],
+        "document_number": row["Número de documento"],
+        "brand": row["Marca del auto"],
+        "model": row["Modelo del auto"],
+        "license_plate": row["Placa del auto"],
+        "start_date": row["Inicio de contrato"],
+        "weekly_payment": row["Cuota semanal"],
+        "amount": amount if amount not in (None, "") else None,
+    }
+
+
+def _upsert_clients(rows, summary):
+    documents = {row["document_number"]: row for row in rows}
+    existing = set(
+        Client.objects.filter(document_number__in=documents).values_list(
+            "document_number", flat=True
+        )
+    )
+    clients = []
+    for document, row in documents.items():
+        uid = uuid.uuid4()
+        clients.append(
+            Client(
+                uid=uid,
+                document_number=document,
+                first_name=row["first_name"],
+                last_name=row["last_name"],
+                email=PLACEHOLDER_EMAIL.format(uid.hex),
+            )
+        )
+    Client.objects.bulk_create(
+        clients,
+        update_conflicts=True,
+        unique_fields=["document_number"],
+        update_fields=["first_name", "last_name"],
+    )
+    summary["clients_created"] += len(documents) - len(existing)
+    summary["clients_updated"] += len(existing)
+    return dict(
+        Client.objects.filter(document_number__in=documents).values_list(
+            "document_number", "pk"
+        )
+    )
+
+
+def _get_vehicle_models(rows, summary):
+    pairs = {(row["brand"], row["model"]) for row in rows}
+    lookup = VehicleModel.objects.filter(
+        brand__in={brand for brand, _ in pairs}, model__in={model for _, model in pairs}
+    )
+    model_ids = {}
+    for pk, brand, model in lookup.values_list("pk", "brand", "model").order_by("pk"):
+        model_ids.setdefault((brand, model), pk)
+    missing = pairs - set(model_ids)
+    if missing:
+        VehicleModel.objects.bulk_create(
+            [VehicleModel(brand=brand, model=model) for brand, model in missing]
+        )
+        summary["models_created"] += len(missing)
+        for pk, brand, model in lookup.values_list("pk", "brand", "model").order_by("pk"):
+            model_ids.setdefault((brand, model), pk)
+    return model_ids
+
+
+def _upsert_vehicles(rows, model_ids, summary):
+    plates = {row["license_plate"]: row for row in rows}
+    existing = set(
+        Vehicle.objects.filter(license_plate__in=plates).values_list(
+            "license_plate", flat=True
+        )
+    )
+    Vehicle.objects.bulk_create(
+        [
+            Vehicle(
+                license_plate=plate,
+                vehicle_model_id=model_ids[(row["brand"], row["model"])],
+            )
+            for plate, row in plates.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["license_plate"],
+        update_fields=["vehicle_model"],
+    )
+    summary["vehicles_created"] += len(plates) - len(existing)
+    summary["vehicles_updated"] += len(existing)
+    return dict(
+        Vehicle.objects.filter(license_plate__in=plates).values_list("license_plate", "pk")
+    )
+
+
+def _upsert_contracts(rows, client_ids, vehicle_ids, summary):
+    """
+    Updates the active contract of each client with the same vehicle, and creates
+    one when neither the client nor the vehicle has an active contract. Rows that
+    would give a client or a vehicle a second active contract, or create one
+    without its total amount, are reported.
+    """
+    active = Contract.objects.filter(active=True).filter(
+        Q(client_id__in=client_ids.values()) | Q(vehicle_id__in=vehicle_ids.values())
+    )
+    by_client, by_vehicle = {}, {}
+    for contract in active.only(
+        "pk", "client_id", "vehicle_id", "start_date", "weekly_payment", "amount"
+    ):
+        by_client[contract.client_id] = contract
+        by_vehicle[contract.vehicle_id] = contract
+
+    to_create, to_update = {}, {}
+    for number, row in rows:
+        client_id = client_ids[row["document_number"]]
+        vehicle_id = vehicle_ids[row["license_plate"]]
+        contract = by_client.get(client_id)
+        if contract is None and client_id in to_create:
+            contract = to_create[client_id]
+        if contract is not None and contract.vehicle_id == vehicle_id:
+            contract.start_date = row["start_date"]
+            contract.weekly_payment = row["weekly_payment"]
+            if row["amount"] is not None:
+                contract.amount = row["amount"]
+            if contract.pk:
+                to_update[contract.pk] = contract
+            continue
+        if contract is not None:
+            _add_error(summary, number, "El cliente ya tiene un contrato activo con otro vehículo.")
+            continue
+        if vehicle_id in by_vehicle:
+            _add_error(summary, number, "El vehículo ya tiene un contrato activo con otro cliente.")
+            continue
+        if row["amount"] is None:
+            _add_error(summary, number, "Falta el monto total para crear el contrato.")
+            continue
+        contract = Contract(
+            client_id=client_id,
+            vehicle_id=vehicle_id,
+            start_date=row["start_date"],
+            weekly_payment=row["weekly_payment"],
+            amount=row["amount"],
+        )
+        to_create[client_id] = by_vehicle[vehicle_id] = contract
+
+    Contract.objects.bulk_create(to_create.values())
+    Contract.objects.bulk_update(
+        to_update.values(), ["start_date", "weekly_payment", "amount"]
+    )
+    summary["contracts_created"] += len(to_create)
+    summary["contracts_updated"] += len(to_update)
+    # Re-read so the ids do not depend on the backend returning them from bulk_create.
+    return list(
+        Contract.objects.filter(active=True, client_id__in=client_ids.values()).values_list(
+            "pk", flat=True
+        )
+    )
+
+
+def _add_error(summary, number, message):
+    summary["skipped"] += 1
+    if len(summary["errors"]) < MAX_IMPORT_ERRORS:
+        summary["errors"].append({"row": number, "message": message})
+
+
+def _import_chunk(dataset, chunk, summary):
+    columns = dataset.columns
+    rows = [
+        (position + 1, _read_row(dict(zip(columns, load_values(columns, values)))))
+        for position, values in chunk
+    ]
+    values = [row for _, row in rows]
+    client_ids = _upsert_clients(values, summary)
+    model_ids = _get_vehicle_models(values, summary)
+    vehicle_ids = _upsert_vehicles(values, model_ids, summary)
+    contract_ids = _upsert_contracts(rows, client_ids, vehicle_ids, summary)
+
+    refresh_contract_balances(contract_ids)
+    refresh_vehicle_availability(vehicle_ids.values())
+
+
+def import_into_crm(dataset, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Creates or updates the clients, vehicle models, vehicles and contracts of an
+    uploaded dataset.
+
+    Only the rows that passed validation on upload are imported; their values are
+    already typed (see dashboard.utils.coercion). New contracts take their total
+    from the optional "Monto total" column; rows without it only update existing
+    contracts and are otherwise reported. Rows are processed in chunks. Each chunk
+    resolves the existing clients by document number and vehicles by plate with
+    `IN` lookups, and upserts them with `bulk_create(update_conflicts=True)`, so the
+    number of queries depends on the number of chunks, not rows. The whole import
+    runs in one transaction. Balances, vehicle availability and dashboard caches
+    are refreshed explicitly, since bulk writes send no signals. The dataset is
+    reconciled again afterwards, so its rows show as existing.
+
+    Args:
+        dataset (UploadedDataset): A completed dataset.
+        chunk_size (int): Number of rows per chunk.
+
+    Returns:
+        dict: Counts of created and updated rows per model, the rows left out for
+        invalid values, the valid rows skipped because of an active contract, and the
+        first of those, as {"row", "message"} dicts.
+    """
+    summary = {
+        "clients_created": 0,
+        "clients_updated": 0,
+        "models_created": 0,
+        "vehicles_created": 0,
+        "vehicles_updated": 0,
+        "contracts_created": 0,
+        "contracts_updated": 0,
+        "invalid": dataset.error_count,
+        "skipped": 0,
+        "errors": [],
+    }
+    rows = (
+        dataset.rows.filter(valid=True)
+        .order_by("position")
+        .values_list("position", "values")
+    )
+    with transaction.atomic():
+        chunk = []
+        for row in rows.iterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                _import_chunk(dataset, chunk, summary)
+                chunk = []
+        if chunk:
+            _import_chunk(dataset, chunk, summary)
+        for label in IMPORTED_MODELS:
+            bump_dashboard_version_on_commit(label)
+
+    reconcile_dataset(dataset)
+    logger.info(f"Dataset {dataset.pk} imported into the CRM: {summary}")
+    return summary
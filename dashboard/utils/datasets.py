@@ -0,0 +1,241 @@
+import logging
+import time
+
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.utils import timezone
+
+from core.metrics import JOB_BUCKETS, observe
+from dashboard.models import DatasetRow, UploadedDataset
+from dashboard.utils.coercion import coerce_columns, load_values
+from dashboard.utils.file_processor import (
+    UPLOAD_BATCH_SIZE,
+    UploadError,
+    iter_batches,
+    iter_uploaded_file,
+)
+from dashboard.utils.reconciliation import reconcile_dataset
+from dashboard.utils.search_utils import build_search_text
+
+logger = logging.getLogger("dashboard")
+
+DATASET_SESSION_KEY = "dataset_id"
+DATASET_READ_CHUNK = 2000
+
+
+def append_rows(dataset, batch):
+    """
+    Validates a batch of parsed rows and stores it after the rows already imported.
+    Values are coerced to their column type (see dashboard.utils.coercion). The
+    columns of the dataset are taken from the first row stored.
+
+    Args:
+        dataset (UploadedDataset): The dataset being filled.
+        batch (list): Rows as dictionaries mapping column headers to values.
+
+    Returns:
+        list: One [row, column index, message] entry per invalid cell.
+    """
+    if not dataset.columns:
+        # csv.DictReader puts the values without a header under the None key.
+        dataset.columns = [column for column in batch[0] if column is not None]
+    columns = dataset.columns
+    rows, errors = coerce_columns(
+        columns,
+        [[row.get(column) for column in columns] for row in batch],
+        first_row=dataset.row_count + 1,
+    )
+    invalid = {error[0] for error in errors}
+    DatasetRow.objects.bulk_create(
+        [
+            DatasetRow(
+                dataset=dataset,
+                position=dataset.row_count + offset,
+                values=values,
+                valid=dataset.row_count + offset + 1 not in invalid,
+                search_text=build_search_text(dict(zip(columns, values))),
+            )
+            for offset, values in enumerate(rows)
+        ]
+    )
+    return errors
+
+
+def create_dataset(owner, uploaded_file):
+    """
+    Stores an uploaded file as the owner's dataset, pending import. The previous
+    datasets of the owner are deleted.
+
+    Args:
+        owner (User): The user who uploaded the file.
+        uploaded_file (UploadedFile): The file, already validated.
+
+    Returns:
+        UploadedDataset: The new dataset.
+    """
+    for previous in UploadedDataset.objects.filter(owner=owner):
+        previous.source.delete(save=False)
+        previous.delete()
+    return UploadedDataset.objects.create(
+        owner=owner,
+        filename=uploaded_file.name,
+        source=uploaded_file,
+        file_size=uploaded_file.size,
+    )
+
+
+def import_dataset(dataset_id, batch_size=UPLOAD_BATCH_SIZE):
+    """
+    Parses the source file of a dataset and stores its rows batch by batch. Each
+    batch is committed with the progress counters, so the first rows can be
+    browsed while the rest of the file is read. If the file turns out to be
+    invalid, the rows already stored are deleted. The source file is deleted at
+    the end. Completed datasets are reconciled with the CRM (see
+    dashboard.utils.reconciliation).
+
+    Args:
+        dataset_id (int): The primary key of the UploadedDataset.
+        batch_size (int): Number of rows stored per batch.
+
+    Returns:
+        UploadedDataset: The dataset, completed or failed.
+    """
+    dataset = UploadedDataset.objects.get(pk=dataset_id)
+    if not dataset.in_progress:
+        return dataset
+    # A job interrupted halfway is retried from the start.
+    dataset.rows.all().delete()
+    dataset.start()
+
+    started = time.monotonic()
+    try:
+        with dataset.source.open("rb") as source:
+            rows, error = iter_uploaded_file(source)
+            if error:
+                raise UploadError(error)
+            for batch in iter_batches(rows, batch_size):
+                with transaction.atomic():
+                    errors = append_rows(dataset, batch)
+                    dataset.record_batch(
+                        len(batch), min(source.tell(), dataset.file_size), errors
+                    )
+                logger.info(f"Imported {dataset.row_count} rows of {dataset.filename}")
+        dataset.finish()
+    except Exception as e:
+        if not isinstance(e, UploadError):
+            logger.exception(f"Unexpected error importing dataset {dataset.pk}")
+            e = f"Ocurrió un error inesperado al procesar el archivo: {e}"
+        dataset.rows.all().delete()
+        dataset.fail(e)
+    finally:
+        dataset.source.delete(save=False)
+        dataset.save(update_fields=["source"])
+        observe(
+            "crm_job_duration_seconds",
+            time.monotonic() - started,
+            buckets=JOB_BUCKETS,
+            job="import_dataset",
+            status=dataset.status,
+        )
+    if dataset.status == "completed":
+        try:
+            reconcile_dataset(dataset)
+        except Exception:
+            # The rows are stored; a failed comparison must not fail the import.
+            logger.exception(f"Could not reconcile dataset {dataset.pk}")
+    return dataset
+
+
+def get_progress(dataset):
+    """
+    Returns the progress of a dataset import, as served to the progress page.
+
+    Args:
+        dataset (UploadedDataset): The dataset being imported.
+
+    Returns:
+        dict: The status, the rows and errors counted so far, the percentage of
+        the file read and the estimated seconds left (None until it can be
+        estimated), and the error that stopped the import, if any.
+    """
+    fraction = dataset.bytes_read / dataset.file_size if dataset.file_size else 0
+    if dataset.status == "completed":
+        fraction = 1
+    eta = None
+    if dataset.status == "processing" and dataset.started_at and 0 < fraction < 1:
+        elapsed = (timezone.now() - dataset.started_at).total_seconds()
+        eta = round(elapsed * (1 - fraction) / fraction)
+    return {
+        "status": dataset.status,
+        "rows": dataset.row_count,
+        "errors": dataset.error_count,
+        "percent": round(fraction * 100),
+        "eta_seconds": eta,
+        "error": dataset.error,
+    }
+
+
+def get_session_dataset(request):
+    """
+    Returns the dataset referenced by the session, if it still belongs to the user.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        UploadedDataset or None: The dataset, or None if there is none.
+    """
+    dataset_id = request.session.get(DATASET_SESSION_KEY)
+    if dataset_id is None:
+        return None
+    return UploadedDataset.objects.filter(pk=dataset_id, owner=request.user).first()
+
+
+def paginate_dataset(dataset, page_number, q=None, per_page=20):
+    """
+    Returns a page of a dataset. Only the values of the rows in the page are read.
+
+    Args:
+        dataset (UploadedDataset): The dataset to paginate.
+        page_number (str or int): The requested page.
+        q (str, optional): A search term matched against SEARCH_COLUMNS.
+        per_page (int): The number of rows per page.
+
+    Returns:
+        tuple: The page, whose rows are dictionaries mapping column headers to
+        values, and the elided page range.
+    """
+    rows = dataset.rows.order_by("position")
+    if q:
+        rows = rows.filter(search_text__contains=q.lower())
+    paginator = Paginator(rows.values_list("values", flat=True), per_page)
+    if not q:
+        # The count is known; it saves a COUNT query per page.
+        paginator.count = dataset.row_count
+    page_obj = paginator.get_page(page_number)
+    page_obj.object_list = [
+        dict(zip(dataset.columns, values)) for values in page_obj.object_list
+    ]
+    page_range = paginator.get_elided_page_range(
+        page_obj.number, on_each_side=2, on_ends=1
+    )
+    return page_obj, page_range
+
+
+def iter_dataset_rows(dataset, typed=False):
+    """
+    Yields every row of a dataset as a dictionary, reading them in chunks.
+
+    Args:
+        dataset (UploadedDataset): The dataset to read.
+        typed (bool): Whether the dates and decimals of valid rows are returned as
+            such instead of their stored strings.
+
+    Yields:
+        dict: The next row, mapping column headers to values.
+    """
+    rows = dataset.rows.order_by("position").values_list("values", "valid")
+    for values, valid in rows.iterator(chunk_size=DATASET_READ_CHUNK):
+        if typed and valid:
+            values = load_values(dataset.columns, values)
+        yield dict(zip(dataset.columns, values))
@@ -1,65 +1,214 @@
-import openpyxl
+import codecs
 import csv
-import io
+import logging
+from itertools import islice
+
+import openpyxl
 
 from dashboard.constants import REQUIRED_COLUMNS
 
+logger = logging.getLogger("dashboard")
+
+CSV_CHUNK_SIZE = 64 * 1024
+UPLOAD_BATCH_SIZE = 1000
+# Tried in order on the first block. utf-8-sig also drops the BOM written by Excel;
+# latin-1 accepts any byte, so it is the last resort.
+CSV_ENCODINGS = ("utf-8-sig", "cp1252", "latin-1")
+CSV_DELIMITERS = ",;\t|"
+
+
+class UploadError(ValueError):
+    """An uploaded file that cannot be read. The message is shown to the user."""
+
+
+def iter_batches(rows, batch_size=UPLOAD_BATCH_SIZE):
+    """
+    Groups a stream of rows into lists, so uploads are processed a batch at a time.
+
+    Args:
+        rows (iterator): Rows returned by `iter_csv_file` or `iter_excel_file`.
+        batch_size (int): Maximum number of rows per batch.
+
+    Yields:
+        list: The next batch of rows.
+
+    Raises:
+        UploadError: If the file turns out to be invalid while it is being read.
+    """
+    try:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            yield batch
+    except UnicodeDecodeError:
+        raise UploadError("El archivo CSV contiene caracteres con una codificación no válida.")
+    except csv.Error as e:
+        raise UploadError(f"El archivo CSV no es válido: {e}")
+
+
+def _iter_excel_rows(workbook, rows, headers):
+    try:
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            # Read-only sheets omit the trailing empty cells of a row.
+            values = list(row) + [None] * (len(headers) - len(row))
+            yield dict(zip(headers, values))
+    finally:
+        workbook.close()
+
+
+def _excel_headers_error(headers):
+    if not headers:
+        return "El archivo Excel no contiene encabezados."
+    missing = REQUIRED_COLUMNS - set(headers)
+    if missing:
+        return f"Faltan las siguientes columnas requeridas: {', '.join(missing)}"
+    return None
+
 
-def process_excel_file(uploaded_file):
+def iter_excel_file(uploaded_file):
     """
-    Processes an uploaded Excel file and validates its structure.
+    Opens an uploaded Excel file as a stream of rows.
 
-    This function checks if the uploaded Excel file contains the required columns
-    and extracts its data into a list of dictionaries. If any required columns
-    are missing, it returns an error message.
+    The workbook is loaded in read-only mode, which parses the sheet XML as it is
+    iterated instead of building a cell object per value, so memory does not grow
+    with the size of the file. The headers are validated before any row is read.
+    The workbook is closed once the rows are exhausted; to validate the headers
+    only, use `check_uploaded_file`, which closes it right away.
 
     Args:
         uploaded_file (File): The uploaded Excel file to be processed.
 
     Returns:
         tuple: A tuple containing:
-            - data (list): A list of dictionaries representing the rows in the file.
-              Each dictionary maps column headers to their respective values.
+            - rows (iterator or None): The non-empty rows of the active sheet as
+              dictionaries mapping column headers to their values.
             - error (str or None): An error message if validation fails, or None if successful.
     """
+    workbook = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
+    rows = workbook.active.iter_rows(values_only=True)
+    headers = list(next(rows, None) or [])
+    error = _excel_headers_error(headers)
+    if error:
+        workbook.close()
+        return None, error
+    return _iter_excel_rows(workbook, rows, headers), None
 
-    wb = openpyxl.load_workbook(uploaded_file, data_only=True)
-    sheet = wb.active
-    headers = [cell.value for cell in next(sheet.iter_rows(min_row=1, max_row=1))]
 
-    missing = REQUIRED_COLUMNS - set(headers)
-    if missing:
-        return None, f"Faltan las siguientes columnas requeridas: {', '.join(missing)}"
+def iter_uploaded_file(uploaded_file):
+    """
+    Opens an uploaded .csv or .xlsx file as a stream of rows.
 
-    data = []
-    for row in sheet.iter_rows(min_row=2, values_only=True):
-        data.append(dict(zip(headers, row)))
+    Args:
+        uploaded_file (File): The uploaded file.
 
-    return data, None
+    Returns:
+        tuple: The rows iterator and the validation error, as returned by
+        `iter_csv_file` or `iter_excel_file`.
+    """
+    if uploaded_file.name.endswith(".xlsx"):
+        return iter_excel_file(uploaded_file)
+    return iter_csv_file(uploaded_file)
 
 
-def process_csv_file(uploaded_file):
+def check_uploaded_file(uploaded_file):
     """
-    Processes an uploaded CSV file and validates its structure.
+    Validates the headers of an uploaded .csv or .xlsx file without reading its rows.
+    Excel workbooks are closed before returning.
 
-    This function checks if the uploaded CSV file contains the required columns
-    and extracts its data into a list of dictionaries. If any required columns
-    are missing, it returns an error message.
+    Args:
+        uploaded_file (File): The uploaded file.
+
+    Returns:
+        str or None: An error message if validation fails, or None if successful.
+    """
+    if uploaded_file.name.endswith(".xlsx"):
+        workbook = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            return _excel_headers_error(list(next(rows, None) or []))
+        finally:
+            workbook.close()
+    _, error = iter_csv_file(uploaded_file)
+    return error
+
+
+def _sniff_encoding(block):
+    """Returns the first encoding of CSV_ENCODINGS that decodes the block."""
+    for encoding in CSV_ENCODINGS:
+        try:
+            # final=False tolerates a multi-byte character cut at the end of the block.
+            codecs.getincrementaldecoder(encoding)().decode(block, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return CSV_ENCODINGS[-1]
+
+
+def _sniff_delimiter(text):
+    """
+    Detects the delimiter from the complete lines of the first block. When the
+    sniffer cannot decide, the candidate that appears most in the header wins.
+    """
+    sample = text[: text.rfind("\n") + 1] or text
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        header = sample.split("\n", 1)[0]
+        return max(CSV_DELIMITERS, key=header.count) if header else ","
+
+
+def _iter_lines(text, chunks, decoder):
+    """
+    Yields the decoded lines of the file, with their line endings so quoted values
+    spanning several lines are kept. Only the current chunk and the incomplete
+    last line are held in memory.
+    """
+    pending = text
+    while True:
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line + "\n"
+        chunk = next(chunks, None)
+        if chunk is None:
+            break
+        pending += decoder.decode(chunk)
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def iter_csv_file(uploaded_file, chunk_size=CSV_CHUNK_SIZE):
+    """
+    Opens an uploaded CSV file as a stream of rows.
+
+    The file is read chunk by chunk and decoded incrementally. The encoding and the
+    delimiter are detected from the first chunk, and the headers are validated
+    before any other chunk is read, so invalid files are rejected right away.
 
     Args:
         uploaded_file (File): The uploaded CSV file to be processed.
+        chunk_size (int): Number of bytes read at a time.
 
     Returns:
         tuple: A tuple containing:
-            - data (list): A list of dictionaries representing the rows in the file.
-              Each dictionary maps column headers to their respective values.
+            - rows (iterator or None): The rows of the file as dictionaries mapping
+              column headers to their values. Decoding or parsing errors in later
+              chunks are raised while iterating (UnicodeDecodeError, csv.Error).
             - error (str or None): An error message if validation fails, or None if successful.
     """
-
-    decoded_file = uploaded_file.read().decode("utf-8")
-    io_string = io.StringIO(decoded_file)
-    reader = csv.DictReader(io_string)
-
+    chunks = iter(uploaded_file.chunks(chunk_size))
+    first = next(chunks, b"")
+    encoding = _sniff_encoding(first)
+    decoder = codecs.getincrementaldecoder(encoding)()
+    text = decoder.decode(first)
+    delimiter = _sniff_delimiter(text)
+    logger.info(f"Reading CSV {uploaded_file.name} as {encoding}, delimiter {delimiter!r}")
+
+    reader = csv.DictReader(_iter_lines(text, chunks, decoder), delimiter=delimiter)
     headers = reader.fieldnames
     if not headers:
         return None, "El archivo CSV no contiene encabezados."
@@ -68,5 +217,4 @@ def process_csv_file(uploaded_file):
     if missing:
         return None, f"Faltan las siguientes columnas requeridas: {', '.join(missing)}"
 
-    data = [row for row in reader]
-    return data, None
+    return reader, None
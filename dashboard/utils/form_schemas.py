@@ -0,0 +1,190 @@
+import copy
+import hashlib
+import logging
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.urls import NoReverseMatch, reverse
+
+from dashboard.utils.autocomplete import AUTOCOMPLETE_FIELDS, get_autocomplete_threshold
+from dashboard.utils.cache import get_version
+from dashboard.utils.pagination import estimate_count
+from vehicles.models import Vehicle, VehicleModel
+
+logger = logging.getLogger("dashboard")
+
+FORM_SCHEMA_VERSION = "form_schemas"
+FORM_SCHEMA_KEY = "dashboard:form_schemas:{permissions}:{version}"
+
+
+def _compile_field(field):
+    """
+    Describes a model field as an input of the create form. Foreign keys keep the
+    label of the related model; their choices are resolved per request.
+    """
+    schema = {
+        "name": field.name,
+        "label": field.verbose_name.capitalize(),
+        "required": not field.blank,
+    }
+    if field.choices:
+        schema["type"] = "select"
+        schema["choices"] = [
+            {"value": choice[0], "label": choice[1]} for choice in field.choices
+        ]
+    elif field.is_relation and getattr(field, "remote_field", None) and field.remote_field.model:
+        schema["type"] = "select"
+        schema["related_model"] = field.remote_field.model._meta.label_lower
+    elif field.get_internal_type() in ["BooleanField", "NullBooleanField"]:
+        schema["type"] = "checkbox"
+    else:
+        schema["type"] = "text"
+        fname = field.name.lower()
+        if "email" in fname:
+            schema["type"] = "email"
+        elif "phone" in fname or "telefono" in fname:
+            schema["type"] = "tel"
+            schema["pattern"] = "[0-9]*"
+        elif "date" in fname:
+            schema["type"] = "date"
+    return schema
+
+
+def _add_permission_models(permissions):
+    """
+    Returns the models that `permissions` allow to add and that have a create view
+    (a `manage_<model>` URL), in content type order. Superusers hold every
+    permission, so models without a form in the dashboard are left out.
+    """
+    models = []
+    for permission in permissions:
+        app_label, _, codename = permission.partition(".")
+        if not codename.startswith("add_"):
+            continue
+        try:
+            model = apps.get_model(app_label, codename[len("add_"):])
+            reverse(f"manage_{model._meta.model_name}")
+        except (LookupError, NoReverseMatch):
+            continue
+        models.append(model)
+    return sorted(models, key=lambda model: ContentType.objects.get_for_model(model).pk)
+
+
+def compile_form_schemas(permissions):
+    """
+    Builds the create form schema of every model the permissions allow to add.
+
+    Args:
+        permissions (iterable): Permission names as returned by
+            `User.get_all_permissions()`, e.g. "vehicles.add_vehicle".
+
+    Returns:
+        list: One dict per model with its create action and field definitions.
+    """
+    create_instances = []
+    for model in _add_permission_models(permissions):
+        model_name = model.__name__.lower()
+        fields = [
+            _compile_field(field)
+            for field in model._meta.fields
+            if not field.auto_created and field.editable
+        ]
+        if fields:
+            create_instances.append(
+                {
+                    "model": model.__name__,
+                    "action": f"{model._meta.app_label}:create_{model_name}",
+                    "nombre_modelo": model._meta.verbose_name.capitalize(),
+                    "fields": fields,
+                }
+            )
+    return create_instances
+
+
+def get_form_schemas(user):
+    """
+    Returns the compiled create form schemas of a user from the cache, compiling
+    them on a miss. Schemas are keyed by the user's effective add permissions
+    (their groups, their own permissions and superuser status), so users with the
+    same permissions share them. The cache is also invalidated when groups or
+    field permissions change.
+
+    Args:
+        user (User): The user whose permissions are used.
+
+    Returns:
+        list: The compiled schemas, without the choices of foreign keys.
+    """
+    permissions = sorted(
+        permission
+        for permission in user.get_all_permissions()
+        if permission.partition(".")[2].startswith("add_")
+    )
+    digest = hashlib.md5("\n".join(permissions).encode("utf-8")).hexdigest()
+    try:
+        key = FORM_SCHEMA_KEY.format(
+            permissions=digest, version=get_version(FORM_SCHEMA_VERSION)
+        )
+        schemas = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Form schema cache unavailable, compiling schemas: {e}")
+        return compile_form_schemas(permissions)
+
+    if schemas is None:
+        schemas = compile_form_schemas(permissions)
+        try:
+            cache.set(key, schemas, timeout=None)
+        except Exception as e:
+            logger.warning(f"Could not store form schemas for user {user.pk}: {e}")
+    return schemas
+
+
+def _exceeds(queryset, threshold):
+    count, is_exact = estimate_count(queryset, limit=threshold)
+    return count > threshold or (not is_exact and count >= threshold)
+
+
+def resolve_form_schemas(schemas):
+    """
+    Fills the choices of the foreign key fields of compiled schemas. Each related
+    model is queried once per call. Related tables with more rows than the
+    autocomplete threshold get an `autocomplete_url` instead of inline choices.
+
+    Args:
+        schemas (list): Schemas returned by `get_form_schemas`.
+
+    Returns:
+        list: A copy of the schemas ready for the template.
+    """
+    preloaded_querysets = {
+        "vehicles.vehicle": Vehicle.objects.all().select_related("vehicle_model"),
+        "vehicles.vehiclemodel": VehicleModel.objects.all(),
+    }
+    threshold = get_autocomplete_threshold()
+    related_choices = {}
+    autocomplete_urls = {}
+    resolved = copy.deepcopy(schemas)
+    for schema in resolved:
+        for field in schema["fields"]:
+            related_model = field.pop("related_model", None)
+            if related_model is None:
+                continue
+            if related_model not in related_choices:
+                queryset = preloaded_querysets.get(related_model)
+                if queryset is None:
+                    queryset = apps.get_model(related_model).objects.all()
+                if related_model in AUTOCOMPLETE_FIELDS and _exceeds(queryset, threshold):
+                    related_choices[related_model] = []
+                    autocomplete_urls[related_model] = reverse(
+                        "autocomplete", args=[related_model]
+                    )
+                else:
+                    related_choices[related_model] = [
+                        {"value": obj.pk, "label": str(obj)} for obj in queryset
+                    ]
+            if related_model in autocomplete_urls:
+                field["autocomplete_url"] = autocomplete_urls[related_model]
+            elif related_choices[related_model]:
+                field["choices"] = related_choices[related_model]
+    return resolved
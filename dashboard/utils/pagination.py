@@ -0,0 +1,223 @@
+import base64
+import binascii
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+
+ESTIMATED_COUNT_LIMIT = 10000
+
+
+def encode_cursor(direction, value, pk):
+    """
+    Encodes a pagination cursor.
+
+    Args:
+        direction (str): "next" to read the rows after the position, "prev" for the rows before it.
+        value: The sort key value of the row at the position (None when sorting by primary key).
+        pk: The primary key of the row at the position.
+
+    Returns:
+        str: A URL-safe cursor.
+    """
+    payload = json.dumps([direction, value, pk], cls=DjangoJSONEncoder)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a pagination cursor built by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor received in the request.
+
+    Returns:
+        tuple: (direction, value, pk), or None if the cursor is missing or not valid.
+    """
+    if not cursor:
+        return None
+    try:
+        direction, value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError, binascii.Error):
+        return None
+    if direction not in ("next", "prev"):
+        return None
+    return direction, value, pk
+
+
+def estimate_count(queryset, limit=ESTIMATED_COUNT_LIMIT):
+    """
+    Returns an estimated number of rows for a queryset, avoiding a full COUNT(*).
+
+    On PostgreSQL an unfiltered queryset reads the planner statistics of its table.
+    Otherwise the count stops at `limit` rows.
+
+    Args:
+        queryset (QuerySet): The queryset to count.
+        limit (int): Maximum number of rows counted.
+
+    Returns:
+        tuple: (count, is_exact). `is_exact` is False when the count is an estimate or hit the limit.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql" and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] > 0:
+            return row[0], False
+
+    count = queryset.order_by().values("pk")[: limit + 1].count()
+    if count > limit:
+        return limit, False
+    return count, True
+
+
+class KeysetPage:
+    """
+    A page of results produced by `KeysetPaginator`.
+
+    Attributes:
+        object_list (list): The objects of the page.
+        next_cursor (str or None): Cursor of the following page, if any.
+        previous_cursor (str or None): Cursor of the preceding page, if any.
+        paginator (KeysetPaginator): The paginator that built the page.
+    """
+
+    def __init__(self, object_list, next_cursor, previous_cursor, paginator):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.paginator = paginator
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Cursor (keyset) paginator over a queryset.
+
+    Rows are ordered by a stable (sort_key, pk) pair and each page is read with a
+    `WHERE (sort_key, pk) > cursor LIMIT per_page + 1` query, so deep pages cost the
+    same as the first one and no COUNT(*) is needed.
+
+    Attributes:
+        queryset (QuerySet): The rows to paginate.
+        per_page (int): Number of rows per page.
+        sort_key (str): The field or annotation to sort by, prefixed with "-" for descending order.
+            It must be a scalar, non-null column: its value is stored in the cursor and
+            compared with `__gt`/`__lt`.
+    """
+
+    def __init__(self, queryset, per_page, sort_key="pk"):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.sort_key = sort_key
+        self.descending = sort_key.startswith("-")
+        self.sort_field = sort_key.lstrip("-")
+
+    @property
+    def estimated_count(self):
+        """The estimated total of rows, see `estimate_count`."""
+        if not hasattr(self, "_estimated_count"):
+            self._estimated_count = estimate_count(self.queryset)
+        return self._estimated_count
+
+    def _ordering(self, reverse=False):
+        descending = self.descending != reverse
+        prefix = "-" if descending else ""
+        if self.sort_field == "pk":
+            return [f"{prefix}pk"]
+        return [f"{prefix}{self.sort_field}", f"{prefix}pk"]
+
+    def _after(self, value, pk, reverse=False):
+        lookup = "lt" if self.descending != reverse else "gt"
+        if self.sort_field == "pk":
+            return Q(**{f"pk__{lookup}": pk})
+        return Q(**{f"{self.sort_field}__{lookup}": value}) | Q(
+            **{self.sort_field: value, f"pk__{lookup}": pk}
+        )
+
+    def _position(self, obj):
+        value = None if self.sort_field == "pk" else getattr(obj, self.sort_field)
+        return value, obj.pk
+
+    def get_page(self, cursor=None):
+        """
+        Returns the page that starts (or ends, for "prev" cursors) at the cursor.
+
+        Args:
+            cursor (str, optional): A cursor from a previous page. Invalid or missing
+                cursors return the first page.
+
+        Returns:
+            KeysetPage: The requested page.
+        """
+        position = decode_cursor(cursor)
+        backwards = position is not None and position[0] == "prev"
+
+        queryset = self.queryset.order_by(*self._ordering(reverse=backwards))
+        if position is not None:
+            _, value, pk = position
+            queryset = queryset.filter(self._after(value, pk, reverse=backwards))
+
+        object_list = list(queryset[: self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[: self.per_page]
+        if backwards:
+            object_list.reverse()
+
+        if not object_list:
+            return KeysetPage([], None, None, self)
+
+        if backwards:
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        next_cursor = (
+            encode_cursor("next", *self._position(object_list[-1])) if has_next else None
+        )
+        previous_cursor = (
+            encode_cursor("prev", *self._position(object_list[0])) if has_previous else None
+        )
+        return KeysetPage(object_list, next_cursor, previous_cursor, self)
+
+
+class KeysetPaginationMixin:
+    """
+    ListView mixin that paginates with `KeysetPaginator` when the request carries a
+    `cursor` parameter or `keyset_pagination` is enabled, and with the regular
+    offset paginator otherwise.
+    """
+
+    keyset_pagination = False
+
+    def get_keyset_sort_key(self):
+        ordering = self.get_ordering() or ["pk"]
+        return ordering[0] if isinstance(ordering, (list, tuple)) else ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        cursor = self.request.GET.get("cursor")
+        if not (self.keyset_pagination or cursor is not None):
+            return super().paginate_queryset(queryset, page_size)
+        paginator = KeysetPaginator(queryset, page_size, self.get_keyset_sort_key())
+        page = paginator.get_page(cursor)
+        return paginator, page, page.object_list, page.has_other_pages()
@@ -0,0 +1,181 @@
+import logging
+
+from django.utils import timezone
+
+from clients.models import Client
+from contracts.models import Contract
+from dashboard.models import UploadedDataset
+from vehicles.models import Vehicle
+
+logger = logging.getLogger("dashboard")
+
+RECONCILE_CHUNK_SIZE = 1000
+MAX_CONFLICTS = 50
+# One character per row in `reconciliation["statuses"]`, in file order.
+STATUS_CODES = {"new": "n", "existing": "e", "conflict": "c", "invalid": "-"}
+
+
+def _chunks(values, size):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def _resolve(queryset, field, keys, chunk_size):
+    """Maps each key found in `field` to its primary key, one `IN` query per chunk."""
+    found = {}
+    for chunk in _chunks(keys, chunk_size):
+        found.update(queryset.filter(**{f"{field}__in": chunk}).values_list(field, "pk"))
+    return found
+
+
+def _active_contracts(field, ids, chunk_size):
+    """Maps client or vehicle ids to the other side of their active contract."""
+    other = "vehicle_id" if field == "client_id" else "client_id"
+    found = {}
+    for chunk in _chunks(ids, chunk_size):
+        contracts = Contract.objects.filter(active=True, **{f"{field}__in": chunk})
+        found.update(contracts.values_list(field, other))
+    return found
+
+
+def _read_keys(dataset):
+    """Returns the (document, plate) of each row in file order, None for invalid rows."""
+    document = dataset.columns.index("Número de documento")
+    plate = dataset.columns.index("Placa del auto")
+    rows = dataset.rows.order_by("position").values_list("values", "valid")
+    return [
+        (values[document], values[plate]) if valid else None
+        for values, valid in rows.iterator(chunk_size=RECONCILE_CHUNK_SIZE)
+    ]
+
+
+def _file_conflicts(keys):
+    """
+    Finds the rows whose document or plate already appeared earlier in the file
+    paired with a different plate or document. The import keeps the first pairing
+    and would skip these rows, whatever the CRM holds.
+
+    Returns:
+        dict: The conflict message of each conflicting row, keyed by row number.
+    """
+    plate_of, document_of = {}, {}
+    conflicts = {}
+    for number, key in enumerate(keys, start=1):
+        if key is None:
+            continue
+        document, plate = key
+        first_plate = plate_of.setdefault(document, (plate, number))
+        first_document = document_of.setdefault(plate, (document, number))
+        if first_plate[0] != plate:
+            conflicts[number] = (
+                f"El documento ya aparece en la fila {first_plate[1]} con otro vehículo."
+            )
+        elif first_document[0] != document:
+            conflicts[number] = (
+                f"La placa ya aparece en la fila {first_document[1]} con otro documento."
+            )
+    return conflicts
+
+
+def _classify(client_id, vehicle_id, by_client, by_vehicle):
+    client_vehicle = by_client.get(client_id)
+    vehicle_client = by_vehicle.get(vehicle_id)
+    if client_vehicle is not None and client_vehicle != vehicle_id:
+        return "conflict", "El cliente ya tiene un contrato activo con otro vehículo."
+    if vehicle_client is not None and vehicle_client != client_id:
+        return "conflict", "El vehículo ya tiene un contrato activo con otro cliente."
+    if client_id is not None or vehicle_id is not None:
+        return "existing", None
+    return "new", None
+
+
+def reconcile_dataset(dataset, chunk_size=RECONCILE_CHUNK_SIZE):
+    """
+    Compares the valid rows of a dataset with the CRM before they are imported.
+
+    Document numbers and plates are collected from every row and resolved against
+    `Client.document_number` and `Vehicle.license_plate` with `IN` lookups, one per
+    chunk of distinct keys; the active contracts of the clients and vehicles found
+    are read the same way. The number of queries grows with the chunks of distinct
+    keys, not with the rows. Each row is then classified as:
+
+    - new: neither the client nor the vehicle exists.
+    - existing: the client or the vehicle exists, and importing the row would
+      create or update their contract.
+    - conflict: the client or the vehicle has an active contract with someone
+      else, or an earlier row of the file pairs the same document or plate with
+      another plate or document (checked before any query), so the import would
+      skip the row.
+
+    The result is stored in `dataset.reconciliation` with a single update.
+
+    Args:
+        dataset (UploadedDataset): A completed dataset.
+        chunk_size (int): Number of keys per lookup.
+
+    Returns:
+        dict: The statuses as one STATUS_CODES character per row, the count of
+        rows per status, the first conflicts as {"row", "message"} dicts, and
+        when it was checked.
+    """
+    keys = _read_keys(dataset)
+    file_conflicts = _file_conflicts(keys)
+    valid = [key for key in keys if key is not None]
+    client_ids = _resolve(
+        Client.objects.all(), "document_number", {document for document, _ in valid}, chunk_size
+    )
+    vehicle_ids = _resolve(
+        Vehicle.objects.all(), "license_plate", {plate for _, plate in valid}, chunk_size
+    )
+    by_client = _active_contracts("client_id", client_ids.values(), chunk_size)
+    by_vehicle = _active_contracts("vehicle_id", vehicle_ids.values(), chunk_size)
+
+    statuses = []
+    counts = dict.fromkeys(STATUS_CODES, 0)
+    conflicts = []
+    for number, key in enumerate(keys, start=1):
+        if key is None:
+            status = "invalid"
+        else:
+            document, plate = key
+            if number in file_conflicts:
+                status, message = "conflict", file_conflicts[number]
+            else:
+                status, message = _classify(
+                    client_ids.get(document), vehicle_ids.get(plate), by_client, by_vehicle
+                )
+            if message and len(conflicts) < MAX_CONFLICTS:
+                conflicts.append({"row": number, "message": message})
+        statuses.append(STATUS_CODES[status])
+        counts[status] += 1
+
+    dataset.reconciliation = {
+        "statuses": "".join(statuses),
+        "counts": counts,
+        "conflicts": conflicts,
+        "checked_at": timezone.now().isoformat(),
+    }
+    UploadedDataset.objects.filter(pk=dataset.pk).update(
+        reconciliation=dataset.reconciliation
+    )
+    logger.info(f"Dataset {dataset.pk} reconciled with the CRM: {counts}")
+    return dataset.reconciliation
+
+
+def get_row_status(dataset, position):
+    """
+    Returns the reconciliation status of a row.
+
+    Args:
+        dataset (UploadedDataset): A reconciled dataset.
+        position (int): The zero-based position of the row.
+
+    Returns:
+        str or None: A STATUS_CODES key, or None if the dataset was not reconciled.
+    """
+    statuses = dataset.reconciliation.get("statuses", "")
+    if position >= len(statuses):
+        return None
+    codes = {code: status for status, code in STATUS_CODES.items()}
+    return codes[statuses[position]]
@@ -1,10 +1,8 @@
-def filter_data(data, q):
-    q_lower = q.lower()
-    return [
-        item
-        for item in data
-        if q_lower in str(item.get("Nombres", "")).lower()
-        or q_lower in str(item.get("Apellidos", "")).lower()
-        or q_lower in str(item.get("Número de documento", "")).lower()
-        or q_lower in str(item.get("Placa del auto", "")).lower()
-    ]
+# Columns matched by the dashboard search.
+SEARCH_COLUMNS = ("Nombres", "Apellidos", "Número de documento", "Placa del auto")
+
+
+def build_search_text(item):
+    """Returns the lowercased searchable columns of a row, as stored in DatasetRow.search_text."""
+    return "\n".join(str(item.get(column, "")).lower() for column in SEARCH_COLUMNS)
+
@@ -1,2 +1,4 @@
 from .dasboard_views import *
-from .role_dashboard_views import *
\ No newline at end of file
+from .role_dashboard_views import *
+from .autocomplete_views import *
+from .dataset_views import *
@@ -0,0 +1,35 @@
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views import View
+import logging
+
+from dashboard.utils.autocomplete import AUTOCOMPLETE_FIELDS, cached_search, can_search
+
+logger = logging.getLogger("dashboard")
+
+
+class AutocompleteView(LoginRequiredMixin, View):
+    """
+    JSON endpoint used by the create forms to pick a related row without inlining
+    the whole table as <option>s.
+
+    GET /dashboard/autocomplete/<model>/?q=<prefix> returns at most 20 rows whose
+    search fields start with the prefix, as {"results": [{"value", "label"}]}.
+    Users without permission to see or pick rows of the model get a 403.
+    """
+
+    def get(self, request, model):
+        if model not in AUTOCOMPLETE_FIELDS:
+            raise Http404(f"No hay búsqueda disponible para {model}")
+        if not can_search(request.user, model):
+            return JsonResponse({"results": [], "error": "Acceso denegado"}, status=403)
+        q = request.GET.get("q", "")
+        try:
+            results = cached_search(model, q)
+        except Exception as e:
+            logger.error(f"Error in autocomplete search for {model}: {e}")
+            return JsonResponse({"results": [], "error": "Error en la búsqueda"}, status=500)
+        response = JsonResponse({"results": results})
+        patch_cache_control(response, private=True, max_age=60)
+        return response
@@ -1,12 +1,18 @@
+from django.conf import settings
 from django.shortcuts import render
 from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.paginator import Paginator
 from django.shortcuts import redirect
 import logging
 
-from dashboard.utils.file_processor import process_excel_file, process_csv_file
-from dashboard.utils.search_utils import filter_data
+from dashboard.tasks import start_import
+from dashboard.utils.file_processor import check_uploaded_file
+from dashboard.utils.datasets import (
+    DATASET_SESSION_KEY,
+    create_dataset,
+    get_session_dataset,
+    paginate_dataset,
+)
 
 logger = logging.getLogger("dashboard")
 
@@ -40,23 +46,29 @@ class DashboardView(LoginRequiredMixin, View):
                 return redirect("role_dashboard")
             
             q = request.GET.get("q")
-            data = request.session.get("data", [])
+            dataset = get_session_dataset(request)
 
             if q:
                 logger.info(f"Search query received: '{q}'")
-                data = filter_data(data, q)
 
-            if data:
-                paginator = Paginator(data, 20)
+            # Rows are shown as soon as the import job stores the first batch.
+            if dataset and dataset.row_count:
                 page_number = request.GET.get("page", 1)
                 logger.info(f"Paginating dashboard data. Page: {page_number}")
-                page_obj = paginator.get_page(page_number)
+                page_obj, page_range = paginate_dataset(dataset, page_number, q)
                 return render(
-                    request, self.template_name, {"page_obj": page_obj, "q": q}
+                    request,
+                    self.template_name,
+                    {
+                        "page_obj": page_obj,
+                        "page_range": page_range,
+                        "q": q,
+                        "dataset": dataset,
+                    },
                 )
 
             logger.info("No data available in session for dashboard.")
-            return render(request, self.template_name)
+            return render(request, self.template_name, {"dataset": dataset})
 
         except Exception as e:
             logger.error("Unexpected error during GET request to dashboard")
@@ -72,13 +84,14 @@ class DashboardView(LoginRequiredMixin, View):
         """
         Handles POST requests for file uploads.
 
-        Validates the uploaded file and returns appropriate error or success messages.
+        Validates the uploaded file and its headers, stores it as a dataset and starts
+        its import job (see dashboard.tasks). The dashboard then shows the progress.
 
         Args:
             request (HttpRequest): The HTTP request object.
 
         Returns:
-            HttpResponse: The rendered dashboard page with error or success messages.
+            HttpResponse: The rendered dashboard page with an error, or a redirect to it.
         """
         try:
             uploaded_file = request.FILES.get("file")
@@ -98,33 +111,30 @@ class DashboardView(LoginRequiredMixin, View):
                     {"error": "Formato no válido. Solo se permiten .csv o .xlsx"},
                 )
 
-            if uploaded_file.size > 5 * 1024 * 1024:
-                logger.warning(f"File exceeds 5MB: {uploaded_file.name}")
+            max_size = settings.UPLOAD_MAX_SIZE
+            if uploaded_file.size > max_size:
+                logger.warning(f"File exceeds {max_size} bytes: {uploaded_file.name}")
                 return render(
                     request,
                     self.template_name,
                     {
-                        "error": "El archivo supera los 5MB. Procesamiento por lotes no implementado aún."
+                        "error": f"El archivo supera el tamaño máximo de {max_size // (1024 * 1024)}MB."
                     },
                 )
 
             logger.info(f"Processing uploaded file: {uploaded_file.name}")
 
-            if uploaded_file.name.endswith(".xlsx"):
-                data, error = process_excel_file(uploaded_file)
-            elif uploaded_file.name.endswith(".csv"):
-                data, error = process_csv_file(uploaded_file)
-
+            # Only the headers are read here; the rows are imported by a job.
+            error = check_uploaded_file(uploaded_file)
             if error:
                 logger.error(f"File processing error: {error}")
                 return render(request, self.template_name, {"error": error})
 
-            request.session["data"] = data
-            paginator = Paginator(data, 20)
-            page_number = request.GET.get("page", 1)
-            page_obj = paginator.get_page(page_number)
-
-            return render(request, self.template_name, {"page_obj": page_obj})
+            uploaded_file.seek(0)
+            dataset = create_dataset(request.user, uploaded_file)
+            request.session[DATASET_SESSION_KEY] = dataset.pk
+            start_import(dataset)
+            return redirect("dashboard")
 
         except Exception as e:
             logger.error("Unexpected error during file upload")
@@ -0,0 +1,74 @@
+import logging
+
+from django.contrib import messages
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.utils.cache import add_never_cache_headers
+from django.views import View
+
+from dashboard.models import UploadedDataset
+from dashboard.utils.crm_import import import_into_crm
+from dashboard.utils.datasets import get_progress, get_session_dataset
+
+logger = logging.getLogger("dashboard")
+
+
+class DatasetProgressView(LoginRequiredMixin, View):
+    """
+    JSON endpoint polled by the dashboard while an upload is being imported.
+
+    GET /dashboard/datasets/<pk>/progress/ returns the status, rows and errors
+    counted so far, the percentage of the file read and the estimated seconds left.
+    """
+
+    def get(self, request, pk):
+        dataset = get_object_or_404(UploadedDataset, pk=pk, owner=request.user)
+        response = JsonResponse(get_progress(dataset))
+        add_never_cache_headers(response)
+        return response
+
+
+class ImportDatasetView(LoginRequiredMixin, View):
+    """
+    Creates or updates the clients, vehicles and contracts of the dataset uploaded
+    in the session (see dashboard.utils.crm_import). Only for superusers, like the
+    upload dashboard.
+    """
+
+    def post(self, request):
+        if not request.user.is_superuser:
+            return redirect("role_dashboard")
+
+        dataset = get_session_dataset(request)
+        if not dataset or dataset.status != "completed":
+            messages.error(request, "No hay un archivo procesado para importar.")
+            return redirect("dashboard")
+
+        try:
+            summary = import_into_crm(dataset)
+        except Exception as e:
+            logger.error(f"Error importing dataset {dataset.pk} into the CRM: {e}")
+            messages.error(request, f"Ocurrió un error al importar el archivo: {str(e)}")
+            return redirect("dashboard")
+
+        message = (
+            f"Importación completada: {summary['clients_created']} clientes nuevos y "
+            f"{summary['clients_updated']} actualizados, {summary['vehicles_created']} "
+            f"vehículos nuevos y {summary['vehicles_updated']} actualizados, "
+            f"{summary['contracts_created']} contratos nuevos y "
+            f"{summary['contracts_updated']} actualizados."
+        )
+        if summary["invalid"]:
+            message += f" {summary['invalid']} filas con errores de validación no se importaron."
+        if summary["skipped"]:
+            details = "; ".join(
+                f"fila {error['row']}: {error['message']}" for error in summary["errors"][:5]
+            )
+            message += f" {summary['skipped']} filas se omitieron ({details})."
+        if summary["invalid"] or summary["skipped"]:
+            # The base template only shows the last message, so everything goes in one.
+            messages.warning(request, message)
+        else:
+            messages.success(request, message)
+        return redirect("dashboard")
@@ -2,10 +2,11 @@ from django.core.paginator import Paginator
 from django.shortcuts import render
 from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.contrib.contenttypes.models import ContentType
 import logging, re
 
-from vehicles.models import Vehicle, VehicleModel
+from dashboard.utils.cache import get_cached_payload
+from dashboard.utils.form_schemas import get_form_schemas, resolve_form_schemas
+from dashboard.utils.pagination import KeysetPaginator
 
 
 logger = logging.getLogger("dashboard")
@@ -49,109 +50,109 @@ class RoleDashboardView(LoginRequiredMixin, View):
             )
 
     def get_context_data(self, normalized_name=None, **kwargs):
-        preloaded_querysets = {
-            "vehicle": Vehicle.objects.all().select_related("vehicle_model"),
-            "vehiclemodel": VehicleModel.objects.all(),
-        }
-
         try:
             app_context_path = f"dashboard.role_context_builders.{normalized_name}"
             module = __import__(app_context_path, fromlist=["get_context"])
-            context = module.get_context(self.request.user)
-            model_cts = ContentType.objects.filter(
-                permission__group=self.request.user.groups.all()[0]
-            ).distinct()
-            related_model_cache = {}
-            create_instances = []
-            for content_type in model_cts:
-                model = content_type.model_class()
-                model_name = model.__name__.lower()
-                perm_codename = f"{content_type.app_label}.add_{model_name}"
-                if self.request.user.has_perm(perm_codename):
-                    fields = []
-                    for field in model._meta.fields:
-                        if not field.auto_created and field.editable:
-                            pattern = None
-                            if field.choices:
-                                field_type = "select"
-                                field_choices = [
-                                    {"value": choice[0], "label": choice[1]}
-                                    for choice in field.choices
-                                ]
-                            elif (
-                                field.is_relation
-                                and hasattr(field, "remote_field")
-                                and field.remote_field.model
-                            ):
-                                field_type = "select"
-                                related_model = field.remote_field.model
-                                if related_model not in related_model_cache:
-                                    related_model_cache[related_model] = list(
-                                        preloaded_querysets.get(
-                                            related_model.__name__.lower(),
-                                            related_model.objects.all(),
-                                        )
-                                    )
-
-                                field_choices = [
-                                    {"value": obj.pk, "label": str(obj)}
-                                    for obj in related_model_cache[related_model]
-                                ]
-                            elif field.get_internal_type() in [
-                                "BooleanField",
-                                "NullBooleanField",
-                            ]:
-                                field_type = "checkbox"
-                                field_choices = None
-                            else:
-                                field_type = "text"
-                                field_choices = None
-                                fname = field.name.lower()
-                                if "email" in fname:
-                                    field_type = "email"
-                                elif "phone" in fname or "telefono" in fname:
-                                    field_type = "tel"
-                                    pattern = "[0-9]*"
-                                elif "date" in fname:
-                                    field_type = "date"
-                                else:
-                                    pattern = None
-
-                            field_dict = {
-                                "name": field.name,
-                                "label": field.verbose_name.capitalize(),
-                                "required": not field.blank,
-                                "type": field_type,
-                            }
-                            if pattern:
-                                field_dict["pattern"] = pattern
-                            if field_choices:
-                                field_dict["choices"] = field_choices
-
-                            fields.append(field_dict)
-
-                    if fields:
-                        create_instances.append(
-                            {
-                                "model": model.__name__,
-                                "action": f"{content_type.app_label}:create_{model_name}",
-                                "nombre_modelo": model._meta.verbose_name.capitalize(),
-                                "fields": fields,
-                            }
-                        )
-            if create_instances:
-                context["create_instances"] = create_instances
-
-            rows = context.get("rows", [])
-            paginator = Paginator(rows, context.get("pagination", 20))
-            page_number = self.request.GET.get("page")
-            page_obj = paginator.get_page(page_number)
-
-            context["rows"] = page_obj.object_list
-            context["page_obj"] = page_obj
-            context["paginator"] = paginator
-            context["is_paginated"] = page_obj.has_other_pages()
-            return context
         except ImportError:
             logger.warning(f"No context builder found for: {normalized_name}")
             return {"title": "Generic dashboard", "headers": [], "rows": []}
+
+        # The table is cached per role, page and filters; the create forms depend on
+        # the user's permissions and are built on every request.
+        context = get_cached_payload(
+            normalized_name,
+            self.request.GET,
+            lambda: self.build_payload(module),
+        )
+        create_instances = self.get_create_instances()
+        if create_instances:
+            context["create_instances"] = create_instances
+        return context
+
+    def build_payload(self, module):
+        """
+        Builds the table of a role dashboard as plain data, so it can be cached.
+
+        Args:
+            module (module): The role context builder.
+
+        Returns:
+            dict: The builder context with the rows of the current page and a
+            `page_obj` dict describing the pagination.
+        """
+        context = module.get_context(self.request.user)
+        queryset = context.pop("queryset", None)
+        build_row = context.pop("build_row", None)
+        cursor = self.request.GET.get("cursor")
+        if queryset is not None and (
+            context.get("pagination_mode") == "keyset" or cursor is not None
+        ):
+            # Cursor pagination: deep pages cost the same as the first one.
+            paginator = KeysetPaginator(
+                queryset,
+                context.get("pagination", 20),
+                context.get("sort_key", "pk"),
+            )
+            page_obj = paginator.get_page(cursor)
+            context["cursor_pagination"] = True
+            if context.get("estimate_count"):
+                (
+                    context["estimated_count"],
+                    context["count_is_exact"],
+                ) = paginator.estimated_count
+            page_info = {
+                "has_previous": page_obj.has_previous(),
+                "has_next": page_obj.has_next(),
+                "previous_cursor": page_obj.previous_cursor,
+                "next_cursor": page_obj.next_cursor,
+            }
+        else:
+            paginator = Paginator(
+                queryset if queryset is not None else context.get("rows", []),
+                context.get("pagination", 20),
+            )
+            page_number = self.request.GET.get("page")
+            page_obj = paginator.get_page(page_number)
+            page_info = {
+                "number": page_obj.number,
+                "num_pages": paginator.num_pages,
+                "count": paginator.count,
+                "has_previous": page_obj.has_previous(),
+                "has_next": page_obj.has_next(),
+                "previous_page_number": (
+                    page_obj.number - 1 if page_obj.has_previous() else None
+                ),
+                "next_page_number": page_obj.number + 1 if page_obj.has_next() else None,
+                "page_range": list(
+                    paginator.get_elided_page_range(
+                        page_obj.number, on_each_side=2, on_ends=1
+                    )
+                ),
+                "ellipsis": paginator.ELLIPSIS,
+            }
+
+        rows = list(page_obj.object_list)
+        if build_row:
+            # Only the rows of the current page are fetched (LIMIT/OFFSET) and mapped.
+            rows = [build_row(obj) for obj in rows]
+
+        # Pagination links keep the other GET parameters (filters, ordering).
+        params = self.request.GET.copy()
+        params.pop("cursor", None)
+        params.pop("page", None)
+        context["querystring"] = params.urlencode()
+        context["rows"] = rows
+        context["page_obj"] = page_info
+        context["is_paginated"] = page_obj.has_other_pages()
+        return context
+
+    def get_create_instances(self):
+        """
+        Returns the create form schemas the user's permissions allow. The schemas are
+        compiled once per set of permissions and cached; only the foreign key choices
+        are queried here.
+
+        Returns:
+            list: One dict per model with its create action and field definitions.
+        """
+        return resolve_form_schemas(get_form_schemas(self.request.user))
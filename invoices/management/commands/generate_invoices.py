@@ -1,8 +1,17 @@
 from django.core.management.base import BaseCommand
 from django.utils.timezone import now
-from invoices.models import Invoice, Contract
+from core.metrics import JOB_BUCKETS, observe
+from invoices.models import InvoiceRun
+from invoices.tasks import generate_invoices_shard, split_contract_ranges
+from invoices.utils.billing import (
+    backfill_invoices,
+    generate_invoices,
+    BULK_CREATE_BATCH_SIZE,
+)
+from datetime import date
+import django_rq
 import logging
-from datetime import timedelta
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -10,8 +19,14 @@ logger = logging.getLogger(__name__)
 class Command(BaseCommand):
     """
     Django management command to generate invoices for all active contracts that do not yet have an invoice for the current billing cycle.
-    This command iterates through all active contracts and determines the current billing period key based on the contract's billing cycle (weekly, biweekly, or monthly).
-    If an invoice for the current period does not already exist for a contract, a new invoice is created.
+    The period key of each billing cycle (weekly, biweekly, or monthly) is computed once, the contracts missing an invoice
+    for their period are found with a single anti-join query, and the new invoices are inserted with chunked `bulk_create`.
+    The (contract, period_key) unique constraint makes re-runs and concurrent runs no-ops.
+    With `--shards`, the active contracts are split into primary-key ranges and one RQ job is enqueued per range.
+    With `--from`/`--to`, every period missed between both dates is backfilled in one streamed pass.
+    Every run is recorded in the InvoiceRun ledger with a high-water mark over contract ids that moves with each
+    committed chunk; `--resume` continues the last failed run, or a running one whose heartbeat is stale,
+    from that mark.
     Attributes:
         help (str): Description of the command for Django's help system.
     Methods:
@@ -20,36 +35,92 @@ class Command(BaseCommand):
 
     help = "Genera facturas para todos los contratos activos si aún no tienen una factura en el ciclo actual"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BULK_CREATE_BATCH_SIZE,
+            help="Cantidad de facturas insertadas por lote",
+        )
+        parser.add_argument(
+            "--shards",
+            type=int,
+            default=0,
+            help="Divide los contratos en N rangos y encola un job de RQ por rango",
+        )
+        parser.add_argument(
+            "--id-range",
+            type=int,
+            nargs=2,
+            metavar=("START_ID", "END_ID"),
+            help="Procesa solo los contratos de este rango de ids (con --shards, lo encola como un único shard)",
+        )
+        parser.add_argument(
+            "--queue",
+            default="billing",
+            help="Cola de RQ usada para los shards (por defecto, billing)",
+        )
+        parser.add_argument(
+            "--from",
+            dest="date_from",
+            type=date.fromisoformat,
+            help="Fecha inicial (YYYY-MM-DD) para generar las facturas de periodos pasados",
+        )
+        parser.add_argument(
+            "--to",
+            dest="date_to",
+            type=date.fromisoformat,
+            help="Fecha final (YYYY-MM-DD) del rango a completar. Por defecto, hoy",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continúa la última ejecución fallida (o interrumpida sin actividad reciente) desde el último lote confirmado",
+        )
+        parser.add_argument(
+            "--wait",
+            action="store_true",
+            help="Espera a que terminen los shards y muestra el resumen de la ejecución",
+        )
+
     def handle(self, *args, **options):
+        run = None
+        started = time.monotonic()
         try:
             today = now().date()
-            generated_count = 0
-
-            active_contracts = Contract.objects.filter(active=True)
-
-            for contract in active_contracts:
-                if contract.billing_cycle == "weekly":
-                    year, week, _ = today.isocalendar()
-                    current_period_key = f"{year}-W{week:02d}"
-                elif contract.billing_cycle == "biweekly":
-                    quincena = 1 if today.day <= 15 else 2
-                    current_period_key = f"{today.year}-{today.month:02d}-Q{quincena}"
-                else:  # monthly
-                    current_period_key = f"{today.year}-{today.month:02d}"
-
-                already_exists = Invoice.objects.filter(
-                    contract=contract, period_key=current_period_key
-                ).exists()
-
-                if not already_exists:
-                    Invoice.objects.create(
-                        contract=contract,
-                        issue_date=today,
-                        due_date=today + timedelta(days=7),
-                        amount=contract.amount,
-                        period_key=current_period_key,
+
+            if options["shards"]:
+                self.enqueue_shards(today, options)
+                return
+
+            if options["id_range"]:
+                start_id, end_id = options["id_range"]
+                result = generate_invoices_shard(
+                    today, start_id, end_id, batch_size=options["batch_size"]
+                )
+                generated_count = result["generated"]
+            else:
+                run = self.get_run(today, options)
+                if run.date_from:
+                    generated_count = backfill_invoices(
+                        run.date_from,
+                        run.run_date,
+                        batch_size=options["batch_size"],
+                        start_after=run.last_contract_id,
+                        on_chunk=run.record_chunk,
                     )
-                    generated_count += 1
+                else:
+                    generated_count = generate_invoices(
+                        run.run_date,
+                        batch_size=options["batch_size"],
+                        start_after=run.last_contract_id,
+                        on_chunk=run.record_chunk,
+                    )
+                run.finish(time.monotonic() - started)
+                self.record_duration(run)
+                logger.info(
+                    f"Invoice run #{run.id} completed: {run.invoices_created} invoices in {run.duration:.2f}s"
+                )
 
             self.stdout.write(
                 self.style.SUCCESS(f"Generated Invoices: {generated_count}")
@@ -57,4 +128,106 @@ class Command(BaseCommand):
 
         except Exception as e:
             logger.exception(f"Error generating invoices: {e}")
+            if run:
+                run.fail(e, time.monotonic() - started)
+                self.record_duration(run)
+                self.stderr.write(
+                    f"Run #{run.id} stopped after contract {run.last_contract_id}. "
+                    "Continue it with --resume"
+                )
             self.stderr.write(self.style.ERROR(f"Error generating invoices: {str(e)}"))
+
+    def record_duration(self, run):
+        """Adds the duration of a finished run to the invoice run metrics."""
+        observe(
+            "crm_invoice_run_duration_seconds",
+            run.duration,
+            buckets=JOB_BUCKETS,
+            mode="backfill" if run.date_from else "daily",
+            status=run.status,
+        )
+
+    def get_run(self, today, options):
+        """
+        Returns the InvoiceRun to execute: the last failed or stale run with `--resume`,
+        or a new run for the requested dates.
+        """
+        if options["resume"]:
+            # A run still advancing in another process is not resumable; the
+            # conditional claim guards against two processes picking the same run.
+            for run in InvoiceRun.resumable().order_by("-started_at"):
+                if not run.claim():
+                    continue
+                logger.info(
+                    f"Resuming invoice run #{run.id} after contract {run.last_contract_id}"
+                )
+                self.stdout.write(
+                    f"Resuming run #{run.id} after contract {run.last_contract_id}"
+                )
+                return run
+            self.stdout.write("No unfinished runs to resume. Starting a new run.")
+
+        if options["date_from"]:
+            return InvoiceRun.objects.create(
+                run_date=options["date_to"] or today, date_from=options["date_from"]
+            )
+        return InvoiceRun.objects.create(run_date=today)
+
+    def enqueue_shards(self, today, options):
+        """
+        Enqueues one `generate_invoices_shard` job per contract id range and,
+        with `--wait`, gathers the per-shard counts and timings into one summary.
+        """
+        if options["id_range"]:
+            ranges = [tuple(options["id_range"])]
+        else:
+            ranges = split_contract_ranges(options["shards"])
+
+        queue = django_rq.get_queue(options["queue"])
+        jobs = [
+            queue.enqueue(
+                generate_invoices_shard,
+                today,
+                start_id,
+                end_id,
+                batch_size=options["batch_size"],
+            )
+            for start_id, end_id in ranges
+        ]
+        logger.info(f"Enqueued {len(jobs)} invoice shards on queue '{options['queue']}'")
+        self.stdout.write(f"Enqueued shards: {len(jobs)}")
+
+        if not options["wait"]:
+            return
+
+        started = time.monotonic()
+        pending = list(jobs)
+        while pending:
+            time.sleep(1)
+            pending = [
+                job for job in pending
+                if job.get_status(refresh=True) not in ("finished", "failed", "stopped", "canceled")
+            ]
+
+        generated_count = 0
+        for job, (start_id, end_id) in zip(jobs, ranges):
+            result = job.return_value()
+            if result is None:
+                self.stderr.write(
+                    self.style.ERROR(
+                        f"Shard [{start_id}, {end_id}] failed. "
+                        f"Re-run it with --id-range {start_id} {end_id}"
+                    )
+                )
+                continue
+            generated_count += result["generated"]
+            self.stdout.write(
+                f"Shard [{start_id}, {end_id}]: {result['generated']} invoices in {result['duration']:.2f}s"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated Invoices: {generated_count} "
+                f"({len(jobs)} shards, {time.monotonic() - started:.2f}s)"
+            )
+        )
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+from invoices.utils.overdue import run_overdue_sweep, OVERDUE_CHUNK_SIZE
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Django management command to mark as overdue ("vencido") every pending invoice past its due date.
+    Scheduled once a day as a cron job in render.yaml. The invoices are updated in chunks with one
+    UPDATE per chunk, and every sweep is recorded in the OverdueSweep ledger with the number of updated
+    rows and its duration.
+    Attributes:
+        help (str): Description of the command for Django's help system.
+    Methods:
+        handle(*args, **options): Main entry point for the command. Marks the overdue invoices and outputs the number updated.
+    """
+
+    help = "Marca como vencidas las facturas pendientes cuya fecha de vencimiento ya pasó"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=OVERDUE_CHUNK_SIZE,
+            help="Cantidad máxima de facturas actualizadas por sentencia",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sweep = run_overdue_sweep(now().date(), chunk_size=options["chunk_size"])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Overdue Invoices: {sweep.invoices_updated} "
+                    f"(sweep #{sweep.id}, {sweep.duration:.2f}s)"
+                )
+            )
+        except Exception as e:
+            logger.exception(f"Error marking overdue invoices: {e}")
+            self.stderr.write(self.style.ERROR(f"Error marking overdue invoices: {str(e)}"))
@@ -0,0 +1,42 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def clear_duplicated_period_keys(apps, schema_editor):
+    """
+    Keeps the period key only on the oldest invoice of each (contract, period_key)
+    pair, so the unique constraint can be created without deleting any invoice.
+    """
+    Invoice = apps.get_model("invoices", "Invoice")
+    duplicates = (
+        Invoice.objects.exclude(period_key__isnull=True)
+        .values("contract_id", "period_key")
+        .annotate(total=Count("id"))
+        .filter(total__gt=1)
+    )
+    for duplicate in duplicates.iterator():
+        ids = list(
+            Invoice.objects.filter(
+                contract_id=duplicate["contract_id"],
+                period_key=duplicate["period_key"],
+            )
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        Invoice.objects.filter(id__in=ids[1:]).update(period_key=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0005_remove_contract_remaining_amount'),
+        ('invoices', '0002_invoice_period_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_duplicated_period_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='invoice',
+            constraint=models.UniqueConstraint(fields=('contract', 'period_key'), name='unique_invoice_contract_period'),
+        ),
+    ]
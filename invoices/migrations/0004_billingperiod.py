@@ -0,0 +1,37 @@
+# Generated by Django 4.2.20 on 2026-10-17 17:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0003_invoice_unique_invoice_contract_period'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BillingPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=20, unique=True, verbose_name='Periodo')),
+                ('billing_cycle', models.CharField(choices=[('weekly', 'Semanal'), ('biweekly', 'Quincenal'), ('monthly', 'Mensual')], max_length=10, verbose_name='Ciclo de facturación')),
+                ('start_date', models.DateField(verbose_name='Inicio del periodo')),
+                ('end_date', models.DateField(verbose_name='Fin del periodo')),
+                ('ordinal', models.IntegerField(verbose_name='Número de periodo')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['billing_cycle', 'start_date'], name='billing_period_cycle_start_idx'), models.Index(fields=['start_date', 'end_date'], name='billing_period_dates_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='billingperiod',
+            constraint=models.UniqueConstraint(fields=('billing_cycle', 'ordinal'), name='unique_billing_period_cycle_ordinal'),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='billing_period',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to='invoices.billingperiod', verbose_name='Periodo'),
+        ),
+    ]
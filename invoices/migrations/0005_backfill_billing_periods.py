@@ -0,0 +1,84 @@
+from datetime import date, timedelta
+import re
+
+from django.db import migrations
+
+CHUNK_SIZE = 5000
+
+# Frozen copy of the period key formats used by invoices.utils.billing when this
+# migration was written.
+PERIOD_KEY_PATTERNS = {
+    "weekly": re.compile(r"^(\d{4})-W(\d{2})$"),
+    "biweekly": re.compile(r"^(\d{4})-(\d{2})-Q([12])$"),
+    "monthly": re.compile(r"^(\d{4})-(\d{2})$"),
+}
+
+
+def parse_period_key(period_key):
+    for billing_cycle, pattern in PERIOD_KEY_PATTERNS.items():
+        match = pattern.match(period_key)
+        if not match:
+            continue
+        try:
+            if billing_cycle == "weekly":
+                start = date.fromisocalendar(int(match.group(1)), int(match.group(2)), 1)
+                return billing_cycle, start, start + timedelta(days=6), start.toordinal() // 7
+            year, month = int(match.group(1)), int(match.group(2))
+            month_index = year * 12 + month - 1
+            next_month = date(year + month // 12, month % 12 + 1, 1)
+            if billing_cycle == "biweekly":
+                if match.group(3) == "1":
+                    return billing_cycle, date(year, month, 1), date(year, month, 15), month_index * 2
+                return billing_cycle, date(year, month, 16), next_month - timedelta(days=1), month_index * 2 + 1
+            return billing_cycle, date(year, month, 1), next_month - timedelta(days=1), month_index
+        except ValueError:
+            return None
+    return None
+
+
+def backfill_billing_periods(apps, schema_editor):
+    """
+    Creates a BillingPeriod for every distinct period key and links the invoices
+    to it, updating at most CHUNK_SIZE invoices per statement.
+    """
+    BillingPeriod = apps.get_model("invoices", "BillingPeriod")
+    Invoice = apps.get_model("invoices", "Invoice")
+
+    period_keys = (
+        Invoice.objects.exclude(period_key__isnull=True)
+        .order_by()
+        .values_list("period_key", flat=True)
+        .distinct()
+    )
+    for period_key in period_keys.iterator():
+        parsed = parse_period_key(period_key)
+        if parsed is None:
+            continue
+        billing_cycle, start, end, ordinal = parsed
+        period, _ = BillingPeriod.objects.get_or_create(
+            key=period_key,
+            defaults={
+                "billing_cycle": billing_cycle,
+                "start_date": start,
+                "end_date": end,
+                "ordinal": ordinal,
+            },
+        )
+
+        pending = Invoice.objects.filter(period_key=period_key, billing_period__isnull=True)
+        while True:
+            ids = list(pending.order_by("id").values_list("id", flat=True)[:CHUNK_SIZE])
+            if not ids:
+                break
+            Invoice.objects.filter(id__in=ids).update(billing_period=period)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0004_billingperiod'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_billing_periods, migrations.RunPython.noop),
+    ]
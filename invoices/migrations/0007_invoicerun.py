@@ -0,0 +1,31 @@
+# Generated by Django 4.2.20 on 2026-10-17 17:49
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0006_invoice_status_due_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('run_date', models.DateField(verbose_name='Fecha de facturación')),
+                ('date_from', models.DateField(blank=True, null=True, verbose_name='Desde')),
+                ('status', models.CharField(choices=[('running', 'En ejecución'), ('completed', 'Completada'), ('failed', 'Fallida')], default='running', max_length=10, verbose_name='Estado')),
+                ('last_contract_id', models.BigIntegerField(default=0, verbose_name='Último contrato procesado')),
+                ('contracts_processed', models.PositiveIntegerField(default=0, verbose_name='Contratos procesados')),
+                ('invoices_created', models.PositiveIntegerField(default=0, verbose_name='Facturas generadas')),
+                ('chunks_completed', models.PositiveIntegerField(default=0, verbose_name='Lotes completados')),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Inicio')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fin')),
+                ('duration', models.FloatField(default=0, verbose_name='Duración (s)')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+            ],
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.20 on 2026-10-17 18:29
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0007_invoicerun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OverdueSweep',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('run_date', models.DateField(verbose_name='Fecha de referencia')),
+                ('status', models.CharField(choices=[('running', 'En ejecución'), ('completed', 'Completada'), ('failed', 'Fallida')], default='running', max_length=10, verbose_name='Estado')),
+                ('invoices_updated', models.PositiveIntegerField(default=0, verbose_name='Facturas vencidas')),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Inicio')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fin')),
+                ('duration', models.FloatField(default=0, verbose_name='Duración (s)')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.20 on 2026-10-17 18:30
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def set_heartbeat_from_start(apps, schema_editor):
+    # Runs interrupted before the heartbeat existed must look stale, not fresh.
+    apps.get_model("invoices", "InvoiceRun").objects.update(heartbeat_at=F("started_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0008_overduesweep'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoicerun',
+            name='heartbeat_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Última actividad'),
+        ),
+        migrations.RunPython(set_heartbeat_from_start, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,61 @@
 import uuid
+from datetime import timedelta
 from django.db import models
+from django.db.models import F, Q
+from django.utils import timezone
 from contracts.models import Contract
 
 
+class BillingPeriod(models.Model):
+    """
+    Model representing a billing period.
+
+    Precomputed calendar of the periods invoices are issued for, so period-range
+    queries can join on indexed dates instead of parsing `Invoice.period_key`.
+
+    Attributes:
+        key (CharField): The unique period key, e.g. "2025-W07", "2025-03-Q1" or "2025-03".
+        billing_cycle (CharField): The billing cycle of the period (weekly, biweekly or monthly).
+        start_date (DateField): The first day of the period.
+        end_date (DateField): The last day of the period.
+        ordinal (IntegerField): The sequential number of the period within its billing cycle.
+
+    Methods:
+        __str__(): Returns the period key.
+    """
+
+    key = models.CharField("Periodo", max_length=20, unique=True)
+    billing_cycle = models.CharField(
+        "Ciclo de facturación",
+        max_length=10,
+        choices=Contract.BILLING_CYCLE_CHOICES,
+    )
+    start_date = models.DateField("Inicio del periodo")
+    end_date = models.DateField("Fin del periodo")
+    ordinal = models.IntegerField("Número de periodo")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["billing_cycle", "ordinal"],
+                name="unique_billing_period_cycle_ordinal",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["billing_cycle", "start_date"],
+                name="billing_period_cycle_start_idx",
+            ),
+            models.Index(
+                fields=["start_date", "end_date"],
+                name="billing_period_dates_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return self.key
+
+
 class Invoice(models.Model):
     """
     Model representing an invoice.
@@ -20,6 +73,9 @@ class Invoice(models.Model):
             - "pendiente": Pending payment.
             - "pagado": Paid.
             - "vencido": Overdue.
+        period_key (CharField): The billing period the invoice belongs to. A contract can
+            only have one invoice per period.
+        billing_period (ForeignKey): A reference to the billing period (BillingPeriod model).
 
     Methods:
         __str__(): Returns a string representation of the invoice, including its ID and associated contract.
@@ -47,6 +103,188 @@ class Invoice(models.Model):
     period_key = models.CharField(
         "Periodo de facturación", max_length=20, blank=True, null=True
     )
+    billing_period = models.ForeignKey(
+        BillingPeriod,
+        on_delete=models.PROTECT,
+        blank=True,
+        null=True,
+        verbose_name="Periodo",
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["contract", "period_key"],
+                name="unique_invoice_contract_period",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["payment_status", "due_date"],
+                name="invoice_status_due_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Factura #{self.id} — {self.contract}"
+
+
+class InvoiceRun(models.Model):
+    """
+    Model representing an execution of the invoice generation command.
+
+    Works as a ledger of billing runs: each committed chunk of contracts moves the
+    high-water mark forward, so a failed run can be resumed from its last chunk.
+
+    Attributes:
+        run_date (DateField): The billing date of the run (last day of the range for backfills).
+        date_from (DateField): The first day of the range for backfill runs, empty otherwise.
+        status (CharField): The status of the run, with choices:
+            - "running": The run is in progress (or was interrupted).
+            - "completed": The run finished successfully.
+            - "failed": The run stopped because of an error.
+        last_contract_id (BigIntegerField): Highest contract id of the last committed chunk.
+        contracts_processed (PositiveIntegerField): Contracts processed in committed chunks.
+        invoices_created (PositiveIntegerField): Invoices inserted in committed chunks.
+        chunks_completed (PositiveIntegerField): Number of committed chunks.
+        started_at (DateTimeField): When the run started.
+        heartbeat_at (DateTimeField): When the run last committed a chunk or was claimed.
+        finished_at (DateTimeField): When the run completed or failed.
+        duration (FloatField): Accumulated execution time in seconds, across resumes.
+        error (TextField): The error that stopped the run, if any.
+
+    Methods:
+        resumable(): Returns the failed runs and the running ones without a recent heartbeat.
+        claim(): Atomically marks a resumable run as running for the current process.
+        record_chunk(last_contract_id, contracts, invoices): Moves the high-water mark after a committed chunk.
+        finish(duration): Marks the run as completed.
+        fail(error, duration): Marks the run as failed.
+        __str__(): Returns a string representation of the run, including its date and status.
+    """
+
+    STATUS_CHOICES = [
+        ("running", "En ejecución"),
+        ("completed", "Completada"),
+        ("failed", "Fallida"),
+    ]
+    # A running run without a committed chunk for this long is considered dead.
+    STALE_AFTER = timedelta(minutes=30)
+
+    run_date = models.DateField("Fecha de facturación")
+    date_from = models.DateField("Desde", blank=True, null=True)
+    status = models.CharField(
+        "Estado", max_length=10, choices=STATUS_CHOICES, default="running"
+    )
+    last_contract_id = models.BigIntegerField("Último contrato procesado", default=0)
+    contracts_processed = models.PositiveIntegerField("Contratos procesados", default=0)
+    invoices_created = models.PositiveIntegerField("Facturas generadas", default=0)
+    chunks_completed = models.PositiveIntegerField("Lotes completados", default=0)
+    started_at = models.DateTimeField("Inicio", default=timezone.now)
+    heartbeat_at = models.DateTimeField("Última actividad", default=timezone.now)
+    finished_at = models.DateTimeField("Fin", blank=True, null=True)
+    duration = models.FloatField("Duración (s)", default=0)
+    error = models.TextField("Error", blank=True)
+
+    @classmethod
+    def resumable(cls):
+        stale = timezone.now() - cls.STALE_AFTER
+        return cls.objects.filter(
+            Q(status="failed") | Q(status="running", heartbeat_at__lt=stale)
+        )
+
+    def claim(self):
+        """
+        Marks the run as running, only if no other process changed it since it was
+        read. Returns whether the run was claimed.
+        """
+        claimed = InvoiceRun.objects.filter(
+            pk=self.pk, status=self.status, heartbeat_at=self.heartbeat_at
+        ).update(status="running", heartbeat_at=timezone.now(), finished_at=None, error="")
+        if claimed:
+            self.refresh_from_db()
+        return bool(claimed)
+
+    def record_chunk(self, last_contract_id, contracts, invoices):
+        self.last_contract_id = last_contract_id
+        InvoiceRun.objects.filter(pk=self.pk).update(
+            heartbeat_at=timezone.now(),
+            last_contract_id=last_contract_id,
+            contracts_processed=F("contracts_processed") + contracts,
+            invoices_created=F("invoices_created") + invoices,
+            chunks_completed=F("chunks_completed") + 1,
+        )
+
+    def finish(self, duration):
+        self._close("completed", duration)
+
+    def fail(self, error, duration):
+        self._close("failed", duration, error=str(error))
+
+    def _close(self, status, duration, error=""):
+        InvoiceRun.objects.filter(pk=self.pk).update(
+            status=status,
+            finished_at=timezone.now(),
+            duration=F("duration") + duration,
+            error=error,
+        )
+        self.refresh_from_db()
+
+    def __str__(self):
+        return f"Ejecución #{self.id} — {self.run_date} ({self.status})"
+
+
+class OverdueSweep(models.Model):
+    """
+    Model representing an execution of the overdue invoices sweep.
+
+    Works as a ledger of the daily sweeps, like InvoiceRun for billing runs, so it
+    can be checked when the sweep last ran and how many invoices it updated.
+
+    Attributes:
+        run_date (DateField): The reference date. Invoices due before it are overdue.
+        status (CharField): The status of the sweep, with choices:
+            - "running": The sweep is in progress (or was interrupted).
+            - "completed": The sweep finished successfully.
+            - "failed": The sweep stopped because of an error.
+        invoices_updated (PositiveIntegerField): Invoices marked as overdue.
+        started_at (DateTimeField): When the sweep started.
+        finished_at (DateTimeField): When the sweep completed or failed.
+        duration (FloatField): Execution time in seconds.
+        error (TextField): The error that stopped the sweep, if any.
+
+    Methods:
+        finish(updated, duration): Marks the sweep as completed.
+        fail(error, duration): Marks the sweep as failed.
+        __str__(): Returns a string representation of the sweep, including its date and status.
+    """
+
+    STATUS_CHOICES = InvoiceRun.STATUS_CHOICES
+
+    run_date = models.DateField("Fecha de referencia")
+    status = models.CharField(
+        "Estado", max_length=10, choices=STATUS_CHOICES, default="running"
+    )
+    invoices_updated = models.PositiveIntegerField("Facturas vencidas", default=0)
+    started_at = models.DateTimeField("Inicio", default=timezone.now)
+    finished_at = models.DateTimeField("Fin", blank=True, null=True)
+    duration = models.FloatField("Duración (s)", default=0)
+    error = models.TextField("Error", blank=True)
+
+    def finish(self, updated, duration):
+        self.invoices_updated = updated
+        self._close("completed", duration)
+
+    def fail(self, error, duration):
+        self._close("failed", duration, error=str(error))
+
+    def _close(self, status, duration, error=""):
+        self.status = status
+        self.duration = duration
+        self.error = error
+        self.finished_at = timezone.now()
+        self.save(
+            update_fields=["invoices_updated", "status", "duration", "error", "finished_at"]
+        )
+
+    def __str__(self):
+        return f"Barrido #{self.id} — {self.run_date} ({self.status})"
@@ -0,0 +1,103 @@
+import logging
+import time
+
+from django.db.models import Max, Min
+from django.utils.timezone import now
+from django_rq import job
+
+from contracts.models import Contract
+from core.metrics import JOB_BUCKETS, observe
+from invoices.utils.billing import generate_invoices, BULK_CREATE_BATCH_SIZE
+from invoices.utils.overdue import run_overdue_sweep
+
+logger = logging.getLogger("invoices")
+
+
+def split_contract_ranges(shards):
+    """
+    Splits the primary keys of the active contracts into contiguous ranges.
+
+    Args:
+        shards (int): The number of ranges to build.
+
+    Returns:
+        list: A list of (start_id, end_id) tuples, both inclusive. Empty if there
+        are no active contracts.
+    """
+    bounds = Contract.objects.filter(active=True).aggregate(
+        min_id=Min("id"), max_id=Max("id")
+    )
+    if bounds["min_id"] is None:
+        return []
+
+    min_id, max_id = bounds["min_id"], bounds["max_id"]
+    size = max((max_id - min_id + 1) // max(shards, 1), 1)
+    ranges = []
+    start_id = min_id
+    while start_id <= max_id:
+        end_id = start_id + size - 1
+        if len(ranges) == shards - 1:
+            end_id = max_id
+        ranges.append((start_id, min(end_id, max_id)))
+        start_id = end_id + 1
+    return ranges
+
+
+def generate_invoices_shard(day, start_id, end_id, batch_size=BULK_CREATE_BATCH_SIZE):
+    """
+    Generates the missing invoices of the contracts whose id is in [start_id, end_id].
+
+    Shards are idempotent: the anti-join skips contracts already billed for the
+    period, so a failed shard can be enqueued again on its own.
+
+    Args:
+        day (date): The billing date.
+        start_id (int): First contract id of the shard.
+        end_id (int): Last contract id of the shard.
+        batch_size (int): Number of invoices inserted per `bulk_create` call.
+
+    Returns:
+        dict: The shard range, the number of invoices generated and the duration in seconds.
+    """
+    started = time.monotonic()
+    generated = generate_invoices(
+        day,
+        contracts=Contract.objects.filter(pk__range=(start_id, end_id)),
+        batch_size=batch_size,
+    )
+    duration = time.monotonic() - started
+    observe(
+        "crm_invoice_run_duration_seconds",
+        duration,
+        buckets=JOB_BUCKETS,
+        mode="shard",
+        status="completed",
+    )
+    logger.info(
+        f"Invoice shard [{start_id}, {end_id}] generated {generated} invoices in {duration:.2f}s"
+    )
+    return {
+        "start_id": start_id,
+        "end_id": end_id,
+        "generated": generated,
+        "duration": duration,
+    }
+
+
+@job
+def mark_overdue_invoices_job():
+    """
+    RQ job that marks as overdue the pending invoices past their due date. The
+    daily schedule runs the `mark_overdue_invoices` command instead (see
+    render.yaml); this job is for enqueueing a sweep from the application or an
+    RQ scheduler. Both record the sweep in the OverdueSweep ledger.
+
+    Returns:
+        dict: The id of the sweep, the number of invoices updated and the duration in seconds.
+    """
+    sweep = run_overdue_sweep(now().date())
+    return {
+        "sweep_id": sweep.id,
+        "updated": sweep.invoices_updated,
+        "duration": sweep.duration,
+    }
@@ -1,3 +1,353 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import IntegrityError
 from django.test import TestCase
+from django.utils.timezone import now
+
+from clients.models import Client
+from contracts.models import Contract
+from invoices.models import BillingPeriod, Invoice, InvoiceRun, OverdueSweep
+from invoices.tasks import generate_invoices_shard, split_contract_ranges
+from invoices.utils.billing import (
+    backfill_invoices,
+    contracts_missing_invoice,
+    generate_invoices,
+    get_billing_period_ids,
+    get_period_key,
+    get_period_keys,
+    invoices_in_period_range,
+    iter_periods,
+    parse_period_key,
+)
+from invoices.utils.overdue import mark_overdue_invoices, run_overdue_sweep
+from vehicles.models import Vehicle, VehicleModel
+
+
+def create_contract(index, billing_cycle="weekly", active=True, **kwargs):
+    """Creates a contract with its own client and vehicle."""
+    vehicle_model, _ = VehicleModel.objects.get_or_create(brand="Honda", model="CB190")
+    client = Client.objects.create(
+        first_name=f"Cliente {index}",
+        last_name="Prueba",
+        document_number=f"DOC{index}",
+        email=f"cliente{index}@example.com",
+    )
+    vehicle = Vehicle.objects.create(
+        vehicle_model=vehicle_model, license_plate=f"ABC{index:03d}"
+    )
+    return Contract.objects.create(
+        client=client,
+        vehicle=vehicle,
+        start_date=kwargs.pop("start_date", date(2025, 1, 6)),
+        weekly_payment=kwargs.pop("weekly_payment", Decimal("100.00")),
+        billing_cycle=billing_cycle,
+        active=active,
+        amount=kwargs.pop("amount", Decimal("1000.00")),
+        **kwargs,
+    )
+
+
+class GenerateInvoicesTests(TestCase):
+    """Tests for the set-based invoice generation engine."""
+
+    def setUp(self):
+        self.day = date(2025, 3, 12)
+        self.weekly = create_contract(1, "weekly")
+        self.biweekly = create_contract(2, "biweekly")
+        self.monthly = create_contract(3, "monthly")
+        self.inactive = create_contract(4, "weekly", active=False)
+
+    def test_period_keys(self):
+        """Each billing cycle builds its own period key format."""
+        self.assertEqual(get_period_key("weekly", self.day), "2025-W11")
+        self.assertEqual(get_period_key("biweekly", self.day), "2025-03-Q1")
+        self.assertEqual(get_period_key("monthly", self.day), "2025-03")
+
+    def test_generates_one_invoice_per_active_contract(self):
+        """Only active contracts are billed, with the key of their own cycle."""
+        self.assertEqual(generate_invoices(self.day), 3)
+        self.assertFalse(Invoice.objects.filter(contract=self.inactive).exists())
+        self.assertEqual(
+            set(Invoice.objects.values_list("contract_id", "period_key")),
+            {
+                (self.weekly.id, "2025-W11"),
+                (self.biweekly.id, "2025-03-Q1"),
+                (self.monthly.id, "2025-03"),
+            },
+        )
+
+    def test_rerun_is_a_noop(self):
+        """A second run in the same period does not create duplicates."""
+        generate_invoices(self.day)
+        # One lookup of the billing periods and one anti-join.
+        with self.assertNumQueries(2):
+            self.assertEqual(generate_invoices(self.day), 0)
+        self.assertEqual(Invoice.objects.count(), 3)
+
+    def test_query_count_does_not_grow_with_contracts(self):
+        """Billing many contracts costs one read and one insert per batch."""
+        get_billing_period_ids(get_period_keys(self.day).values())
+        for index in range(5, 25):
+            create_contract(index)
+        # Period lookup, anti-join, then inside the chunk savepoint one insert between
+        # two counts, plus one aggregate and one upsert to refresh the contract balances.
+        with self.assertNumQueries(9):
+            generate_invoices(self.day)
+
+    def test_counts_only_inserted_invoices(self):
+        """Invoices created by a concurrent run while a chunk is built are not counted."""
+        run = InvoiceRun.objects.create(run_date=self.day)
+        contracts_missing = contracts_missing_invoice
+
+        def concurrent_run(day, contracts=None):
+            chunk = list(contracts_missing(day, contracts))
+            # Another process bills the weekly contract before this chunk is inserted.
+            Invoice.objects.create(
+                contract=self.weekly,
+                issue_date=day,
+                due_date=day,
+                amount=Decimal("1.00"),
+                period_key="2025-W11",
+            )
+            return chunk
+
+        with mock.patch(
+            "invoices.utils.billing.contracts_missing_invoice", side_effect=concurrent_run
+        ):
+            generated = generate_invoices(self.day, on_chunk=run.record_chunk)
+
+        run.refresh_from_db()
+        self.assertEqual(generated, 2)
+        self.assertEqual(run.invoices_created, 2)
+        self.assertEqual(Invoice.objects.count(), 3)
+
+    def test_unique_period_per_contract(self):
+        """The database rejects a second invoice for the same period."""
+        generate_invoices(self.day)
+        with self.assertRaises(IntegrityError):
+            Invoice.objects.create(
+                contract=self.weekly,
+                issue_date=self.day,
+                due_date=self.day,
+                amount=Decimal("1.00"),
+                period_key="2025-W11",
+            )
+
+
+class InvoiceShardTests(TestCase):
+    """Tests for the sharded invoice generation jobs."""
+
+    def setUp(self):
+        self.day = date(2025, 3, 12)
+        self.contracts = [create_contract(index) for index in range(1, 8)]
+
+    def test_ranges_cover_all_active_contracts(self):
+        """The shard ranges are contiguous and cover every active contract id."""
+        ranges = split_contract_ranges(3)
+        self.assertEqual(len(ranges), 3)
+        self.assertEqual(ranges[0][0], self.contracts[0].id)
+        self.assertEqual(ranges[-1][1], self.contracts[-1].id)
+        for previous, current in zip(ranges, ranges[1:]):
+            self.assertEqual(previous[1] + 1, current[0])
+
+    def test_shards_are_idempotent(self):
+        """Re-running a shard only bills the contracts it still misses."""
+        ranges = split_contract_ranges(2)
+        first = generate_invoices_shard(self.day, *ranges[0])
+        self.assertGreater(first["generated"], 0)
+        self.assertEqual(generate_invoices_shard(self.day, *ranges[0])["generated"], 0)
+        generate_invoices_shard(self.day, *ranges[1])
+        self.assertEqual(Invoice.objects.count(), len(self.contracts))
+
+
+class BackfillInvoicesTests(TestCase):
+    """Tests for the catch-up mode of invoice generation."""
+
+    def test_period_enumeration(self):
+        """Periods of each cycle overlapping the range are listed in order."""
+        weeks = list(iter_periods("weekly", date(2025, 3, 5), date(2025, 3, 20)))
+        self.assertEqual([key for key, _, _ in weeks], ["2025-W10", "2025-W11", "2025-W12"])
+        halves = list(iter_periods("biweekly", date(2025, 1, 20), date(2025, 2, 3)))
+        self.assertEqual(
+            [(key, start, end) for key, start, end in halves],
+            [
+                ("2025-01-Q2", date(2025, 1, 16), date(2025, 1, 31)),
+                ("2025-02-Q1", date(2025, 2, 1), date(2025, 2, 15)),
+            ],
+        )
+        months = list(iter_periods("monthly", date(2024, 12, 10), date(2025, 1, 1)))
+        self.assertEqual([key for key, _, _ in months], ["2024-12", "2025-01"])
+
+    def test_backfills_only_missing_periods(self):
+        """Existing invoices are kept and periods before the contract start are skipped."""
+        weekly = create_contract(1, "weekly", start_date=date(2025, 3, 12))
+        monthly = create_contract(2, "monthly", start_date=date(2025, 1, 1))
+        generate_invoices(date(2025, 3, 12))
+
+        generated = backfill_invoices(date(2025, 1, 1), date(2025, 3, 31), chunk_size=1)
+
+        self.assertEqual(generated, 3 + 2)
+        self.assertEqual(
+            sorted(Invoice.objects.filter(contract=weekly).values_list("period_key", flat=True)),
+            ["2025-W11", "2025-W12", "2025-W13", "2025-W14"],
+        )
+        self.assertEqual(
+            sorted(Invoice.objects.filter(contract=monthly).values_list("period_key", flat=True)),
+            ["2025-01", "2025-02", "2025-03"],
+        )
+        self.assertEqual(backfill_invoices(date(2025, 1, 1), date(2025, 3, 31)), 0)
+
+
+class BillingPeriodTests(TestCase):
+    """Tests for the billing period calendar."""
+
+    def test_parse_period_key(self):
+        """Period keys are parsed back into their cycle and date range."""
+        self.assertEqual(
+            parse_period_key("2025-W07"),
+            ("weekly", date(2025, 2, 10), date(2025, 2, 16)),
+        )
+        self.assertEqual(
+            parse_period_key("2025-02-Q2"),
+            ("biweekly", date(2025, 2, 16), date(2025, 2, 28)),
+        )
+        self.assertEqual(
+            parse_period_key("2025-12"),
+            ("monthly", date(2025, 12, 1), date(2025, 12, 31)),
+        )
+        self.assertIsNone(parse_period_key("manual"))
+
+    def test_consecutive_periods_have_consecutive_ordinals(self):
+        """Ordinals allow period ranges to be expressed as integer ranges."""
+        ids = get_billing_period_ids(["2024-W52", "2025-W01", "2025-12-Q2", "2026-01-Q1"])
+        periods = {period.key: period for period in BillingPeriod.objects.filter(id__in=ids.values())}
+        self.assertEqual(periods["2025-W01"].ordinal - periods["2024-W52"].ordinal, 1)
+        self.assertEqual(periods["2026-01-Q1"].ordinal - periods["2025-12-Q2"].ordinal, 1)
+
+    def test_generated_invoices_are_linked_to_their_period(self):
+        """New invoices point to their billing period and can be queried by range."""
+        contract = create_contract(1, "biweekly")
+        generate_invoices(date(2025, 3, 20))
+        invoice = Invoice.objects.get(contract=contract)
+        self.assertEqual(invoice.billing_period.key, "2025-03-Q2")
+        self.assertEqual(invoice.billing_period.start_date, date(2025, 3, 16))
+        self.assertEqual(
+            list(invoices_in_period_range(date(2025, 3, 1), date(2025, 3, 31))),
+            [invoice],
+        )
+        self.assertFalse(invoices_in_period_range(date(2025, 4, 1), date(2025, 4, 30)).exists())
+
+
+class MarkOverdueInvoicesTests(TestCase):
+    """Tests for the overdue invoice sweeper."""
+
+    def setUp(self):
+        self.contract = create_contract(1)
+        for index, (due_date, status) in enumerate(
+            [
+                (date(2025, 3, 1), "pendiente"),
+                (date(2025, 3, 2), "pendiente"),
+                (date(2025, 3, 3), "pendiente"),
+                (date(2025, 3, 1), "pagado"),
+                (date(2025, 3, 10), "pendiente"),
+            ]
+        ):
+            Invoice.objects.create(
+                contract=self.contract,
+                issue_date=date(2025, 2, 20),
+                due_date=due_date,
+                amount=Decimal("100.00"),
+                payment_status=status,
+                period_key=f"P{index}",
+            )
+
+    def test_only_pending_invoices_past_due_are_updated(self):
+        """Paid invoices and invoices not yet due keep their status."""
+        result = mark_overdue_invoices(date(2025, 3, 10), chunk_size=2)
+        self.assertEqual(result["updated"], 3)
+        self.assertEqual(
+            sorted(
+                Invoice.objects.filter(payment_status="vencido").values_list(
+                    "due_date", flat=True
+                )
+            ),
+            [date(2025, 3, 1), date(2025, 3, 2), date(2025, 3, 3)],
+        )
+        self.assertEqual(Invoice.objects.filter(payment_status="pagado").count(), 1)
+        self.assertEqual(mark_overdue_invoices(date(2025, 3, 10))["updated"], 0)
+
+    def test_one_update_per_chunk(self):
+        """The sweep issues one UPDATE per chunk plus a final empty one."""
+        with self.assertNumQueries(2):
+            mark_overdue_invoices(date(2025, 3, 10), chunk_size=3)
+
+    def test_sweeps_are_recorded(self):
+        """Each sweep is recorded in the OverdueSweep ledger, failed ones with their error."""
+        sweep = run_overdue_sweep(date(2025, 3, 10))
+        self.assertEqual((sweep.status, sweep.invoices_updated), ("completed", 3))
+        self.assertIsNotNone(sweep.finished_at)
+
+        with mock.patch(
+            "invoices.utils.overdue.mark_overdue_invoices", side_effect=RuntimeError("boom")
+        ):
+            with self.assertRaises(RuntimeError):
+                run_overdue_sweep(date(2025, 3, 10))
+        failed = OverdueSweep.objects.latest("id")
+        self.assertEqual((failed.status, failed.error), ("failed", "boom"))
+
+
+class InvoiceRunTests(TestCase):
+    """Tests for the invoice run ledger and resumable runs."""
+
+    def setUp(self):
+        self.contracts = [create_contract(index) for index in range(1, 6)]
+
+    def test_chunks_move_the_high_water_mark(self):
+        """Each committed chunk is recorded in the run ledger."""
+        run = InvoiceRun.objects.create(run_date=date(2025, 3, 12))
+        generate_invoices(run.run_date, batch_size=2, on_chunk=run.record_chunk)
+        run.finish(0.5)
+        self.assertEqual(run.status, "completed")
+        self.assertEqual(run.last_contract_id, self.contracts[-1].id)
+        self.assertEqual(run.invoices_created, 5)
+        self.assertEqual(run.chunks_completed, 3)
+
+    def test_resume_continues_after_last_committed_chunk(self):
+        """A failed run is resumed from its high-water mark, not from the start."""
+        day = now().date()
+        failed = InvoiceRun.objects.create(run_date=day)
+        generate_invoices(
+            day, contracts=Contract.objects.filter(pk__lte=self.contracts[1].id),
+            on_chunk=failed.record_chunk,
+        )
+        failed.fail("boom", 1.0)
+
+        call_command("generate_invoices", "--resume", stdout=StringIO())
+
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, "completed")
+        self.assertEqual(failed.invoices_created, 5)
+        self.assertEqual(InvoiceRun.objects.count(), 1)
+        self.assertEqual(Invoice.objects.count(), 5)
+
+    def test_resume_skips_runs_active_in_another_process(self):
+        """Only failed runs and running ones with a stale heartbeat are resumed."""
+        day = now().date()
+        active = InvoiceRun.objects.create(run_date=day)
+        stale = InvoiceRun.objects.create(
+            run_date=day, heartbeat_at=now() - InvoiceRun.STALE_AFTER * 2
+        )
+        self.assertEqual(list(InvoiceRun.resumable()), [stale])
+
+        # A claim fails when another process changed the run after it was read.
+        other = InvoiceRun.objects.get(pk=stale.pk)
+        self.assertTrue(stale.claim())
+        self.assertFalse(other.claim())
 
-# Create your tests here.
+        call_command("generate_invoices", "--resume", stdout=StringIO())
+        active.refresh_from_db()
+        self.assertEqual((active.status, active.invoices_created), ("running", 0))
@@ -0,0 +1,468 @@
+from datetime import date, timedelta
+import logging
+import re
+
+from django.db import transaction
+from django.db.models import Case, CharField, Exists, OuterRef, Value, When
+
+from contracts.models import Contract
+from contracts.utils.balances import refresh_contract_balances
+from dashboard.utils.cache import bump_dashboard_version_on_commit
+from invoices.models import BillingPeriod, Invoice
+
+logger = logging.getLogger("invoices")
+
+INVOICE_DUE_DAYS = 7
+BULK_CREATE_BATCH_SIZE = 1000
+BACKFILL_CONTRACT_CHUNK_SIZE = 500
+
+PERIOD_KEY_PATTERNS = {
+    "weekly": re.compile(r"^(\d{4})-W(\d{2})$"),
+    "biweekly": re.compile(r"^(\d{4})-(\d{2})-Q([12])$"),
+    "monthly": re.compile(r"^(\d{4})-(\d{2})$"),
+}
+
+
+def get_period_key(billing_cycle, day):
+    """
+    Builds the billing period key for a given billing cycle and date.
+
+    Args:
+        billing_cycle (str): One of "weekly", "biweekly" or "monthly".
+        day (date): Any date inside the billing period.
+
+    Returns:
+        str: The period key, e.g. "2025-W07", "2025-03-Q1" or "2025-03".
+    """
+    if billing_cycle == "weekly":
+        year, week, _ = day.isocalendar()
+        return f"{year}-W{week:02d}"
+    if billing_cycle == "biweekly":
+        quincena = 1 if day.day <= 15 else 2
+        return f"{day.year}-{day.month:02d}-Q{quincena}"
+    return f"{day.year}-{day.month:02d}"
+
+
+def get_period_start(billing_cycle, day):
+    """
+    Returns the first day of the billing period that contains the given date.
+
+    Args:
+        billing_cycle (str): One of "weekly", "biweekly" or "monthly".
+        day (date): Any date inside the billing period.
+
+    Returns:
+        date: The first day of the period.
+    """
+    if billing_cycle == "weekly":
+        return day - timedelta(days=day.weekday())
+    if billing_cycle == "biweekly":
+        return day.replace(day=1 if day.day <= 15 else 16)
+    return day.replace(day=1)
+
+
+def get_next_period_start(billing_cycle, day):
+    """
+    Returns the first day of the billing period that follows the one containing the given date.
+
+    Args:
+        billing_cycle (str): One of "weekly", "biweekly" or "monthly".
+        day (date): Any date inside the billing period.
+
+    Returns:
+        date: The first day of the next period.
+    """
+    start = get_period_start(billing_cycle, day)
+    if billing_cycle == "weekly":
+        return start + timedelta(days=7)
+    if billing_cycle == "biweekly" and start.day == 1:
+        return start.replace(day=16)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1, day=1)
+    return start.replace(month=start.month + 1, day=1)
+
+
+def iter_periods(billing_cycle, date_from, date_to):
+    """
+    Enumerates the billing periods that overlap a date range.
+
+    Args:
+        billing_cycle (str): One of "weekly", "biweekly" or "monthly".
+        date_from (date): First day of the range.
+        date_to (date): Last day of the range.
+
+    Yields:
+        tuple: (period_key, period_start, period_end) for each period, in order.
+    """
+    start = get_period_start(billing_cycle, date_from)
+    while start <= date_to:
+        next_start = get_next_period_start(billing_cycle, start)
+        yield get_period_key(billing_cycle, start), start, next_start - timedelta(days=1)
+        start = next_start
+
+
+def get_period_ordinal(billing_cycle, period_start):
+    """
+    Returns the sequential number of a period within its billing cycle.
+
+    Consecutive periods of the same cycle have consecutive ordinals, so ranges
+    such as "the last 8 weeks" become integer ranges.
+
+    Args:
+        billing_cycle (str): One of "weekly", "biweekly" or "monthly".
+        period_start (date): The first day of the period.
+
+    Returns:
+        int: The period ordinal.
+    """
+    if billing_cycle == "weekly":
+        return period_start.toordinal() // 7
+    month_index = period_start.year * 12 + period_start.month - 1
+    if billing_cycle == "biweekly":
+        return month_index * 2 + (0 if period_start.day == 1 else 1)
+    return month_index
+
+
+def parse_period_key(period_key):
+    """
+    Parses a period key back into its billing cycle and date range.
+
+    Args:
+        period_key (str): A key such as "2025-W07", "2025-03-Q1" or "2025-03".
+
+    Returns:
+        tuple: (billing_cycle, start_date, end_date), or None if the key is not valid.
+    """
+    for billing_cycle, pattern in PERIOD_KEY_PATTERNS.items():
+        match = pattern.match(period_key or "")
+        if not match:
+            continue
+        try:
+            if billing_cycle == "weekly":
+                year, week = int(match.group(1)), int(match.group(2))
+                start = date.fromisocalendar(year, week, 1)
+            elif billing_cycle == "biweekly":
+                year, month, half = (int(group) for group in match.groups())
+                start = date(year, month, 1 if half == 1 else 16)
+            else:
+                start = date(int(match.group(1)), int(match.group(2)), 1)
+        except ValueError:
+            return None
+        end = get_next_period_start(billing_cycle, start) - timedelta(days=1)
+        return billing_cycle, start, end
+    return None
+
+
+def get_billing_period_ids(period_keys):
+    """
+    Returns the BillingPeriod id of each period key, creating the missing periods.
+
+    Existing periods are read with one query; only when some are missing they are
+    inserted with one `bulk_create` and read back, whatever the number of keys.
+
+    Args:
+        period_keys (iterable): Period keys to resolve.
+
+    Returns:
+        dict: A mapping of period key to BillingPeriod id. Invalid keys are left out.
+    """
+    period_keys = set(period_keys)
+    period_ids = dict(
+        BillingPeriod.objects.filter(key__in=period_keys).values_list("key", "id")
+    )
+
+    periods = []
+    for period_key in period_keys - period_ids.keys():
+        parsed = parse_period_key(period_key)
+        if parsed is None:
+            continue
+        billing_cycle, start, end = parsed
+        periods.append(
+            BillingPeriod(
+                key=period_key,
+                billing_cycle=billing_cycle,
+                start_date=start,
+                end_date=end,
+                ordinal=get_period_ordinal(billing_cycle, start),
+            )
+        )
+
+    if periods:
+        BillingPeriod.objects.bulk_create(periods, ignore_conflicts=True)
+        period_ids.update(
+            BillingPeriod.objects.filter(
+                key__in=[period.key for period in periods]
+            ).values_list("key", "id")
+        )
+    return period_ids
+
+
+def invoices_in_period_range(date_from, date_to, billing_cycle=None):
+    """
+    Returns the invoices whose billing period starts within a date range.
+
+    The filter runs on the indexed BillingPeriod dates through a join, instead of
+    pattern matching on `Invoice.period_key`.
+
+    Args:
+        date_from (date): First day of the range.
+        date_to (date): Last day of the range.
+        billing_cycle (str, optional): Restrict to the periods of one billing cycle.
+
+    Returns:
+        QuerySet: The matching invoices.
+    """
+    invoices = Invoice.objects.filter(
+        billing_period__start_date__gte=date_from,
+        billing_period__start_date__lte=date_to,
+    )
+    if billing_cycle:
+        invoices = invoices.filter(billing_period__billing_cycle=billing_cycle)
+    return invoices
+
+
+def get_period_keys(day):
+    """
+    Returns the period key of every billing cycle for the given date.
+
+    Args:
+        day (date): The billing date.
+
+    Returns:
+        dict: A mapping of billing cycle to its period key.
+    """
+    return {
+        cycle: get_period_key(cycle, day)
+        for cycle, _ in Contract.BILLING_CYCLE_CHOICES
+    }
+
+
+def contracts_missing_invoice(day, contracts=None):
+    """
+    Returns the active contracts that have no invoice for their current period.
+
+    The period key of every billing cycle is computed once and attached to each
+    contract with a CASE expression, so the lookup of existing invoices is a single
+    anti-join (NOT EXISTS) instead of one query per contract.
+
+    Args:
+        day (date): The billing date.
+        contracts (QuerySet, optional): Contracts to consider. Defaults to all contracts.
+
+    Returns:
+        QuerySet: Values of `id`, `amount` and `current_period_key` for each contract to bill.
+    """
+    if contracts is None:
+        contracts = Contract.objects.all()
+
+    period_keys = get_period_keys(day)
+    current_period_key = Case(
+        *[
+            When(billing_cycle=cycle, then=Value(key))
+            for cycle, key in period_keys.items()
+        ],
+        default=Value(period_keys["monthly"]),
+        output_field=CharField(),
+    )
+
+    return (
+        contracts.filter(active=True)
+        .annotate(current_period_key=current_period_key)
+        .filter(
+            ~Exists(
+                Invoice.objects.filter(
+                    contract=OuterRef("pk"),
+                    period_key=OuterRef("current_period_key"),
+                )
+            )
+        )
+        .order_by("pk")
+        .values("id", "amount", "current_period_key")
+    )
+
+
+def generate_invoices(
+    day,
+    contracts=None,
+    batch_size=BULK_CREATE_BATCH_SIZE,
+    start_after=0,
+    on_chunk=None,
+):
+    """
+    Creates the missing invoices of the current billing period in bulk.
+
+    Contracts to bill are read from the anti-join query in primary-key order, one
+    chunk of `batch_size` rows at a time (keyset pagination on the contract id), and
+    inserted with `bulk_create`. Conflicts on the (contract, period_key) unique
+    constraint are ignored, so re-runs and concurrent runs do not create duplicates.
+
+    Args:
+        day (date): The billing date, used as issue date of the new invoices.
+        contracts (QuerySet, optional): Contracts to consider. Defaults to all contracts.
+        batch_size (int): Number of invoices inserted per `bulk_create` call.
+        start_after (int): Only contracts with a greater id are considered. Used to resume a run.
+        on_chunk (callable, optional): Called as `on_chunk(last_contract_id, contracts, invoices)`
+            in the same transaction as each inserted chunk, to checkpoint progress.
+
+    Returns:
+        int: The number of invoices inserted, leaving out those that already existed.
+    """
+    if contracts is None:
+        contracts = Contract.objects.all()
+
+    due_date = day + timedelta(days=INVOICE_DUE_DAYS)
+    billing_period_ids = get_billing_period_ids(get_period_keys(day).values())
+    generated_count = 0
+    last_id = start_after
+
+    while True:
+        chunk = list(
+            contracts_missing_invoice(day, contracts.filter(pk__gt=last_id))[:batch_size]
+        )
+        if not chunk:
+            break
+        last_id = chunk[-1]["id"]
+
+        generated_count += _insert_chunk(
+            [
+                Invoice(
+                    contract_id=contract["id"],
+                    issue_date=day,
+                    due_date=due_date,
+                    amount=contract["amount"],
+                    period_key=contract["current_period_key"],
+                    billing_period_id=billing_period_ids.get(contract["current_period_key"]),
+                )
+                for contract in chunk
+            ],
+            last_id,
+            len(chunk),
+            batch_size,
+            on_chunk,
+        )
+        if len(chunk) < batch_size:
+            break
+
+    return generated_count
+
+
+def backfill_invoices(
+    date_from,
+    date_to,
+    contracts=None,
+    chunk_size=BACKFILL_CONTRACT_CHUNK_SIZE,
+    batch_size=BULK_CREATE_BATCH_SIZE,
+    start_after=0,
+    on_chunk=None,
+):
+    """
+    Creates every invoice missing between two dates for the active contracts.
+
+    The periods of each billing cycle in the range are enumerated once. Contracts
+    are then streamed in primary-key chunks; for each chunk the existing period keys
+    are fetched with one query, diffed against the expected periods (starting at the
+    period that contains the contract's `start_date`) and the missing invoices are
+    inserted with chunked `bulk_create`. Memory stays proportional to one chunk.
+
+    Args:
+        date_from (date): First day of the range to backfill.
+        date_to (date): Last day of the range to backfill.
+        contracts (QuerySet, optional): Contracts to consider. Defaults to all contracts.
+        chunk_size (int): Number of contracts processed per chunk.
+        batch_size (int): Number of invoices inserted per `bulk_create` call.
+        start_after (int): Only contracts with a greater id are considered. Used to resume a run.
+        on_chunk (callable, optional): Called as `on_chunk(last_contract_id, contracts, invoices)`
+            in the same transaction as each inserted chunk, to checkpoint progress.
+
+    Returns:
+        int: The number of invoices inserted, leaving out those that already existed.
+    """
+    if contracts is None:
+        contracts = Contract.objects.all()
+
+    periods = {
+        cycle: list(iter_periods(cycle, date_from, date_to))
+        for cycle, _ in Contract.BILLING_CYCLE_CHOICES
+    }
+    period_keys = {key for cycle_periods in periods.values() for key, _, _ in cycle_periods}
+    billing_period_ids = get_billing_period_ids(period_keys)
+
+    contracts = (
+        contracts.filter(active=True, start_date__lte=date_to)
+        .order_by("pk")
+        .values("id", "amount", "billing_cycle", "start_date")
+    )
+
+    generated_count = 0
+    last_id = start_after
+    while True:
+        chunk = list(contracts.filter(pk__gt=last_id)[:chunk_size])
+        if not chunk:
+            break
+        last_id = chunk[-1]["id"]
+
+        existing = set(
+            Invoice.objects.filter(
+                contract_id__in=[contract["id"] for contract in chunk],
+                period_key__in=period_keys,
+            ).values_list("contract_id", "period_key")
+        )
+
+        invoices = []
+        for contract in chunk:
+            cycle_periods = periods.get(contract["billing_cycle"], periods["monthly"])
+            for period_key, period_start, period_end in cycle_periods:
+                if period_end < contract["start_date"]:
+                    continue
+                if (contract["id"], period_key) in existing:
+                    continue
+                issue_date = max(period_start, contract["start_date"], date_from)
+                invoices.append(
+                    Invoice(
+                        contract_id=contract["id"],
+                        issue_date=issue_date,
+                        due_date=issue_date + timedelta(days=INVOICE_DUE_DAYS),
+                        amount=contract["amount"],
+                        period_key=period_key,
+                        billing_period_id=billing_period_ids.get(period_key),
+                    )
+                )
+
+        generated_count += _insert_chunk(
+            invoices, last_id, len(chunk), batch_size, on_chunk
+        )
+        if len(chunk) < chunk_size:
+            break
+
+    return generated_count
+
+
+def _insert_chunk(invoices, last_contract_id, contracts_count, batch_size, on_chunk):
+    """
+    Inserts the invoices of one chunk of contracts, refreshes the balances of the
+    billed contracts and the dashboard cache version (bulk inserts do not send
+    signals) and checkpoints it atomically.
+
+    `bulk_create(ignore_conflicts=True)` does not report which rows were skipped, so
+    the invoices of the chunk's contracts and periods are counted before and after
+    the insert. Returns the number of invoices actually inserted.
+    """
+    inserted = 0
+    with transaction.atomic():
+        if invoices:
+            existing = Invoice.objects.filter(
+                contract_id__in={invoice.contract_id for invoice in invoices},
+                period_key__in={invoice.period_key for invoice in invoices},
+            )
+            before = existing.count()
+            for start in range(0, len(invoices), batch_size):
+                batch = invoices[start:start + batch_size]
+                Invoice.objects.bulk_create(batch, ignore_conflicts=True)
+            inserted = existing.count() - before
+            logger.info(f"Inserted {inserted} of {len(invoices)} invoices")
+        if inserted:
+            refresh_contract_balances({invoice.contract_id for invoice in invoices})
+            bump_dashboard_version_on_commit(Invoice._meta.label_lower)
+        if on_chunk:
+            on_chunk(last_contract_id, contracts_count, inserted)
+    return inserted
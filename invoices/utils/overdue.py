@@ -0,0 +1,81 @@
+import logging
+import time
+
+from core.metrics import JOB_BUCKETS, observe
+from dashboard.utils.cache import bump_dashboard_version_on_commit
+from invoices.models import Invoice, OverdueSweep
+
+logger = logging.getLogger("invoices")
+
+OVERDUE_CHUNK_SIZE = 5000
+
+
+def mark_overdue_invoices(day, chunk_size=OVERDUE_CHUNK_SIZE):
+    """
+    Moves every pending invoice whose due date is before `day` to "vencido".
+
+    Each chunk is a single UPDATE whose rows are picked by a LIMITed subquery on the
+    (payment_status, due_date) index, so no invoice is loaded into Python and locks
+    are held for one chunk at a time.
+
+    Args:
+        day (date): The reference date. Invoices due before this date are overdue.
+        chunk_size (int): Maximum number of invoices updated per statement.
+
+    Returns:
+        dict: The number of invoices updated and the duration of the sweep in seconds.
+    """
+    started = time.monotonic()
+    overdue = Invoice.objects.filter(payment_status="pendiente", due_date__lt=day)
+    updated_count = 0
+
+    while True:
+        updated = Invoice.objects.filter(
+            pk__in=overdue.order_by().values("pk")[:chunk_size]
+        ).update(payment_status="vencido")
+        updated_count += updated
+        if updated < chunk_size:
+            break
+
+    if updated_count:
+        # Bulk updates do not send signals.
+        bump_dashboard_version_on_commit(Invoice._meta.label_lower)
+
+    duration = time.monotonic() - started
+    logger.info(f"Marked {updated_count} invoices as overdue in {duration:.2f}s")
+    return {"updated": updated_count, "duration": duration}
+
+
+def run_overdue_sweep(day, chunk_size=OVERDUE_CHUNK_SIZE):
+    """
+    Runs `mark_overdue_invoices` and records it in the OverdueSweep ledger and the
+    job duration metrics. Used by the management command and the RQ job.
+
+    Args:
+        day (date): The reference date. Invoices due before this date are overdue.
+        chunk_size (int): Maximum number of invoices updated per statement.
+
+    Returns:
+        OverdueSweep: The completed sweep.
+
+    Raises:
+        Exception: Any error of the sweep, after recording it as failed.
+    """
+    sweep = OverdueSweep.objects.create(run_date=day)
+    started = time.monotonic()
+    try:
+        result = mark_overdue_invoices(day, chunk_size=chunk_size)
+    except Exception as e:
+        sweep.fail(e, time.monotonic() - started)
+        raise
+    else:
+        sweep.finish(result["updated"], result["duration"])
+    finally:
+        observe(
+            "crm_job_duration_seconds",
+            sweep.duration,
+            buckets=JOB_BUCKETS,
+            job="mark_overdue_invoices",
+            status=sweep.status,
+        )
+    return sweep
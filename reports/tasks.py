@@ -1,31 +1,50 @@
 from django.core.mail import EmailMessage
 from django.conf import settings
 from django_rq import job
+import time
+
+from core.metrics import JOB_BUCKETS, observe
 
 from .utils.file_generator import generate_excel, generate_csv
-from dashboard.utils.search_utils import filter_data
+from dashboard.models import UploadedDataset
+from dashboard.utils.datasets import iter_dataset_rows
 import logging
 
 logger = logging.getLogger("reports")
 
 
 @job
-def generate_and_send_report(user_email, selected_columns, data, format="xlsx"):
+def generate_and_send_report(user_email, selected_columns, dataset_id, format="xlsx"):
+    """
+    Builds a report with the selected columns of an uploaded dataset and emails it.
+
+    The job receives the dataset id instead of the rows, so the queue payload does
+    not grow with the file; the rows are read from the dataset store in chunks.
+
+    Args:
+        user_email (str): The recipient of the report.
+        selected_columns (list): The columns included in the report.
+        dataset_id (int): The primary key of the UploadedDataset.
+        format (str): "csv" or "xlsx".
+    """
 
     logger.info(
         f"Generate and send report called with selected_columns: {selected_columns} and format: {format}"
     )
 
+    started = time.monotonic()
+    status = "failed"
     try:
-        filtered_data = filter_data(data, "")
+        dataset = UploadedDataset.objects.get(pk=dataset_id)
+        rows = iter_dataset_rows(dataset)
 
         if format == "csv":
             file_stream, mime_type, filename = generate_csv(
-                selected_columns, filtered_data
+                selected_columns, rows
             )
         else:
             file_stream, mime_type, filename = generate_excel(
-                selected_columns, filtered_data
+                selected_columns, rows
             )
 
         logger.info(
@@ -40,5 +59,14 @@ def generate_and_send_report(user_email, selected_columns, data, format="xlsx"):
         file_stream.seek(0)
         email.attach(filename, file_stream.read(), mime_type)
         email.send()
+        status = "finished"
     except Exception as e:
         logger.error(f"Failed to generate or send report to {user_email}: {str(e)}")
+    finally:
+        observe(
+            "crm_job_duration_seconds",
+            time.monotonic() - started,
+            buckets=JOB_BUCKETS,
+            job="generate_and_send_report",
+            status=status,
+        )
@@ -9,7 +9,7 @@ def generate_excel(columns, data):
 
     Args:
         columns (list): A list of column headers for the Excel file.
-        data (list of dict): A list of dictionaries representing the rows of data.
+        data (iterable of dict): The rows of data, read once.
 
     Returns:
         tuple: A tuple containing:
@@ -38,7 +38,7 @@ def generate_csv(columns, data):
 
     Args:
         columns (list): A list of column headers for the CSV file.
-        data (list of dict): A list of dictionaries representing the rows of data.
+        data (iterable of dict): The rows of data, read once.
 
     Returns:
         tuple: A tuple containing:
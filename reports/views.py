@@ -3,6 +3,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.http import HttpResponse
 from django.views import View
 from .tasks import generate_and_send_report
+from dashboard.utils.datasets import get_session_dataset
 from django.contrib import messages
 import logging
 
@@ -13,7 +14,8 @@ class ReportView(LoginRequiredMixin, View):
     """
     View for handling report generation requests.
 
-    This view allows authenticated users to generate reports based on session data.
+    This view allows authenticated users to generate reports from the dataset
+    uploaded in their session.
     The report generation is handled asynchronously using a background task.
     """
 
@@ -21,8 +23,8 @@ class ReportView(LoginRequiredMixin, View):
         """
         Handles POST requests to generate a report.
 
-        This method retrieves data from the session, validates the presence of data,
-        and sends a background task to generate the report. It notifies the user
+        This method retrieves the dataset referenced by the session, validates the
+        presence of data, and sends a background task to generate the report. It notifies the user
         that the report will be sent via email.
 
         Args:
@@ -37,19 +39,27 @@ class ReportView(LoginRequiredMixin, View):
             user_email = request.user.email
             selected_columns = request.POST.getlist("columns")
             format = request.POST.get("format", "csv")
-            data = request.session.get("data", [])
+            dataset = get_session_dataset(request)
 
             logger.info(
                 f"Report request by {user_email} for columns: {selected_columns}"
             )
 
-            if not data:
+            if not dataset or not dataset.row_count:
                 logger.info("No data found")
                 return HttpResponse(
                     "No hay datos disponibles para generar el reporte.", status=400
                 )
 
-            generate_and_send_report.delay(user_email, selected_columns, data, format)
+            if dataset.in_progress:
+                return HttpResponse(
+                    "El archivo aún se está procesando. Intenta de nuevo cuando termine.",
+                    status=409,
+                )
+
+            generate_and_send_report.delay(
+                user_email, selected_columns, dataset.pk, format
+            )
 
             messages.success(
                 request, "Tu reporte está siendo procesado y será enviado a tu correo."
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.20 on 2026-10-17 18:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contracts', '0006_contractbalance'),
+        ('vehicles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicle',
+            name='available_since',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Disponible desde'),
+        ),
+        migrations.AddField(
+            model_name='vehicle',
+            name='current_contract',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='contracts.contract', verbose_name='Contrato actual'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(condition=models.Q(('current_contract__isnull', True)), fields=['available_since'], name='vehicle_available_idx'),
+        ),
+    ]
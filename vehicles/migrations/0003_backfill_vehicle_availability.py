@@ -0,0 +1,51 @@
+from django.db import migrations
+from django.db.models import Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_vehicle_availability(apps, schema_editor):
+    """
+    Links every vehicle to its active contract. Vehicles without one become
+    available on the last invoice of their most recent contract (or its start
+    date when it has no invoices); vehicles that never had a contract stay empty.
+    """
+    Vehicle = apps.get_model("vehicles", "Vehicle")
+    Contract = apps.get_model("contracts", "Contract")
+    Invoice = apps.get_model("invoices", "Invoice")
+
+    active_contracts = Contract.objects.filter(vehicle=OuterRef("pk"), active=True)
+    Vehicle.objects.filter(Exists(active_contracts)).update(
+        current_contract=Subquery(
+            active_contracts.order_by("-start_date", "-pk").values("pk")[:1]
+        ),
+        available_since=None,
+    )
+
+    last_contract = Contract.objects.filter(vehicle=OuterRef("pk")).order_by(
+        "-start_date", "-pk"
+    )
+    last_invoice_date = (
+        Invoice.objects.filter(contract=OuterRef("pk"))
+        .order_by("-issue_date")
+        .values("issue_date")[:1]
+    )
+    Vehicle.objects.filter(~Exists(active_contracts)).update(
+        current_contract=None,
+        available_since=Subquery(
+            last_contract.annotate(
+                end=Coalesce(Subquery(last_invoice_date), "start_date")
+            ).values("end")[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0007_invoicerun'),
+        ('vehicles', '0002_vehicle_availability'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_vehicle_availability, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+import re
+from collections import defaultdict
+
+from django.db import migrations
+
+
+def normalize_plate(value):
+    # Frozen copy of vehicles.utils.plates.normalize_plate.
+    return re.sub(r"\s", "", value or "").upper()
+
+
+def normalize_license_plates(apps, schema_editor):
+    """
+    Stores every license plate in its normalized form, so uploads and searches
+    match vehicles whose plate was typed in lower case or with spaces. Stops if
+    two vehicles would end up with the same plate, listing their ids: an operator
+    must merge them and then run the migration again.
+    """
+    Vehicle = apps.get_model("vehicles", "Vehicle")
+
+    vehicles = defaultdict(list)
+    for pk, plate in Vehicle.objects.order_by("pk").values_list("pk", "license_plate"):
+        vehicles[normalize_plate(plate)].append((pk, plate))
+
+    conflicts = [
+        f"Placa {plate}: vehículos {[pk for pk, _ in rows]}"
+        for plate, rows in vehicles.items()
+        if len(rows) > 1
+    ]
+    if conflicts:
+        raise RuntimeError(
+            "No se pueden normalizar las placas porque varios vehículos quedarían con "
+            "la misma. Unifique estos vehículos y vuelva a migrar:\n" + "\n".join(conflicts)
+        )
+
+    changed = [
+        Vehicle(pk=pk, license_plate=normalized)
+        for normalized, rows in vehicles.items()
+        for pk, plate in rows
+        if plate != normalized
+    ]
+    Vehicle.objects.bulk_update(changed, ["license_plate"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0003_backfill_vehicle_availability'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_license_plates, migrations.RunPython.noop),
+    ]
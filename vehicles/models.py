@@ -1,5 +1,8 @@
 import uuid
 from django.db import models
+from django.db.models import F, Q
+
+from vehicles.utils.plates import normalize_plate
 
 
 class VehicleModel(models.Model):
@@ -18,6 +21,18 @@ class VehicleModel(models.Model):
         return f"{self.brand} {self.model}"
     
 
+class VehicleQuerySet(models.QuerySet):
+    def available(self):
+        """
+        Returns the vehicles without an active contract, the longest idle first.
+        Vehicles that never had a contract come first. Served by the partial
+        `vehicle_available_idx` index.
+        """
+        return self.filter(current_contract__isnull=True).order_by(
+            F("available_since").asc(nulls_first=True), "pk"
+        )
+
+
 class Vehicle(models.Model):
     """
     Model representing a vehicle.
@@ -29,16 +44,51 @@ class Vehicle(models.Model):
         uid (UUIDField): A unique identifier for the vehicle (auto-generated).
         brand (CharField): The brand of the vehicle (max length: 100).
         model (CharField): The model of the vehicle (max length: 100).
-        license_plate (CharField): The unique license plate of the vehicle (max length: 20).
+        license_plate (CharField): The unique license plate of the vehicle (max length: 20), stored
+            normalized (see vehicles.utils.plates).
         year (PositiveIntegerField): The manufacturing year of the vehicle (optional).
+        current_contract (ForeignKey): The active contract of the vehicle, if any. Maintained
+            by the contract signals (see vehicles.utils.availability).
+        available_since (DateField): The date the vehicle became available, the only source of
+            its idle time (see vehicles.utils.activity). Empty while it has an active contract or
+            if it never had one.
 
     Methods:
+        save(): Normalizes the license plate before saving.
         __str__(): Returns a string representation of the vehicle, including its brand, model, and license plate.
     """
     uid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
     vehicle_model = models.ForeignKey(VehicleModel, on_delete=models.CASCADE, verbose_name="Marca y modelo")
     license_plate = models.CharField("Placa", max_length=20, unique=True)
     year = models.PositiveIntegerField("Año", blank=True, null=True)
+    current_contract = models.ForeignKey(
+        "contracts.Contract",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        editable=False,
+        related_name="+",
+        verbose_name="Contrato actual",
+    )
+    available_since = models.DateField(
+        "Disponible desde", blank=True, null=True, editable=False
+    )
+
+    objects = VehicleQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Only the idle fleet is indexed, sorted by idle time.
+            models.Index(
+                fields=["available_since"],
+                name="vehicle_available_idx",
+                condition=Q(current_contract__isnull=True),
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.license_plate = normalize_plate(self.license_plate)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.vehicle_model} - {self.license_plate}"
@@ -0,0 +1,134 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+
+from clients.models import Client
+from contracts.models import Contract
+from invoices.models import Invoice
+from vehicles.models import Vehicle, VehicleModel
+from vehicles.utils.activity import annotate_contract_activity
+from vehicles.utils.availability import refresh_vehicle_availability
+
+
+class ContractActivityTests(TestCase):
+    """Tests for the contract activity annotations of vehicles."""
+
+    def setUp(self):
+        self.vehicle_model = VehicleModel.objects.create(brand="Honda", model="CB190")
+        self.client_obj = Client.objects.create(
+            first_name="Ana", last_name="Prueba", document_number="1", email="ana@example.com"
+        )
+
+    def create_vehicle(self, plate, contracts=()):
+        vehicle = Vehicle.objects.create(vehicle_model=self.vehicle_model, license_plate=plate)
+        for start_date, active, issue_dates in contracts:
+            contract = Contract.objects.create(
+                client=self.client_obj,
+                vehicle=vehicle,
+                start_date=start_date,
+                weekly_payment=Decimal("100.00"),
+                amount=Decimal("1000.00"),
+                active=active,
+            )
+            for index, issue_date in enumerate(issue_dates):
+                Invoice.objects.create(
+                    contract=contract,
+                    issue_date=issue_date,
+                    due_date=issue_date,
+                    amount=Decimal("100.00"),
+                    period_key=f"{plate}-{index}",
+                )
+        return vehicle
+
+    def test_idle_time_is_counted_from_availability(self):
+        """The idle time is derived from the date the vehicle became available."""
+        idle = self.create_vehicle(
+            "AAA111", [(date(2024, 1, 1), True, [date(2024, 2, 1), date(2024, 7, 1)])]
+        )
+        refresh_vehicle_availability([idle.pk])
+        Contract.objects.filter(vehicle=idle).update(active=False)
+        refresh_vehicle_availability([idle.pk], day=date(2024, 7, 3))
+        rented = self.create_vehicle("BBB222", [(date(2025, 1, 1), True, [date(2025, 1, 8)])])
+        new = self.create_vehicle("CCC333")
+
+        vehicles = {
+            vehicle.pk: vehicle
+            for vehicle in annotate_contract_activity(Vehicle.objects.all(), date(2024, 7, 13))
+        }
+        self.assertFalse(vehicles[idle.pk].has_active_contract)
+        self.assertEqual(vehicles[idle.pk].last_contract_end, date(2024, 7, 3))
+        self.assertEqual(vehicles[idle.pk].days_idle, timedelta(days=10))
+        self.assertTrue(vehicles[rented.pk].has_active_contract)
+        self.assertIsNone(vehicles[rented.pk].days_idle)
+        self.assertIsNone(vehicles[new.pk].last_contract_end)
+        self.assertIsNone(vehicles[new.pk].days_idle)
+
+    def test_one_query_regardless_of_history(self):
+        """Invoice history does not add queries."""
+        history = [date(2024, 1, 1) + timedelta(weeks=week) for week in range(30)]
+        self.create_vehicle("AAA111", [(date(2024, 1, 1), False, history)])
+        with self.assertNumQueries(1):
+            list(annotate_contract_activity(Vehicle.objects.select_related("vehicle_model")))
+
+
+class VehicleAvailabilityTests(TestCase):
+    """Tests for the denormalized vehicle availability."""
+
+    def setUp(self):
+        vehicle_model = VehicleModel.objects.create(brand="Honda", model="CB190")
+        self.vehicles = [
+            Vehicle.objects.create(vehicle_model=vehicle_model, license_plate=f"AAA{index}")
+            for index in range(3)
+        ]
+        self.clients = [
+            Client.objects.create(
+                first_name=f"Cliente {index}",
+                last_name="Prueba",
+                document_number=f"DOC{index}",
+                email=f"cliente{index}@example.com",
+            )
+            for index in range(3)
+        ]
+
+    def create_contract(self, index, vehicle):
+        return Contract.objects.create(
+            client=self.clients[index],
+            vehicle=vehicle,
+            start_date=date(2025, 1, 6),
+            weekly_payment=Decimal("100.00"),
+            amount=Decimal("1000.00"),
+        )
+
+    def test_contracts_keep_the_current_contract_in_sync(self):
+        """Creating, ending and deleting contracts update the vehicle."""
+        rented, other, _ = self.vehicles
+        contract = self.create_contract(0, rented)
+        rented.refresh_from_db()
+        self.assertEqual(rented.current_contract, contract)
+        self.assertIsNone(rented.available_since)
+
+        contract.active = False
+        contract.save()
+        rented.refresh_from_db()
+        self.assertIsNone(rented.current_contract)
+        self.assertIsNotNone(rented.available_since)
+
+        second = self.create_contract(1, other)
+        second.delete()
+        other.refresh_from_db()
+        self.assertIsNone(other.current_contract)
+        self.assertIsNone(other.available_since)
+
+    def test_available_vehicles_are_sorted_by_idle_time(self):
+        """Never-rented vehicles come first, then the longest idle ones."""
+        recent, old, never = self.vehicles
+        self.create_contract(0, self.vehicles[0])
+        Vehicle.objects.filter(pk=recent.pk).update(
+            current_contract=None, available_since=date(2025, 5, 1)
+        )
+        Vehicle.objects.filter(pk=old.pk).update(available_since=date(2025, 1, 1))
+        self.assertEqual(list(Vehicle.objects.available()), [never, old, recent])
+
+        Contract.objects.get().save()
+        self.assertEqual(list(Vehicle.objects.available()), [never, old])
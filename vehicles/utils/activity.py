@@ -0,0 +1,39 @@
+import logging
+
+from django.db.models import BooleanField, DateField, DurationField, ExpressionWrapper, F
+from django.db.models import Q, Value
+from django.utils.timezone import now
+
+logger = logging.getLogger(__name__)
+
+
+def annotate_contract_activity(vehicles, day=None):
+    """
+    Annotates a vehicle queryset with its contract activity, read from the
+    denormalized availability columns (see vehicles.utils.availability).
+
+    - `has_active_contract`: Whether the vehicle has an active contract, read from
+      `current_contract`.
+    - `last_contract_end`: When the vehicle became available, read from
+      `available_since`. Empty while it has an active contract or if it never had one.
+    - `days_idle`: Time elapsed since `last_contract_end`, as a timedelta.
+
+    Args:
+        vehicles (QuerySet): A Vehicle queryset.
+        day (date, optional): The reference date for `days_idle`. Defaults to today.
+
+    Returns:
+        QuerySet: The annotated queryset. No contract or invoice is read, so the
+        cost per vehicle does not depend on its history.
+    """
+    day = day or now().date()
+    return vehicles.annotate(
+        has_active_contract=ExpressionWrapper(
+            Q(current_contract__isnull=False), output_field=BooleanField()
+        ),
+        last_contract_end=F("available_since"),
+        days_idle=ExpressionWrapper(
+            Value(day, output_field=DateField()) - F("available_since"),
+            output_field=DurationField(),
+        ),
+    )
@@ -0,0 +1,56 @@
+import logging
+
+from django.db.models import Case, DateField, Exists, OuterRef, Subquery, Value, When
+from django.utils.timezone import now
+
+from contracts.models import Contract
+from vehicles.models import Vehicle
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_vehicle_availability(vehicle_ids, day=None):
+    """
+    Updates `current_contract` and `available_since` of the given vehicles from
+    their contracts, with two UPDATE statements.
+
+    A vehicle that loses its active contract becomes available on `day`; its idle
+    time is counted from that date (see vehicles.utils.activity). Vehicles that
+    were already available keep their date, and vehicles that never had a
+    contract stay without one.
+
+    Args:
+        vehicle_ids (iterable): Primary keys of the vehicles to refresh.
+        day (date, optional): The date freed vehicles become available. Defaults to today.
+
+    Returns:
+        int: The number of vehicles updated.
+    """
+    vehicle_ids = list(vehicle_ids)
+    if not vehicle_ids:
+        return 0
+    day = day or now().date()
+    active_contracts = Contract.objects.filter(vehicle=OuterRef("pk"), active=True)
+    vehicles = Vehicle.objects.filter(pk__in=vehicle_ids)
+
+    rented = vehicles.filter(Exists(active_contracts)).update(
+        current_contract=Subquery(
+            active_contracts.order_by("-start_date", "-pk").values("pk")[:1]
+        ),
+        available_since=None,
+    )
+    freed = vehicles.filter(~Exists(active_contracts)).update(
+        current_contract=None,
+        available_since=Case(
+            When(current_contract__isnull=False, then=Value(day)),
+            # The active contract was deleted (SET_NULL cleared the link first).
+            When(
+                Exists(Contract.objects.filter(vehicle=OuterRef("pk"))),
+                available_since__isnull=True,
+                then=Value(day),
+            ),
+            default="available_since",
+            output_field=DateField(),
+        ),
+    )
+    return rented + freed
@@ -0,0 +1,15 @@
+import re
+
+
+def normalize_plate(value):
+    """
+    Returns the canonical form of a license plate: upper case without spaces, e.g.
+    "abc 123" becomes "ABC123". Plates are stored and looked up in this form.
+
+    Args:
+        value (str): The plate as entered.
+
+    Returns:
+        str: The normalized plate.
+    """
+    return re.sub(r"\s", "", value or "").upper()
@@ -2,12 +2,10 @@ from django.shortcuts import redirect
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views import View
 from django.contrib import messages
-from django.db.models import Prefetch
 import logging
 
 from vehicles.models import Vehicle, VehicleModel
-from contracts.models import Contract
-from invoices.models import Invoice
+from vehicles.utils.activity import annotate_contract_activity
 
 logger = logging.getLogger(__name__)
 
@@ -29,35 +27,16 @@ class CreateVehicleInstanceView(LoginRequiredMixin, View):
 
     def get(self, request):
         """
-        Returns a filtered list of vehicles.
+        Returns a filtered list of vehicles annotated with `has_active_contract`,
+        `last_contract_end` and `days_idle` (see `annotate_contract_activity`).
         """
         filters = {
             k: v
             for k, v in request.GET.items()
             if k in [field.name for field in Vehicle._meta.fields]
         }
-        vehicles = (
-            Vehicle.objects.filter(**filters)
-            .select_related("vehicle_model")
-            .prefetch_related(
-                Prefetch(
-                    "contract_set",
-                    queryset=Contract.objects.filter(active=True),
-                    to_attr="active_contracts",
-                ),
-                Prefetch(
-                    "contract_set",
-                    queryset=Contract.objects.filter(active=False).order_by(
-                        "-start_date"
-                    ).prefetch_related(Prefetch(
-                        "invoice_set",
-                        queryset=Invoice.objects.all().order_by("-issue_date"),
-                        to_attr="invoices",
-                    )),
-                    to_attr="ended_contracts",
-                ),
-            )
-            .all()
+        vehicles = annotate_contract_activity(
+            Vehicle.objects.filter(**filters).select_related("vehicle_model")
         )
 
         return vehicles